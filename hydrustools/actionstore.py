@@ -0,0 +1,132 @@
+import pprint
+from array import array
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator
+
+# Identifiers (usually a whole note body) are only shown for review
+IDENTIFIER_MAX_LEN = 160
+
+
+@dataclass(slots=True)
+class TagAction():
+    file_id: int
+    identifier: str
+    new_tags: list[str]
+
+
+class LazyFormat():
+    """Defers building a log or display string until it is actually rendered.
+
+    >>> str(LazyFormat("{} + {}".format, 1, 2))
+    '1 + 2'
+    """
+    __slots__ = ("func", "args")
+
+    def __init__(self, func: Callable[..., str], *args: Any) -> None:
+        self.func = func
+        self.args = args
+
+    def __str__(self) -> str:
+        return self.func(*self.args)
+
+
+def truncate(s: str, max_len: int = IDENTIFIER_MAX_LEN) -> str:
+    """
+    >>> truncate("abcdef", 4)
+    'abc…'
+    """
+    if len(s) <= max_len:
+        return s
+    return s[:max_len - 1] + "…"
+
+
+class TagActionStore():
+    """A compact, append-only list of TagActions stored in columns.
+
+    File ids live in an array, identifiers are truncated and stored once per
+    distinct string, and tag strings are interned into a table so each action
+    only holds integer references. Indexing returns a freshly built TagAction.
+
+    >>> store = TagActionStore([TagAction(1, "a.png", ["page:1"]), TagAction(2, "b.png", ["page:1", "page:2"])])
+    >>> len(store), store.tag_table
+    (2, ['page:1', 'page:2'])
+    >>> store[1]
+    TagAction(file_id=2, identifier='b.png', new_tags=['page:1', 'page:2'])
+    """
+    __slots__ = (
+        "file_ids", "identifier_refs", "identifiers", "_identifier_index",
+        "tag_offsets", "tag_refs", "tag_table", "_tag_index",
+    )
+
+    def __init__(self, actions: Iterable[TagAction] = ()) -> None:
+        self.file_ids = array('q')
+        self.identifier_refs = array('l')
+        self.identifiers: list[str] = []
+        self._identifier_index: dict[str, int] = {}
+
+        # Tags of row i are tag_refs[tag_offsets[i]:tag_offsets[i + 1]]
+        self.tag_offsets = array('l', [0])
+        self.tag_refs = array('l')
+        self.tag_table: list[str] = []
+        self._tag_index: dict[str, int] = {}
+
+        self.extend(actions)
+
+    def _intern(self, value: str, table: list[str], index: dict[str, int]) -> int:
+        ref = index.get(value)
+        if ref is None:
+            ref = index[value] = len(table)
+            table.append(value)
+        return ref
+
+    def append(self, file_id: int, identifier: str, new_tags: Iterable[str]) -> None:
+        self.file_ids.append(file_id)
+        self.identifier_refs.append(self._intern(truncate(identifier), self.identifiers, self._identifier_index))
+        self.tag_refs.extend(self._intern(tag, self.tag_table, self._tag_index) for tag in new_tags)
+        self.tag_offsets.append(len(self.tag_refs))
+
+    def add(self, action: TagAction) -> None:
+        self.append(action.file_id, action.identifier, action.new_tags)
+
+    def extend(self, actions: Iterable[TagAction]) -> None:
+        for action in actions:
+            self.append(action.file_id, action.identifier, action.new_tags)
+
+    def __len__(self) -> int:
+        return len(self.file_ids)
+
+    def tags(self, index: int) -> list[str]:
+        return [
+            self.tag_table[ref]
+            for ref in self.tag_refs[self.tag_offsets[index]:self.tag_offsets[index + 1]]
+        ]
+
+    def identifier(self, index: int) -> str:
+        return self.identifiers[self.identifier_refs[index]]
+
+    def __getitem__(self, index: int) -> TagAction:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return TagAction(self.file_ids[index], self.identifier(index), self.tags(index))
+
+    def __iter__(self) -> Iterator[TagAction]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def rows(self, indices: Iterable[int] | None = None) -> Iterator[tuple[int, str, list[str]]]:
+        for index in (range(len(self)) if indices is None else indices):
+            yield self.file_ids[index], self.identifier(index), self.tags(index)
+
+    def preview(self, limit: int = 20) -> LazyFormat:
+        """A lazily formatted summary for logs: the first `limit` actions and a count."""
+        def _format() -> str:
+            head = pprint.pformat([self[i] for i in range(min(limit, len(self)))])
+            if len(self) > limit:
+                head += f"\n... and {len(self) - limit} more"
+            return head
+        return LazyFormat(_format)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} of {len(self)} actions, {len(self.tag_table)} distinct tags>"
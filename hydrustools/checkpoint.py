@@ -0,0 +1,41 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpoint():
+    """Progress of a long-running job, persisted as JSON so it can be resumed.
+
+    Stored next to the settings INI as "{name}.checkpoint.json". Writes go
+    through a temporary file so an interrupted save never corrupts the last
+    good checkpoint.
+    """
+    def __init__(self, name: str, directory: Path | None = None) -> None:
+        self.name = name
+        self.path = Path(directory or ".") / f"{name}.checkpoint.json"
+
+    def load(self) -> dict[str, Any] | None:
+        if not self.path.exists():
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return None
+
+    def save(self, state: dict[str, Any]) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
@@ -1,13 +1,24 @@
 import logging
 import tkinter as tk
 from contextlib import contextmanager
-from tkinter import ttk
-from typing import Any, Generator, NamedTuple
+from tkinter import filedialog, messagebox, ttk
+from typing import Any, Generator, Iterable, NamedTuple
 
-import win32clipboard
+try:
+    import win32clipboard
+except ImportError:
+    # Not on Windows: fall back to the Tk clipboard
+    win32clipboard = None
+
+from .. import export
 
 logging.basicConfig(level=logging.INFO)
 
+# Longer clipboards are shown truncated; Copy and Save still use all of it
+TEXT_PREVIEW_CHARS = 100_000
+# Clipboards with more lines than this go straight to a file
+CLIPBOARD_MAX_LINES = 50_000
+
 class Increment():
     def __init__(self):
         self.value = -1
@@ -67,6 +78,49 @@ class ScrollableFrame(ttk.Frame):
         return self.scrollable_frame
 
 
+def saveRowsAs(parent: tk.Misc | None, rows: Iterable[dict], headers: list[str] | None = None, title: str = "Export") -> int | None:
+    """Ask for a file and stream rows to it (see export.export_rows). Returns the row count."""
+    suffixes = export.available_formats()
+    path = filedialog.asksaveasfilename(
+        parent=parent,
+        title=title,
+        defaultextension=suffixes[0],
+        filetypes=[(export.FORMAT_NAMES[suffix], f"*{suffix}") for suffix in suffixes],
+    )
+    if not path:
+        return None
+    try:
+        return export.export_rows(path, rows, headers)
+    except (OSError, ValueError, RuntimeError) as e:
+        messagebox.showerror(title="Export failed", message=str(e), parent=parent)
+        return None
+
+
+def saveLinesAs(parent: tk.Misc | None, lines: Iterable[str], title: str = "Save") -> int | None:
+    """Ask for a text file and write lines to it. Returns the line count."""
+    path = filedialog.asksaveasfilename(
+        parent=parent,
+        title=title,
+        defaultextension=".txt",
+        filetypes=[("Text", "*.txt")],
+    )
+    if not path:
+        return None
+    try:
+        return export.write_lines(path, lines)
+    except OSError as e:
+        messagebox.showerror(title="Save failed", message=str(e), parent=parent)
+        return None
+
+
+def showClipboard(lines: list[str]) -> None:
+    """Show an import clipboard (e.g. "child\nparent" pairs), or save it if it is huge."""
+    if len(lines) > CLIPBOARD_MAX_LINES:
+        saveLinesAs(None, lines, title=f"Save {len(lines)} clipboard lines")
+    else:
+        TextCopyWindow('\n'.join(lines))
+
+
 class TextCopyWindow(tk.Tk):
     helpstr = """Change this help string"""
 
@@ -80,17 +134,28 @@ class TextCopyWindow(tk.Tk):
         self.mainloop()
 
     def copy(self):
+        if win32clipboard is None:
+            self.clipboard_clear()
+            self.clipboard_append(self.body)
+            return
         win32clipboard.OpenClipboard()
         win32clipboard.EmptyClipboard()
         win32clipboard.SetClipboardText(self.body) # type: ignore
         win32clipboard.CloseClipboard()
 
+    def save(self):
+        saveLinesAs(self, self.body.splitlines(), title="Save clipboard")
+
     def initwindow(self) -> None:
         self.title("Clipboard")
         self.geometry("400x250")
 
         text = tk.Text(self, padx=4, pady=4)
-        text.insert(tk.END, self.body)
+        if len(self.body) > TEXT_PREVIEW_CHARS:
+            text.insert(tk.END, self.body[:TEXT_PREVIEW_CHARS])
+            text.insert(tk.END, f"\n\n[... {len(self.body) - TEXT_PREVIEW_CHARS} more characters, use Copy or Save]")
+        else:
+            text.insert(tk.END, self.body)
         # text.config(state=tk.DISABLED)
         text.grid(row=0, column=0, sticky="nsew")
 
@@ -103,6 +168,9 @@ class TextCopyWindow(tk.Tk):
             btn = ttk.Button(frame, text="Copy", command=self.copy)
             btn.grid(row=0, column=cx.inc())
 
+            btn = ttk.Button(frame, text="Save to file", command=self.save)
+            btn.grid(row=0, column=cx.inc())
+
             btn = ttk.Button(frame, text="Close", command=self.destroy)
             btn.grid(row=0, column=cx.inc())
 
@@ -3,7 +3,7 @@ import logging
 import tkinter as tk
 import tkinter.font as tkFont
 from tkinter import ttk
-from typing import Any, Callable, Literal, Required, TypedDict
+from typing import Any, Callable, Iterator, Literal, Required, TypedDict
 
 
 class _TkTreeviewItemDict(TypedDict):
@@ -54,6 +54,8 @@ class MultiColumnListbox(tk.Frame):
         self.nonestr: str = nonestr
 
         self.root_item = ''
+        # Values last written by sync_tree, so unchanged rows can be skipped
+        self._synced_values: dict[str, Any] = {}
 
         self.TkFont = tkFont.Font()
         self.logger: logging.Logger = logging.getLogger(self.__class__.__name__)
@@ -132,13 +134,24 @@ class MultiColumnListbox(tk.Frame):
 
     def delete_all(self):
         self.tree.delete(*self.tree.get_children())
+        self._synced_values.clear()
 
     def insert_item(self, item: TreeListItemDict) -> str:
         # Sanitize value strings
         if item.get("values"):
             item["values"] = [xstr(s, nonestr=self.nonestr) for s in item["values"]]
 
-        return self.tree.insert(self.root_item, tk.END, **item)
+        iid = self.tree.insert(self.root_item, tk.END, **item)
+        self._synced_values.pop(iid, None)
+        return iid
+
+    def insert_items(self, items: list[TreeListItemDict]) -> None:
+        """Append items, skipping (and logging) any the tree rejects, e.g. a duplicate id."""
+        for item in items:
+            try:
+                self.insert_item(item)
+            except tk.TclError:
+                self.logger.exception("Error inserting row %r", item)
 
     def build_tree(self, itemlist: list[TreeListItemDict], resize=True) -> None:
         for col in self.headers:
@@ -173,6 +186,7 @@ class MultiColumnListbox(tk.Frame):
 
     def update_tree(self, itemlist: list[TreeListItemDict], resize=True) -> None:
         self.tree.delete(*self.tree.get_children())
+        self._synced_values.clear()
         # if len(itemlist) > 100:
         #     self.root_item = self.insert_item({"values": ["<Container>"]})
         # else:
@@ -185,6 +199,43 @@ class MultiColumnListbox(tk.Frame):
         if resize:
             self.winfo_toplevel().after(10, self.resize_cols)
 
+    def sync_tree(self, itemlist: list[TreeListItemDict]) -> None:
+        """Make the tree hold exactly itemlist, in order, keyed by each item's "id".
+
+        Unlike update_tree, rows that are already present are kept: their
+        values are rewritten only if they changed, and rows are only moved
+        when the order differs, so repeated syncs of similar lists are cheap.
+        """
+        wanted: list[str] = [str(item["id"]) for item in itemlist]
+        wanted_set: set[str] = set(wanted)
+        existing: tuple[str, ...] = self.tree.get_children(self.root_item)
+
+        stale = [iid for iid in existing if iid not in wanted_set]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                self._synced_values.pop(iid, None)
+        present = set(existing).difference(stale)
+
+        for index, (iid, item) in enumerate(zip(wanted, itemlist)):
+            values = item.get("values")
+            if values:
+                values = [xstr(s, nonestr=self.nonestr) for s in values]
+            if iid in present:
+                if self._synced_values.get(iid) != values:
+                    self.tree.item(iid, values=values)
+            else:
+                self.tree.insert(
+                    self.root_item, index, iid=iid,
+                    **{k: v for k, v in item.items() if k not in ("id", "values")},  # type: ignore
+                    values=values  # type: ignore
+                )
+            self._synced_values[iid] = values
+
+        if list(self.tree.get_children(self.root_item)) != wanted:
+            for index, iid in enumerate(wanted):
+                self.tree.move(iid, self.root_item, index)
+
     def modSelection(self, selectionNos: list[int]) -> None:
         select_these_items: list[str] = [
             child for child in self.tree.get_children(self.root_item)
@@ -196,6 +247,12 @@ class MultiColumnListbox(tk.Frame):
     def getSelectionIDs(self) -> tuple[str, ...]:
         return self.tree.selection()
 
+    def iter_dicts(self, selection_only: bool = False) -> Iterator[dict]:
+        """Rows as {header: value}, in display order, one at a time (e.g. for export)."""
+        children = self.tree.selection() if selection_only else self.tree.get_children(self.root_item)
+        for child in children:
+            yield self.tree.set(child)
+
     def getSelectionDicts(self) -> list[dict]:
         return [
             self.tree.set(child)
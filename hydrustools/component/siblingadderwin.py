@@ -7,9 +7,10 @@ from tkinter import messagebox, ttk
 
 from hydrustools import logic
 
-from .gui_util import Increment, ScrollableFrame, TextCopyWindow, flatList, tkwrap, tkwrapc
+from .gui_util import Increment, flatList, showClipboard, tkwrap, tkwrapc
 from .multicolumnlistbox import MultiColumnListbox
 from .toolwindow import ToolWindow
+from .virtualgrid import VirtualGrid
 
 logging.basicConfig(level=logging.INFO)
 
@@ -21,6 +22,55 @@ class SiblingAction():
     group: str
 
 
+def sibling_actions_for_groups(groups: list[list[str]]) -> list[SiblingAction]:
+    """Turn groups of candidate sibling tags into actions for SiblingAdderWindow.
+
+    Groups where every tag already maps to the same ideal tag in the group are
+    dropped. Actions are grouped by the parents of their tags.
+    """
+    sibling_info: dict[str, logic.SiblingInfo] = logic.get_sibling_infos(
+        tag for group in groups for tag in group
+    )
+
+    sibling_actions: list[SiblingAction] = []
+
+    for sibling_options in groups:
+        ideal_tags = {
+            si.ideal_tag
+            for si in (sibling_info.get(tag) for tag in sibling_options)
+            if si
+        }
+
+        # Already resolved: every spelling maps to the same one of the group
+        if len(ideal_tags) == 1 and ideal_tags <= set(sibling_options):
+            continue
+
+        current_sibling = None
+        ancestors: set[str] = set()
+        for tag in sibling_options:
+            si: logic.SiblingInfo | None = sibling_info.get(tag)
+            if not si:
+                continue
+            ancestors.update(si.ancestors)
+            if current_sibling is None and si.ideal_tag in sibling_options:
+                current_sibling = sibling_options.index(si.ideal_tag)
+
+        group = ', '.join(sorted(ancestors))
+
+        sibling_actions.append(SiblingAction(sibling_options[0], sibling_options, current_sibling, group))
+
+    return sibling_actions
+
+
+@dataclass
+class _SiblingRow():
+    label: ttk.Label
+    option_menu: ttk.OptionMenu
+    var: tk.StringVar
+    index: int | None = None
+    binding: bool = False
+
+
 class SiblingAdderWindow(ToolWindow):
     helpstr = """Change this help string"""
 
@@ -34,15 +84,25 @@ class SiblingAdderWindow(ToolWindow):
         ):
             self.siblings += [*group]
 
-        self.values = [
-            tk.StringVar(value=(
+        # Chosen option per sibling action; only on-screen rows have widgets
+        self.selections: list[str] = [
+            (
                 sa.sibling_options[sa.current_sibling]
-                if sa.current_sibling
+                if sa.current_sibling is not None
                 else ""
-            ))
-            for i, sa in enumerate(self.siblings)
+            )
+            for sa in self.siblings
         ]
 
+        # Virtual rows: ("group", first action index) headers and ("action", action index)
+        self.rows: list[tuple[str, int]] = []
+        last_group = None
+        for i, sa in enumerate(self.siblings):
+            if sa.group and sa.group != last_group:
+                self.rows.append(("group", i))
+            last_group = sa.group
+            self.rows.append(("action", i))
+
         self.initwindow()
         self.focus()
 
@@ -59,24 +119,13 @@ class SiblingAdderWindow(ToolWindow):
         # Right
         counter_main_row.inc()
 
-        with tkwrapc(ScrollableFrame(self, relief=tk.GROOVE, padding=2)) as (sf, cx, cy):
-            sf.grid(row=counter_main_row.inc(), column=0, sticky="nsew")
+        with tkwrap(VirtualGrid(self, self.makeRow, self.bindRow, relief=tk.GROOVE, padding=2)) as grid:
+            grid.grid(row=counter_main_row.inc(), column=0, sticky="nsew")
             self.rowconfigure(counter_main_row.value, weight=1)
 
-            assert isinstance(sf, ScrollableFrame)
-            frame: ttk.Frame = sf.container
-            frame.columnconfigure(0, weight=1)
-            frame.columnconfigure(1, weight=1)
-
-            for i, sa in enumerate(self.siblings):
-                label = ttk.Label(frame, text=sa.tag)
-                label.grid(row=cy.inc(), column=0, sticky="e")
-
-                # label = ttk.Label(frame, text=sa.group)
-                # label.grid(row=cy.value, column=2, sticky="e")
-
-                om = ttk.OptionMenu(frame, self.values[i], self.values[i].get(), *sa.sibling_options)
-                om.grid(row=cy.value, column=1, sticky="we")
+            assert isinstance(grid, VirtualGrid)
+            self.grid_siblings = grid
+            grid.setRowCount(len(self.rows))
 
         with tkwrap(ttk.Frame(self, relief=tk.GROOVE, padding=2)) as frame_bottom:
             frame_bottom.grid(row=counter_main_row.inc(), column=0, sticky="ew")
@@ -94,21 +143,59 @@ class SiblingAdderWindow(ToolWindow):
             # btn_flatten = ttk.Button(frame_bottom, text="Apply all", command=self.applyAll, width=40)
             # btn_flatten.grid(column=3, row=0, sticky="nse")
 
+    def makeRow(self, frame: ttk.Frame) -> _SiblingRow:
+        var = tk.StringVar(frame)
+        row = _SiblingRow(
+            label=ttk.Label(frame),
+            option_menu=ttk.OptionMenu(frame, var, ""),
+            var=var
+        )
+        row.label.grid(row=0, column=0, sticky="e")
+        row.option_menu.grid(row=0, column=1, sticky="we")
+
+        def onWrite(*args) -> None:
+            if not row.binding and row.index is not None:
+                self.selections[row.index] = var.get()
+
+        var.trace_add("write", onWrite)
+        return row
+
+    def bindRow(self, row: _SiblingRow, row_index: int) -> None:
+        kind, index = self.rows[row_index]
+        sa = self.siblings[index]
+
+        row.binding = True
+        try:
+            if kind == "group":
+                row.index = None
+                row.label.configure(text=sa.group, font="TkHeadingFont")
+                row.option_menu.grid_remove()
+            else:
+                row.index = index
+                row.label.configure(text=sa.tag, font="TkDefaultFont")
+                row.option_menu.set_menu(self.selections[index], *sa.sibling_options)
+                # set_menu leaves the variable alone when the default is "", so a
+                # recycled row would keep showing the previous row's choice
+                row.var.set(self.selections[index])
+                row.option_menu.grid()
+        finally:
+            row.binding = False
+
     def mapSiblings(self, event=None):
 
-        clip_import = ""
+        clip_lines: list[str] = []
         for i, sa in enumerate(self.siblings):
-            selection = self.values[i].get()
+            selection = self.selections[i]
             if not selection:
                 continue
             for candidate in sa.sibling_options:
                 if candidate == selection:
                     continue
-                if sa.current_sibling and sa.sibling_options[sa.current_sibling] == selection:
+                if sa.current_sibling is not None and sa.sibling_options[sa.current_sibling] == selection:
                     continue
-                clip_import += f"{candidate}\n{selection}\n"
+                clip_lines += [candidate, selection]
 
-        TextCopyWindow(clip_import)
+        showClipboard(clip_lines)
 
     # def applySelected(self, event=None):
     #     # selection = [
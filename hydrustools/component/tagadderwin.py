@@ -1,35 +1,60 @@
 import logging
-import pprint
 import tkinter as tk
-from dataclasses import dataclass
+from collections import defaultdict
 from tkinter import messagebox, ttk
+from typing import Callable, Iterator
 
 from hydrustools import logic
 
-from .gui_util import Increment, tkwrap, tkwrapc
+from ..actionstore import TagAction, TagActionStore
+
+from .gui_util import Increment, saveRowsAs, tkwrap, tkwrapc
 from .multicolumnlistbox import MultiColumnListbox
 from .toolwindow import ToolWindow
 
 logging.basicConfig(level=logging.INFO)
 
-@dataclass
-class TagAction():
-    file_id: int
-    identifier: str
-    new_tags: list[str]
-
 HEAD_ID = "File ID"
 HEAD_IDSTR = "Identifier"
 HEAD_NEWTAGS = "New tags"
 
+PAGE_SIZE = 500
+CONFIRM_PREVIEW_LINES = 20
+
 class TagAdderWindow(ToolWindow):
-    helpstr = """Change this help string"""
+    helpstr = """Review proposed tags before adding them.
+
+Results are shown a page at a time. "Apply selected" adds the selected rows, "Apply all" adds every remaining row on every page.
 
-    def __init__(self, tag_actions: list[TagAction], *args_, **kwargs) -> None:
+While a scan is still running, new rows keep arriving at the end of the list.
+
+"Export..." saves every row not yet applied to a CSV, JSON Lines or Parquet file.
+    """
+
+    def __init__(
+        self,
+        tag_actions: TagActionStore | list[TagAction],
+        *args_,
+        on_applied: Callable[[list[int]], None] | None = None,
+        page_size: int = PAGE_SIZE,
+        feed: Iterator[list[TagAction]] | None = None,
+        **kwargs
+    ) -> None:
         super().__init__(*args_, **kwargs)
 
-        self.logger.info(pprint.pformat(tag_actions))
-        self.tag_actions: list[TagAction] = tag_actions
+        if not isinstance(tag_actions, TagActionStore):
+            tag_actions = TagActionStore(tag_actions)
+
+        self.logger.info(f"Reviewing {tag_actions!r}")
+        self.logger.debug("%s", tag_actions.preview())
+        self.tag_actions: TagActionStore = tag_actions
+        self.on_applied = on_applied
+
+        # Indices into tag_actions that have not been applied yet
+        self.remaining: list[int] = list(range(len(tag_actions)))
+        self.page_size: int = page_size
+        self.page: int = 0
+        self.textvar_page = tk.StringVar(self)
 
         self.table_headings = [
             HEAD_ID,
@@ -40,6 +65,9 @@ class TagAdderWindow(ToolWindow):
         self.initwindow()
         self.focus()
 
+        if feed is not None:
+            self.startFeed(feed)
+
         self.mainloop()
 
     def initwindow(self) -> None:
@@ -53,11 +81,7 @@ class TagAdderWindow(ToolWindow):
         # Right
         counter_main_row.inc()
         self.tree_tags = MultiColumnListbox(self, headers=self.table_headings)  # noqa: F821
-
-        self.tree_tags.update_tree([
-            {"id": i, "values": [ta.file_id, ta.identifier, ' '.join(ta.new_tags)]}
-            for i, ta in enumerate(self.tag_actions)
-        ])
+        self.showPage(0)
 
         with tkwrap(self.tree_tags) as tree:
             # assert isinstance(tree, ttk.Treeview)
@@ -71,6 +95,16 @@ class TagAdderWindow(ToolWindow):
 
             frame_bottom.columnconfigure(0, weight=1)
 
+            with tkwrapc(ttk.Frame(frame_bottom)) as (frame_pages, cx, _):
+                frame_pages.grid(column=0, row=1, sticky="w")
+
+                ttk.Button(frame_pages, text="<", width=3, command=lambda: self.showPage(self.page - 1))\
+                    .grid(column=cx.inc(), row=0)
+                ttk.Label(frame_pages, textvariable=self.textvar_page)\
+                    .grid(column=cx.inc(), row=0, padx=4)
+                ttk.Button(frame_pages, text=">", width=3, command=lambda: self.showPage(self.page + 1))\
+                    .grid(column=cx.inc(), row=0)
+
             btn_flatten = ttk.Button(frame_bottom, text="Open selected", command=self.openPage, width=40)
             btn_flatten.grid(column=1, row=0, sticky="nse")
 
@@ -80,6 +114,57 @@ class TagAdderWindow(ToolWindow):
             btn_flatten = ttk.Button(frame_bottom, text="Apply all", command=self.applyAll, width=40)
             btn_flatten.grid(column=3, row=0, sticky="nse")
 
+            btn_export = ttk.Button(frame_bottom, text="Export...", command=self.exportRows)
+            btn_export.grid(column=4, row=0, sticky="nse")
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.remaining) // self.page_size))
+
+    def showPage(self, page: int) -> None:
+        self.page = max(0, min(page, self.page_count - 1))
+        start = self.page * self.page_size
+
+        page_indices = self.remaining[start:start + self.page_size]
+        self.tree_tags.update_tree([
+            {"id": i, "values": [file_id, identifier, ' '.join(new_tags)]}
+            for i, (file_id, identifier, new_tags) in zip(page_indices, self.tag_actions.rows(page_indices))
+        ])
+        self.updatePageLabel()
+
+    def updatePageLabel(self) -> None:
+        self.textvar_page.set(f"Page {self.page + 1} / {self.page_count} ({len(self.remaining)} rows)")
+
+    def startFeed(self, feed: Iterator[list[TagAction]]) -> None:
+        """Append batches from feed as they are produced, e.g. by extract_note_tags."""
+        def consumeFeed(token) -> None:
+            count = 0
+            try:
+                for batch in feed:
+                    token.raiseIfCancelled()
+                    if batch:
+                        count += len(batch)
+                        self.callUI(self.appendActions, batch)
+                        self.setStatus(f"Scanning... {count} proposals so far")
+            finally:
+                close = getattr(feed, 'close', None)
+                if close:
+                    close()
+            self.setStatus(f"Scan finished with {count} proposals")
+
+        self.startTask(consumeFeed, lock=False, key="feed")
+
+    def appendActions(self, batch: list[TagAction]) -> None:
+        start = len(self.tag_actions)
+        self.tag_actions.extend(batch)
+        self.remaining.extend(range(start, len(self.tag_actions)))
+
+        # Only redraw if the new rows land on the page being shown
+        if len(self.tree_tags.tree.get_children()) < self.page_size:
+            self.showPage(self.page)
+        else:
+            self.updatePageLabel()
+
     def applySelected(self, event=None):
         # selection = [
         #     (row['Source Tag'], row['Ideal'])
@@ -93,32 +178,49 @@ class TagAdderWindow(ToolWindow):
             return
 
         self.logger.info(selection)
-        actions = [
-            self.tag_actions[int(i)]
-            for i in selection
-        ]
-
-        self.applyActions(actions)
+        self.applyActions([int(i) for i in selection])
 
     def applyAll(self, event=None):
-        self.applyActions(self.tag_actions)
+        self.applyActions([*self.remaining])
 
-    def applyActions(self, actions):
-        explaination = '\n'.join(f'{a}' for a in actions)
+    def applyActions(self, indices: list[int]):
+        explaination = '\n'.join(f'{self.tag_actions[i]}' for i in indices[:CONFIRM_PREVIEW_LINES])
+        if len(indices) > CONFIRM_PREVIEW_LINES:
+            explaination += f"\n... and {len(indices) - CONFIRM_PREVIEW_LINES} more"
         user_confirmed = messagebox.askyesno(
             title="Confirm",
             message=f"{explaination}\n\nAdd tags to files?"
         )
         if user_confirmed:
-            for ta in actions:
+            # One request per distinct tag set rather than per file
+            files_by_tags: dict[tuple[str, ...], list[int]] = defaultdict(list)
+            for (file_id, _, new_tags) in self.tag_actions.rows(indices):
+                files_by_tags[tuple(new_tags)].append(file_id)
+
+            for new_tags, file_ids in files_by_tags.items():
                 logic.client.add_tags(
-                    file_ids=[ta.file_id],
+                    file_ids=file_ids,
                     service_keys_to_tags={
-                        logic.local_tags_service_key: ta.new_tags,
+                        logic.local_tags_service_key: new_tags,
                     }
                 )
-                self.setStatus(f"Added tags {ta.new_tags!r} to {ta.file_id}")
-                self.tree_tags.tree.delete(self.tag_actions.index(ta))
+                self.setStatus(f"Added tags {new_tags!r} to {len(file_ids)} files")
+
+            applied = set(indices)
+            self.remaining = [i for i in self.remaining if i not in applied]
+            self.showPage(self.page)
+
+            if self.on_applied:
+                self.on_applied(indices)
+
+    def exportRows(self, event=None):
+        rows = (
+            {HEAD_ID: file_id, HEAD_IDSTR: identifier, HEAD_NEWTAGS: ' '.join(new_tags)}
+            for file_id, identifier, new_tags in self.tag_actions.rows([*self.remaining])
+        )
+        count = saveRowsAs(self, rows, self.table_headings, title="Export proposed tags")
+        if count is not None:
+            self.setStatus(f"Exported {count} rows")
 
     def openPage(self, event=None):
         selection = self.tree_tags.getSelectionIDs()
@@ -126,7 +228,8 @@ class TagAdderWindow(ToolWindow):
             return
 
         matching_ids = [
-            self.tag_actions[int(i)].file_id
+            self.tag_actions.file_ids[int(i)]
             for i in selection
         ]
-        logic.client.add_popup("Tag Search", files_label=f"Selected Images", file_ids=matching_ids) # type: ignore
+        delivery = logic.deliver_file_ids("Tag Search", "Selected Images", matching_ids)
+        self.setStatus(delivery.summary())
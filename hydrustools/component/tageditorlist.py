@@ -2,62 +2,145 @@
 import logging
 import tkinter as tk
 from tkinter import ttk
+from typing import Callable, Iterable
 
 from .gui_util import tkwrapc
 
 logging.basicConfig(level=logging.INFO)
 
+SUGGESTION_COUNT = 10
+
+# prefix, k -> [(tag, count)], e.g. TagIndex.suggest
+Autocomplete = Callable[[str, int], list[tuple[str, int]]]
+
+
+def contiguous_runs(indices: list[int]) -> list[tuple[int, int]]:
+    """Group sorted indices into (first, last) runs, so each run is one delete.
+
+    >>> contiguous_runs([1, 2, 3, 7, 9, 10])
+    [(1, 3), (7, 7), (9, 10)]
+    """
+    runs: list[tuple[int, int]] = []
+    for i in indices:
+        if runs and runs[-1][1] == i - 1:
+            runs[-1] = (runs[-1][0], i)
+        else:
+            runs.append((i, i))
+    return runs
+
+
 class TagEditorList(ttk.Frame):
-    def __init__(self, *args, **kwargs) -> None:
+    """An editable tag list: a listbox plus an ordered set mirroring it.
+
+    Membership is a dict lookup and positions come from an index map rebuilt
+    lazily after removals, so adding or removing many tags is one pass over
+    the list and one Tk call per contiguous run. Pass check=True to verify the
+    listbox against the set after each change (only the rows that changed).
+    """
+    def __init__(self, *args, autocomplete: Autocomplete | None = None, check: bool = False, **kwargs) -> None:
         super().__init__(*args, **kwargs)
 
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.tag_list = []
+        # Ordered set of tags, in listbox order
+        self.tags: dict[str, None] = {}
+        # tag -> listbox index, None when it needs rebuilding
+        self._positions: dict[str, int] | None = {}
+        self.check = check
+
+        # Called on every keystroke, so it must answer from memory
+        self.autocomplete = autocomplete
+        self.suggestions: list[str] = []
 
         self.initwindow()
 
-    def validate(self):
-        box_list = self.listbox_taglist.get(0, self.listbox_taglist.size())
-        try:
-            for (listval, boxval) in zip(self.tag_list, box_list):
-                assert listval == boxval
-        except:
-            print(self.tag_list, box_list)
-            print(list(zip(self.tag_list, box_list)))
-            raise
+    @property
+    def tag_list(self) -> list[str]:
+        return list(self.tags)
+
+    @property
+    def positions(self) -> dict[str, int]:
+        if self._positions is None:
+            self._positions = {tag: i for i, tag in enumerate(self.tags)}
+        return self._positions
+
+    def validate(self, indices: Iterable[int] | None = None):
+        """Check the listbox matches the tag set, at indices or everywhere."""
+        if not self.check:
+            return
+        box_size = self.listbox_taglist.size()
+        if box_size != len(self.tags):
+            raise AssertionError(f"Listbox has {box_size} rows for {len(self.tags)} tags")
+
+        if indices is None:
+            mismatched = [
+                (i, listval, boxval)
+                for i, (listval, boxval) in enumerate(zip(self.tags, self.listbox_taglist.get(0, tk.END)))
+                if listval != boxval
+            ]
+        else:
+            positions = self.positions
+            mismatched = [
+                (i, None, boxval)
+                for i in indices
+                if positions.get(boxval := self.listbox_taglist.get(i)) != i
+            ]
+        if mismatched:
+            raise AssertionError(f"Listbox out of sync with tag list: {mismatched[:10]}")
+
+    def setTagList(self, tag_list: Iterable[str]):
+        self.tags = dict.fromkeys(tag_list)
+        self._positions = None
+
+        self.listbox_taglist.delete(0, tk.END)
+        if self.tags:
+            self.listbox_taglist.insert(tk.END, *self.tags)
+
+        self.validate()
 
-    def setTagList(self, tag_list):
-        self.listbox_taglist.delete(0, self.listbox_taglist.size())
+    def addTags(self, new_tags: Iterable[str]) -> list[str]:
+        """Append the tags not already present. Returns the ones added."""
+        added = [tag for tag in dict.fromkeys(new_tags) if tag not in self.tags]
+        if not added:
+            return added
 
-        self.tag_list = tag_list
+        start = len(self.tags)
+        self.tags.update(dict.fromkeys(added))
+        if self._positions is not None:
+            self._positions.update((tag, start + i) for i, tag in enumerate(added))
+        self.listbox_taglist.insert(tk.END, *added)
 
-        for tag in self.tag_list:
-            self.listbox_taglist.insert(tk.END, tag)
+        self.validate(range(start, len(self.tags)))
+        return added
 
-        self.validate()
+    def removeTags(self, target_tags: Iterable[str]) -> list[str]:
+        """Remove the given tags that are present. Returns the ones removed."""
+        positions = self.positions
+        removed = [tag for tag in dict.fromkeys(target_tags) if tag in self.tags]
+        if not removed:
+            return removed
 
-    def addTag(self, new_tag):
-        if new_tag not in self.tag_list:
-            self.tag_list.append(new_tag)
-            self.listbox_taglist.insert(tk.END, new_tag)
+        # Back to front, so earlier runs keep their indices
+        for first, last in reversed(contiguous_runs(sorted(positions[tag] for tag in removed))):
+            self.listbox_taglist.delete(first, last)
+        for tag in removed:
+            del self.tags[tag]
+        self._positions = None
 
-        self.validate()
+        self.validate(())
+        return removed
 
-    def removeTag(self, target_tag):
-        index = self.tag_list.index(target_tag)
-        self.listbox_taglist.delete(index)
-        self.tag_list.pop(index)
+    def addTag(self, new_tag: str):
+        self.addTags([new_tag])
 
-        self.validate()
+    def removeTag(self, target_tag: str):
+        self.removeTags([target_tag])
 
     def removeSelectedTags(self, event: tk.Event):
         widget = event.widget
         assert isinstance(widget, tk.Listbox)
 
-        for selected_index in widget.curselection()[::-1]:
-            self.removeTag(widget.get(selected_index))
-
-        self.validate()
+        tags = self.tag_list
+        self.removeTags([tags[i] for i in widget.curselection()])
 
     def addTagFromEntry(self, event: tk.Event):
         widget: tk.Entry = event.widget # type: ignore
@@ -67,8 +150,52 @@ class TagEditorList(ttk.Frame):
         self.addTag(value)
 
         widget.delete(0, tk.END)
-
-        self.validate()
+        self.updateSuggestions()
+
+    def updateSuggestions(self, event=None):
+        if event is not None and event.keysym in ("Tab", "Down", "Return"):
+            return
+
+        text = self.entry_add.get().strip()
+        matches: list[tuple[str, int]] = []
+        if self.autocomplete and text:
+            # Tags already in the list are left out; ask for more only if that leaves too few
+            k = SUGGESTION_COUNT
+            while True:
+                results = self.autocomplete(text, k)
+                matches = [(tag, count) for tag, count in results if tag not in self.tags][:SUGGESTION_COUNT]
+                if len(matches) == SUGGESTION_COUNT or len(results) < k:
+                    break
+                k *= 2
+
+        self.suggestions = [tag for tag, _ in matches]
+        self.listbox_suggestion.delete(0, tk.END)
+        for tag, count in matches:
+            self.listbox_suggestion.insert(tk.END, f"{tag} ({count})")
+
+    def completeFromSuggestion(self, event=None):
+        if self.suggestions:
+            self.entry_add.delete(0, tk.END)
+            self.entry_add.insert(0, self.suggestions[0])
+        return "break"
+
+    def focusSuggestions(self, event=None):
+        if self.suggestions:
+            self.listbox_suggestion.focus()
+            self.listbox_suggestion.selection_clear(0, tk.END)
+            self.listbox_suggestion.selection_set(0)
+            self.listbox_suggestion.activate(0)
+        return "break"
+
+    def addTagFromSuggestion(self, event=None):
+        selection = self.listbox_suggestion.curselection()
+        if not selection:
+            return
+        self.addTag(self.suggestions[selection[0]])
+
+        self.entry_add.delete(0, tk.END)
+        self.entry_add.focus()
+        self.updateSuggestions()
 
     def initwindow(self) -> None:
         with tkwrapc(self) as (frame, cx, cy):
@@ -85,12 +212,17 @@ class TagEditorList(ttk.Frame):
             self.listbox_taglist.configure(yscrollcommand=vsb.set)
 
             tk.Label(frame, text="Add tags").grid(column=0, row=cy.inc(), sticky="ew")
-            entry_add = ttk.Entry(frame)
-            entry_add.bind("<Return>", self.addTagFromEntry)
-            entry_add.grid(column=0, row=cy.inc(), sticky="ew")
+            self.entry_add = ttk.Entry(frame)
+            self.entry_add.bind("<Return>", self.addTagFromEntry)
+            self.entry_add.bind("<KeyRelease>", self.updateSuggestions)
+            self.entry_add.bind("<Tab>", self.completeFromSuggestion)
+            self.entry_add.bind("<Down>", self.focusSuggestions)
+            self.entry_add.grid(column=0, row=cy.inc(), sticky="ew")
 
             # self.listbox_taglist.bind('<<ListboxSelect>>', self.loadSelectedId)
 
-            self.listbox_suggestion = tk.Listbox(frame)
+            self.listbox_suggestion = tk.Listbox(frame, height=SUGGESTION_COUNT)
+            self.listbox_suggestion.bind("<Return>", self.addTagFromSuggestion)
+            self.listbox_suggestion.bind("<Double-Button-1>", self.addTagFromSuggestion)
             self.listbox_suggestion.grid(column=0, row=cy.inc(), sticky="nsew")
             frame.rowconfigure(index=cy.value, minsize=2, weight=0)
\ No newline at end of file
@@ -0,0 +1,138 @@
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 8
+
+_task_ids = itertools.count(1)
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def sharedPool() -> ThreadPoolExecutor:
+    """The worker pool shared by every tool window."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="hydrustools-task")
+        return _pool
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class CancelToken():
+    """Cooperative cancellation flag handed to every task callback.
+
+    Long-running callbacks should check `cancelled` (or call `raiseIfCancelled`)
+    between units of work, e.g. once per fetched chunk.
+    """
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raiseIfCancelled(self) -> None:
+        if self._event.is_set():
+            raise TaskCancelled()
+
+
+@dataclass
+class Task():
+    task_id: int
+    name: str
+    key: str | None
+    token: CancelToken
+    future: Future | None = None
+
+
+class TaskScheduler():
+    """Runs callbacks for one window on the shared pool.
+
+    Tasks submitted with the same `key` supersede each other: starting a new one
+    cancels the token of the previous one, so only the latest result matters.
+
+    on_done is called from the worker thread with the task, an outcome string
+    ("finished", "cancelled" or "failed") and the elapsed time in seconds.
+    """
+    def __init__(self, on_done: Callable[[Task, str, float], Any] | None = None) -> None:
+        self.on_done = on_done
+        self.tasks: dict[int, Task] = {}
+        self._latest: dict[str, Task] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, callback: Callable[[CancelToken], Any], name: str | None = None, key: str | None = None) -> Task:
+        task = Task(
+            task_id=next(_task_ids),
+            name=name or getattr(callback, '__name__', 'task'),
+            key=key,
+            token=CancelToken()
+        )
+
+        with self._lock:
+            if key is not None:
+                previous = self._latest.get(key)
+                if previous:
+                    previous.token.cancel()
+                self._latest[key] = task
+            self.tasks[task.task_id] = task
+
+        task.future = sharedPool().submit(self._run, task, callback)
+        return task
+
+    def _run(self, task: Task, callback: Callable[[CancelToken], Any]) -> None:
+        outcome = "finished"
+        start_time = time.perf_counter()
+        try:
+            task.token.raiseIfCancelled()
+            callback(task.token)
+        except TaskCancelled:
+            outcome = "cancelled"
+        except Exception:
+            outcome = "failed"
+            logger.exception("Task #%d %s failed", task.task_id, task.name)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            if task.token.cancelled and outcome == "finished":
+                outcome = "cancelled"
+
+            with self._lock:
+                self.tasks.pop(task.task_id, None)
+                if task.key is not None and self._latest.get(task.key) is task:
+                    del self._latest[task.key]
+
+            if self.on_done:
+                self.on_done(task, outcome, elapsed)
+
+    def cancel(self, task_id: int) -> None:
+        with self._lock:
+            task = self.tasks.get(task_id)
+        if task:
+            task.token.cancel()
+
+    def cancelKey(self, key: str) -> None:
+        """Cancel the running task with this key, if any."""
+        with self._lock:
+            task = self._latest.get(key)
+        if task:
+            task.token.cancel()
+
+    def cancelAll(self) -> None:
+        with self._lock:
+            tasks = [*self.tasks.values()]
+        for task in tasks:
+            task.token.cancel()
@@ -1,21 +1,31 @@
 
 import logging
+import queue
 import threading
 import tkinter as tk
-from collections import defaultdict
+from collections import deque
 from contextlib import contextmanager
 from tkinter import messagebox
-from typing import Any, Callable, Generator, Iterable
+from typing import Any, Callable, Generator
 
 from ..settings import HTSettings
+from .taskscheduler import CancelToken, Task, TaskScheduler
 
 Settings = HTSettings()
 
-def recursive_widgets(w, key) -> Iterable[tk.Widget]:
-    if key in 'state' in w.keys():
-        yield w
-    for w2 in w.winfo_children():
-        yield from recursive_widgets(w2, key)
+# How often the main loop drains queued UI updates, and how many rows it will
+# insert per tick before yielding back to Tk.
+UI_TICK_MS = 50
+UI_ROWS_PER_TICK = 2000
+
+# Widget classes whose state lock() toggles so they look disabled. Everything
+# else is only blocked by the busy overlay.
+LOCKABLE_CLASSES = frozenset({
+    "Button", "TButton",
+    "Entry", "TEntry",
+    "Checkbutton", "TCheckbutton",
+    "Menubutton", "TMenubutton",
+})
 
 
 class ToolWindow(tk.Tk):
@@ -26,27 +36,129 @@ class ToolWindow(tk.Tk):
 
         self.textvar_status = tk.StringVar(self, value="Ready")
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.abort_threads = False
+        self.tasks = TaskScheduler(on_done=self._onTaskDone)
 
         self.bind("<F1>", lambda *a: self.showHelp())
 
         self._locked = 0
-        self._lock_states = defaultdict(list)
+        self._locked_mutex = threading.Lock()
+        self._lock_registry: list[tk.Widget] | None = None
+        self._lock_states: dict[str, str] = {}
+        self._busy_held: list[tk.Widget] = []
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+        # Worker threads never touch widgets directly; they push messages here
+        # and the main loop applies them in batches.
+        self._main_thread = threading.current_thread()
+        self._ui_queue: queue.SimpleQueue[tuple[str, Any, Any, CancelToken | None]] = queue.SimpleQueue()
+        self._ui_pending: deque[tuple[str, Any, Any, CancelToken | None]] = deque()
+        self.after(UI_TICK_MS, self._drainUIQueue)
+
     def on_closing(self):
         Settings.gui_last = -1
-        self.abort_threads = True
+        self.tasks.cancelAll()
         self.destroy()
 
+    def inMainThread(self) -> bool:
+        return threading.current_thread() is self._main_thread
+
+    def callUI(self, callback: Callable[..., Any], *args) -> None:
+        """Run callback on the main loop. Runs immediately if already there."""
+        if self.inMainThread():
+            callback(*args)
+        else:
+            self._ui_queue.put(("call", callback, args, None))
+
+    def queueRows(self, target, rows: list, token: CancelToken | None = None) -> None:
+        """Queue rows to be appended to a listbox-like widget from any thread.
+
+        target may be a MultiColumnListbox (rows are item dicts) or a tk.Listbox
+        (rows are strings). Consecutive batches for the same target are merged
+        into a single insert on the main loop. Rows queued with a token are
+        dropped if that task is cancelled before they are drawn.
+        """
+        if rows:
+            self._ui_queue.put(("rows", target, list(rows), token))
+
     def setStatus(self, val):
         self.logger.info(val)
 
+        if self.inMainThread():
+            self._appendStatus(str(val))
+        else:
+            self._ui_queue.put(("status", None, str(val), None))
+
+    def _appendStatus(self, line: str) -> None:
         max_old_lines = 2
-        line = str(val)
         lines = self.textvar_status.get().split('\n')
         self.textvar_status.set('\n'.join([*lines[-max_old_lines:], line]))
 
+    def _insertRows(self, target, rows: list) -> None:
+        if hasattr(target, 'insert_items'):
+            # Row by row, so one bad row (e.g. a duplicate id) does not drop the rest
+            target.insert_items(rows)
+        else:
+            target.insert(tk.END, *rows)
+
+    def _drainUIQueue(self) -> None:
+        try:
+            self._drainPending()
+        finally:
+            # One failing item must not stop updates for the rest of the window's life
+            self.after(UI_TICK_MS, self._drainUIQueue)
+
+    def _drainPending(self) -> None:
+        try:
+            while True:
+                self._ui_pending.append(self._ui_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        budget = UI_ROWS_PER_TICK
+        status_lines: list[str] = []
+        while self._ui_pending and budget > 0:
+            kind, target, payload, token = self._ui_pending.popleft()
+            if kind == "rows":
+                if token and token.cancelled:
+                    continue
+                # Coalesce consecutive batches bound for the same widget
+                while (
+                    len(payload) < budget
+                    and self._ui_pending
+                    and self._ui_pending[0][0] == "rows"
+                    and self._ui_pending[0][1] is target
+                    and self._ui_pending[0][3] is token
+                ):
+                    payload += self._ui_pending.popleft()[2]
+                if len(payload) > budget:
+                    self._ui_pending.appendleft((kind, target, payload[budget:], token))
+                    payload = payload[:budget]
+                try:
+                    self._insertRows(target, payload)
+                except Exception:
+                    self.logger.exception("Error inserting %d queued rows into %r", len(payload), target)
+                budget -= len(payload)
+            elif kind == "status":
+                status_lines.append(payload)
+            else:
+                if status_lines:
+                    # Keep status ordered relative to calls that may read it
+                    self._appendStatusLines(status_lines[-3:])
+                    status_lines.clear()
+                try:
+                    target(*payload)
+                except Exception:
+                    self.logger.exception("Error in queued UI call %r", target)
+
+        self._appendStatusLines(status_lines[-3:])
+
+    def _appendStatusLines(self, lines: list[str]) -> None:
+        for line in lines:
+            try:
+                self._appendStatus(line)
+            except Exception:
+                self.logger.exception("Error showing status %r", line)
+
     @classmethod
     def showHelp(cls):
         messagebox.showinfo(
@@ -54,40 +166,102 @@ class ToolWindow(tk.Tk):
             message=cls.helpstr
         )
 
+    def registerLockable(self, *widgets: tk.Widget) -> None:
+        """Add widgets to the set lock() disables, beyond the ones found automatically."""
+        self.lockRegistry().extend(widgets)
+
+    def lockRegistry(self) -> list[tk.Widget]:
+        """Stateful controls toggled by lock(), collected once on first use.
+
+        The walk does not descend into canvases: scrolling row lists live there,
+        and they are covered by the busy overlay instead, so locking costs the
+        same however many rows a window has.
+        """
+        if self._lock_registry is None:
+            found: list[tk.Widget] = []
+            stack: list[tk.Misc] = [*self.winfo_children()]
+            while stack:
+                w = stack.pop()
+                widget_class = w.winfo_class()
+                if widget_class == "Canvas":
+                    continue
+                if widget_class in LOCKABLE_CLASSES:
+                    found.append(w)  # type: ignore
+                stack.extend(w.winfo_children())
+            self._lock_registry = found
+        return self._lock_registry
+
     def enable(self):
-        for w in recursive_widgets(self, 'state'):
-            if not w.widgetName.endswith('label'):
-                state = self._lock_states[w.winfo_name].pop()
-                w.configure(state=state) # type: ignore
+        for w in self._busy_held:
+            try:
+                self.tk.call('tk', 'busy', 'forget', w)
+            except tk.TclError:
+                pass
+        self._busy_held = []
+
+        for w in self.lockRegistry():
+            state = self._lock_states.pop(str(w), None)
+            if state is not None:
+                try:
+                    w.configure(state=state)  # type: ignore
+                except tk.TclError:
+                    pass
 
     def disable(self):
-        for w in recursive_widgets(self, 'state'):
-            if not w.widgetName.endswith('label'):
-                self._lock_states[w.winfo_name].append(w['state'])
-                w.configure(state=tk.DISABLED) # type: ignore
-        # self.logger.info(self._lock_states)
+        for w in self.lockRegistry():
+            try:
+                self._lock_states.setdefault(str(w), str(w['state']))
+                w.configure(state=tk.DISABLED)  # type: ignore
+            except tk.TclError:
+                pass
+
+        # Busy windows swallow input for each top-level frame and its whole
+        # subtree without touching the descendants individually.
+        for w in self.winfo_children():
+            if isinstance(w, tk.Toplevel):
+                continue
+            try:
+                self.tk.call('tk', 'busy', 'hold', w)
+                self._busy_held.append(w)
+            except tk.TclError:
+                pass
 
     @contextmanager
     def lock(self) -> Generator[None, Any, None]:
-        self._locked += 1
-        self.disable()
+        with self._locked_mutex:
+            self._locked += 1
+            first = self._locked == 1
+        if first:
+            self.callUI(self.disable)
         try:
             yield
         finally:
-            self._locked -= 1
-            if self._locked == 0:
-                self.enable()
+            with self._locked_mutex:
+                self._locked -= 1
+                last = self._locked == 0
+            if last:
+                self.callUI(self.enable)
+
+    def startTask(self, callback: Callable[[CancelToken], Any], lock=True, key: str | None = None) -> Task:
+        """Run callback(token) on the shared worker pool.
 
-    def startTask(self, callback, lock=True) -> None:
-        def task():
+        Tasks with the same key supersede each other, e.g. key="search" cancels
+        the previous search when a new one starts.
+        """
+        def task(token: CancelToken):
             if lock:
                 with self.lock():
-                    callback()
+                    callback(token)
             else:
-                callback()
+                callback(token)
+
+        task.__name__ = getattr(callback, '__name__', 'task')
+        return self.tasks.submit(task, key=key)
 
-        taskthread = threading.Thread(target=task, daemon=True)
-        taskthread.start()
+    def startTaskCurry(self, callback, key: str | None = None) -> Callable[..., None]:
+        def curried(*a) -> None:
+            self.startTask(callback, key=key)
+        return curried
 
-    def startTaskCurry(self, callback) -> Callable[..., None]:
-        return lambda *a: self.startTask(callback)
+    def _onTaskDone(self, task: Task, outcome: str, elapsed: float) -> None:
+        self.setStatus(f"Task #{task.task_id} {task.name} {outcome} in {elapsed:.2f}s")
@@ -0,0 +1,124 @@
+import math
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable
+
+
+class VirtualGrid(ttk.Frame):
+    """A scrolling list that only builds widgets for the rows on screen.
+
+    make_row(parent) builds the widgets for one on-screen slot and returns a
+    handle for them. bind_row(handle, index) fills that slot with row `index`.
+    Slots are reused as the view scrolls, so the widget count depends on the
+    window height, not on row_count.
+    """
+
+    def __init__(
+        self,
+        parent,
+        make_row: Callable[[ttk.Frame], Any],
+        bind_row: Callable[[Any, int], None],
+        row_height: int = 28,
+        *args,
+        **kwargs,
+    ) -> None:
+        super().__init__(parent, *args, **kwargs)
+
+        self.make_row = make_row
+        self.bind_row = bind_row
+        self.row_height: int = row_height
+
+        self.row_count: int = 0
+        self.first_row: int = 0
+        self.slots: list[tuple[ttk.Frame, Any]] = []
+
+        self.body = ttk.Frame(self)
+        self.body.grid(column=0, row=0, sticky="nsew")
+        self.body.columnconfigure(0, weight=1)
+
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.vsb.grid(column=1, row=0, sticky="ns")
+
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.body.bind("<Configure>", self._onResize)
+        self._bindWheel(self.body)
+
+    @property
+    def visible_rows(self) -> int:
+        return len(self.slots)
+
+    def setRowCount(self, row_count: int) -> None:
+        self.row_count = row_count
+        self.first_row = min(self.first_row, self._maxFirstRow())
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Rebind every on-screen slot, e.g. after the backing data changed."""
+        for offset, (frame, handle) in enumerate(self.slots):
+            index = self.first_row + offset
+            if index < self.row_count:
+                self.bind_row(handle, index)
+                frame.grid()
+            else:
+                frame.grid_remove()
+
+        if self.row_count:
+            self.vsb.set(
+                self.first_row / self.row_count,
+                min(1.0, (self.first_row + self.visible_rows) / self.row_count)
+            )
+        else:
+            self.vsb.set(0.0, 1.0)
+
+    def yview(self, *args) -> None:
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.first_row = int(float(args[1]) * self.row_count)
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= max(1, self.visible_rows - 1)
+            self.first_row += step
+
+        self.first_row = max(0, min(self.first_row, self._maxFirstRow()))
+        self.refresh()
+
+    def _maxFirstRow(self) -> int:
+        return max(0, self.row_count - self.visible_rows)
+
+    def _onResize(self, event: tk.Event) -> None:
+        wanted = max(1, math.ceil(event.height / self.row_height))
+
+        while len(self.slots) < wanted:
+            frame = ttk.Frame(self.body, height=self.row_height)
+            frame.grid(column=0, row=len(self.slots), sticky="ew")
+            frame.grid_propagate(False)
+            frame.columnconfigure(0, weight=1)
+            frame.columnconfigure(1, weight=1)
+            handle = self.make_row(frame)
+            self._bindWheel(frame)
+            self.slots.append((frame, handle))
+
+        while len(self.slots) > wanted:
+            frame, _ = self.slots.pop()
+            frame.destroy()
+
+        self.first_row = max(0, min(self.first_row, self._maxFirstRow()))
+        self.refresh()
+
+    def _onWheel(self, event: tk.Event) -> None:
+        if event.num == 4:
+            self.yview("scroll", -3, "units")
+        elif event.num == 5:
+            self.yview("scroll", 3, "units")
+        elif event.delta:
+            self.yview("scroll", -3 if event.delta > 0 else 3, "units")
+
+    def _bindWheel(self, widget: tk.Misc) -> None:
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            widget.bind(sequence, self._onWheel, add="+")
+        for child in widget.winfo_children():
+            self._bindWheel(child)
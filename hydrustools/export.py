@@ -0,0 +1,128 @@
+import csv
+import json
+import logging
+from pathlib import Path
+from typing import Iterable
+
+from . import logic
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+# Rows buffered per write; output never holds more than this in memory
+EXPORT_CHUNK_ROWS = 10_000
+
+FORMAT_NAMES: dict[str, str] = {
+    ".csv": "CSV",
+    ".jsonl": "JSON Lines",
+    ".parquet": "Parquet",
+    ".arrow": "Arrow IPC",
+}
+ARROW_FORMATS = {".parquet", ".arrow"}
+
+
+def available_formats() -> list[str]:
+    """File suffixes export_rows can write here. Parquet and Arrow need pyarrow."""
+    return [suffix for suffix in FORMAT_NAMES if pyarrow or suffix not in ARROW_FORMATS]
+
+
+def write_jsonl(path: Path, rows: Iterable[dict], chunk_size: int = EXPORT_CHUNK_ROWS) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as fp:
+        for chunk in logic.chunk(rows, chunk_size):
+            fp.write(''.join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in chunk))
+            count += len(chunk)
+    return count
+
+
+def write_csv(path: Path, rows: Iterable[dict], headers: list[str], chunk_size: int = EXPORT_CHUNK_ROWS) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as fp:
+        writer = csv.DictWriter(fp, fieldnames=headers, extrasaction="ignore")
+        writer.writeheader()
+        for chunk in logic.chunk(rows, chunk_size):
+            writer.writerows(chunk)
+            count += len(chunk)
+    return count
+
+
+def write_arrow(path: Path, rows: Iterable[dict], headers: list[str], chunk_size: int = EXPORT_CHUNK_ROWS, parquet: bool = True) -> int:
+    """Write rows as Parquet (or an Arrow IPC file), one record batch per chunk.
+
+    Column types are inferred from the first chunk and kept for the rest.
+    """
+    if pyarrow is None:
+        raise RuntimeError("Parquet and Arrow export need the pyarrow package")
+
+    count = 0
+    schema = None
+    writer = None
+    try:
+        for chunk in logic.chunk(rows, chunk_size):
+            columns = {header: [row.get(header) for row in chunk] for header in headers}
+            if schema is None:
+                table = pyarrow.table(columns)
+                # Columns that are all empty in the first chunk default to text
+                schema = pyarrow.schema([
+                    field.with_type(pyarrow.string()) if pyarrow.types.is_null(field.type) else field
+                    for field in table.schema
+                ])
+                writer = pyarrow.parquet.ParquetWriter(path, schema) if parquet else pyarrow.ipc.new_file(path, schema)
+            writer.write_table(pyarrow.table(columns, schema=schema))  # type: ignore
+            count += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        # No rows: still leave a valid, empty file with the columns
+        schema = pyarrow.schema([(header, pyarrow.string()) for header in headers])
+        writer = pyarrow.parquet.ParquetWriter(path, schema) if parquet else pyarrow.ipc.new_file(path, schema)
+        writer.close()
+    return count
+
+
+def export_rows(path: str | Path, rows: Iterable[dict], headers: list[str] | None = None, chunk_size: int = EXPORT_CHUNK_ROWS) -> int:
+    """Stream rows (dicts) to path in the format of its suffix. Returns the row count.
+
+    Rows are consumed lazily, a chunk at a time, so they can come straight
+    from a table or a generator. headers gives the column order; by default
+    it is the keys of the first row.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix not in FORMAT_NAMES:
+        raise ValueError(f"Can't export to {suffix!r} files, expected one of {', '.join(FORMAT_NAMES)}")
+
+    iterator = iter(rows)
+    if headers is None:
+        first = next(iterator, None)
+        headers = list(first) if first is not None else []
+        if first is not None:
+            iterator = (row for rows_ in ([first], iterator) for row in rows_)
+
+    if suffix == ".jsonl":
+        count = write_jsonl(path, iterator, chunk_size)
+    elif suffix == ".csv":
+        count = write_csv(path, iterator, headers, chunk_size)
+    else:
+        count = write_arrow(path, iterator, headers, chunk_size, parquet=(suffix == ".parquet"))
+
+    logger.info(f"Exported {count} rows to {path}")
+    return count
+
+
+def write_lines(path: str | Path, lines: Iterable[str], chunk_size: int = EXPORT_CHUNK_ROWS) -> int:
+    """Write lines of text, e.g. a sibling or parent clipboard, without joining them first."""
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as fp:
+        for chunk in logic.chunk(lines, chunk_size):
+            fp.write(''.join(line + "\n" for line in chunk))
+            count += len(chunk)
+    return count
@@ -10,12 +10,23 @@ from .macro import macro_creatortags
 
 from . import logic
 from .component.gui_util import TextCopyWindow, tkwrapc
-from .macro import macro_pages
+from .macro import macro_namesiblings, macro_pages
 from .settings import HTSettings
 from .tool.win_altsync import AltSyncWindow
+from .tool.win_artistlookup import ArtistLookupWindow
+from .tool.win_charseries import CharacterSeriesWindow
 from .tool.win_flatten import FlattenWindow
+from .tool.win_importdownloader import ImportDownloaderWindow
+from .tool.win_mailrules import MailRulesWindow
+from .tool.win_notetags import NoteTagsWindow
+from .tool.win_nsstats import NamespaceStatsWindow
 from .tool.win_regex import RegexSearchWindow
+from .tool.win_reordered import ReorderedNamesWindow
+from .tool.win_seriesparens import SeriesParensWindow
+from .tool.win_subsetparents import SubsetParentsWindow
+from .tool.win_tageditor import TagEditorWindow
 from .tool.win_tagsearch import TagSearchWindow
+from .tool.win_treeviz import TreeVisualizerWindow
 
 Settings = HTSettings()
 
@@ -30,7 +41,7 @@ class ToolsWindow(tk.Tk):  # noqa: PLR0904
         self.mainloop()
 
     def initwindow(self) -> None:
-        self.geometry("250x540")
+        self.geometry("250x570")
         self.title("Tools")
 
         self.columnconfigure(0, weight=1)
@@ -49,18 +60,19 @@ class ToolsWindow(tk.Tk):  # noqa: PLR0904
                 ("Note Search", RegexSearchWindow),
                 ("Synchronize Alternates", AltSyncWindow),
                 ("Tag Browser", TagSearchWindow),
-                ("Tag Editor", None),
-                ("Artist Lookup", None),
-                ("Tree Visualizer", None),
-                ("Import Downloader Tags In Local Repo", None),
-                ("Extract Tags from Notes", None),
+                ("Namespace Statistics", NamespaceStatsWindow),
+                ("Tag Editor", TagEditorWindow),
+                ("Artist Lookup", ArtistLookupWindow),
+                ("Tree Visualizer", TreeVisualizerWindow),
+                ("Import Downloader Tags In Local Repo", ImportDownloaderWindow),
+                ("Extract Tags from Notes", NoteTagsWindow),
                 # We really want tag relationships for these...
-                ("Parent characters to series", None),
-                ("Identify Reordered Character Names", None),
-                ("Make Series from Character Parens", None),
-                ("Detect Tag Siblings from Names", None),
-                ("Detect Tag Parents from Subsets", None),
-                ("Mail Rules", None),
+                ("Parent characters to series", CharacterSeriesWindow),
+                ("Identify Reordered Character Names", ReorderedNamesWindow),
+                ("Make Series from Character Parens", SeriesParensWindow),
+                ("Detect Tag Siblings from Names", macro_namesiblings.find_name_siblings),
+                ("Detect Tag Parents from Subsets", SubsetParentsWindow),
+                ("Mail Rules", MailRulesWindow),
                 # ("Extract known creators from filename note", macro_creatortags.find_creators),
                 # ("Extract page numbers from filename note", macro_pages.add_page_tags),
             ]:
@@ -21,6 +21,8 @@ class IniSettings:
     _config: configparser.ConfigParser
     _section: str = "DEFAULT"
     _initialized: bool = False
+    # Set to None in subclasses whose values may contain a literal %
+    _interpolation: configparser.Interpolation | None = configparser.BasicInterpolation()
 
     def __init__(self, ini_file: Path | None = None, section: str = "DEFAULT"):
         """Initialize settings from an INI file.
@@ -32,7 +34,7 @@ class IniSettings:
         # Store instance variables without triggering __setattr__
         object.__setattr__(self, "_ini_file", Path(ini_file or f"{self.__class__.__name__}.ini"))
         object.__setattr__(self, "_section", section)
-        object.__setattr__(self, "_config", configparser.ConfigParser())
+        object.__setattr__(self, "_config", configparser.ConfigParser(interpolation=self._interpolation))
         object.__setattr__(self, "_initialized", False)
 
         # Load existing INI file if it exists
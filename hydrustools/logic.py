@@ -1,6 +1,11 @@
 import dataclasses
+import functools
 import pprint
 import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, TypeVar
 
 import hydrus_api
 from pick import pick
@@ -9,6 +14,14 @@ from .settings import HTSettings
 
 Settings = HTSettings()
 
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Concurrent requests in flight for chunked API calls
+IO_WORKERS = 4
+SIBLING_CHUNK_SIZE = 500
+METADATA_CHUNK_SIZE = 1000
+
 
 @dataclasses.dataclass
 class TagInfo():
@@ -16,6 +29,27 @@ class TagInfo():
     value: str
 
 
+@dataclasses.dataclass
+class Delivery():
+    """What deliver_file_ids sent to Hydrus."""
+    total: int
+    sent: int = 0
+    popups: int = 0
+    query: str | None = None
+    page_key: str | None = None
+
+    def summary(self) -> str:
+        if self.page_key is not None:
+            return f"Added {self.sent} files to the page"
+        if self.query is not None:
+            return f"{self.total} files: search {self.query} in Hydrus ({self.sent} attached)"
+        if self.total == 0:
+            return "No files matched"
+        if self.sent < self.total:
+            return f"Sent {self.sent} of {self.total} files in {self.popups} popups (limit reached)"
+        return f"Sent {self.sent} files in {self.popups} popup{'s' if self.popups != 1 else ''}"
+
+
 @dataclasses.dataclass(frozen=True)
 class SiblingInfo():
     tag: str
@@ -80,7 +114,157 @@ def chunk(iterable, maxsize):
     yield from iter(lambda: tuple(islice(iter_it, maxsize)), ())
 
 
-def search_tags_re(substr: str, subpattern: str, display_type="storage") -> list[TagInfo]:
+_io_pool: ThreadPoolExecutor | None = None
+_io_pool_lock = threading.Lock()
+
+
+def io_pool() -> ThreadPoolExecutor:
+    global _io_pool
+    with _io_pool_lock:
+        if _io_pool is None:
+            _io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="hydrustools-io")
+        return _io_pool
+
+
+def map_chunks(func: Callable[[tuple[T, ...]], R], iterable: Iterable[T], maxsize: int, prefetch: int = IO_WORKERS) -> Iterator[R]:
+    """Apply func to chunks of iterable concurrently, yielding results in order.
+
+    At most `prefetch` chunks are in flight at once, so memory stays bounded
+    however long the input is. Closing the generator early cancels the rest.
+
+    >>> list(map_chunks(sum, range(10), 4))
+    [6, 22, 17]
+    """
+    pool = io_pool()
+    pending = deque()
+    try:
+        for id_chunk in chunk(iterable, maxsize):
+            pending.append(pool.submit(func, id_chunk))
+            if len(pending) >= prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def has_note(*notenames: str, max_n: int = 4) -> list[str]:
+    """An OR predicate for files with any of the named notes, including the
+    " (n)" copies Hydrus makes when merging metadata.
+
+    >>> has_note("filename", max_n=2)
+    ['system:has note with name "filename"', 'system:has note with name "filename (1)"']
+    """
+    return [
+        predicate
+        for notename in notenames
+        for predicate in [
+            f'system:has note with name "{notename}"',
+            *[f'system:has note with name "{notename} ({n})"' for n in range(1, max_n)]
+        ]
+    ]
+
+
+def query_text(query: Iterable[str | list[str]]) -> str:
+    """A search as you would type it into Hydrus, one predicate after another.
+
+    >>> query_text(["series:metroid", ["character:samus aran", "character:ridley"]])
+    'series:metroid, (character:samus aran OR character:ridley)'
+    """
+    return ', '.join(
+        predicate if isinstance(predicate, str) else f"({' OR '.join(predicate)})"
+        for predicate in query
+    )
+
+
+def deliver_file_ids(
+    title: str,
+    label: str,
+    file_ids: Iterable[int],
+    query: list[str | list[str]] | None = None,
+    chunk_size: int | None = None,
+    max_popups: int | None = None,
+    page_key: str | None = None,
+) -> Delivery:
+    """Hand a set of files to Hydrus without one giant request.
+
+    Up to chunk_size files go in a single popup, as before. Larger sets are
+    split over at most max_popups popups labelled "part i/n"; the rest is not
+    sent. If query reproduces the files as a Hydrus search, a large set is
+    offered as that query instead, with the first chunk attached. With
+    page_key, files are added to that page in chunks and nothing is capped.
+    An empty set still gets one popup, so the search visibly finished.
+    """
+    file_ids = list(file_ids)
+    chunk_size = chunk_size or Settings.delivery_chunk_size
+    max_popups = max_popups or Settings.delivery_max_popups
+    delivery = Delivery(total=len(file_ids), page_key=page_key)
+
+    if page_key is not None:
+        for id_chunk in chunk(file_ids, chunk_size):
+            client.add_files_to_page(page_key, file_ids=id_chunk)
+            delivery.sent += len(id_chunk)
+        return delivery
+
+    if len(file_ids) > chunk_size and query:
+        delivery.query = query_text(query)
+        delivery.sent = min(chunk_size, len(file_ids))
+        delivery.popups = 1
+        client.add_popup(
+            title,
+            status_text_1=f"{len(file_ids)} files, search for: {delivery.query}",
+            files_label=f"{label} (first {delivery.sent})",
+            file_ids=file_ids[:chunk_size],  # type: ignore
+        )
+        return delivery
+
+    if not file_ids:
+        client.add_popup(title, files_label=label, file_ids=[])  # type: ignore
+        delivery.popups = 1
+        return delivery
+
+    parts = -(-len(file_ids) // chunk_size)
+    for i, id_chunk in enumerate(chunk(file_ids, chunk_size), 1):
+        if i > max_popups:
+            break
+        client.add_popup(
+            title,
+            files_label=label if parts == 1 else f"{label} (part {i}/{parts})",
+            file_ids=id_chunk,  # type: ignore
+        )
+        delivery.sent += len(id_chunk)
+        delivery.popups += 1
+    return delivery
+
+
+def _fetch_file_metadata(file_ids: Iterable[int], **kwargs) -> list[dict]:
+    return client.get_file_metadata(file_ids=file_ids, **kwargs)['metadata']  # type: ignore
+
+
+def iter_file_metadata(file_ids: Iterable[int], chunk_size: int = METADATA_CHUNK_SIZE, **kwargs) -> Iterator[list[dict]]:
+    """Yield file metadata a chunk at a time, fetching the next chunks concurrently.
+
+    Keyword arguments are passed through to get_file_metadata.
+    """
+    return map_chunks(
+        lambda id_chunk: _fetch_file_metadata(id_chunk, **kwargs),
+        file_ids,
+        chunk_size
+    )
+
+
+def file_tags(metadata: dict, service_key: str | None = None, kind: str = "display_tags") -> set[str]:
+    """Current tags of a file, in one service or across all of them."""
+    current = str(hydrus_api.TagStatus.CURRENT.value)
+    tags: set[str] = set()
+    for key, service_tags in metadata.get('tags', {}).items():
+        if service_key is None or key == service_key:
+            tags.update(service_tags.get(kind, {}).get(current, []))
+    return tags
+
+
+def search_tags(substr: str, display_type="storage") -> list[TagInfo]:
     resp = client.search_tags(
         search=substr,
         tag_service_key=local_tags_service_key,
@@ -89,7 +273,15 @@ def search_tags_re(substr: str, subpattern: str, display_type="storage") -> list
     return [
         TagInfo(**item)
         for item in resp["tags"]  # type: ignore
-        if re.match(subpattern, item["value"])
+    ]
+
+
+def search_tags_re(substr: str, subpattern: str, display_type="storage") -> list[TagInfo]:
+    matcher = re.compile(subpattern)
+    return [
+        ti
+        for ti in search_tags(substr, display_type=display_type)
+        if matcher.match(ti.value)
     ]
 
 
@@ -110,11 +302,11 @@ def replace_tag(original_tag: str, new_tags: list[str]) -> None:
     )
 
 
-def get_sibling_ideal_targets(target_tags: list[str]) -> list[SiblingInfo]:
+def _fetch_sibling_infos(target_tags: Iterable[str]) -> dict[str, SiblingInfo]:
     resp = client.get_siblings_and_parents(target_tags)
     # pprint.pprint(resp)
     tags: dict[str, dict[str, str]] = resp["tags"]
-    siblings: dict[str, SiblingInfo] = {
+    return {
         k: SiblingInfo(
             tag=k,
             ideal_tag=v[local_tags_service_key]["ideal_tag"],
@@ -125,6 +317,58 @@ def get_sibling_ideal_targets(target_tags: list[str]) -> list[SiblingInfo]:
         # k: v[local_tags_service_key]
         for k, v in tags.items()
     }
+
+
+_sibling_cache: dict[str, SiblingInfo] = {}
+_sibling_cache_lock = threading.Lock()
+
+
+def fetch_sibling_infos(target_tags: Iterable[str], cached: bool = False) -> dict[str, SiblingInfo]:
+    """Sibling and parent info in a single request on the calling thread.
+
+    With cached, tags looked up before (by any cached call) are answered
+    without a request, and only the rest are fetched.
+    """
+    if not cached:
+        return _fetch_sibling_infos(target_tags)
+
+    target_tags = list(target_tags)
+    with _sibling_cache_lock:
+        infos = {t: _sibling_cache[t] for t in target_tags if t in _sibling_cache}
+    missing = [t for t in target_tags if t not in infos]
+    if missing:
+        fetched = _fetch_sibling_infos(missing)
+        with _sibling_cache_lock:
+            _sibling_cache.update(fetched)
+        infos.update(fetched)
+    return infos
+
+
+def forget_sibling_infos(target_tags: Iterable[str] | None = None) -> None:
+    """Drop cached sibling info, for some tags or all of them."""
+    with _sibling_cache_lock:
+        if target_tags is None:
+            _sibling_cache.clear()
+        else:
+            for tag in target_tags:
+                _sibling_cache.pop(tag, None)
+
+
+def iter_sibling_infos(target_tags: Iterable[str], chunk_size: int = SIBLING_CHUNK_SIZE, cached: bool = False) -> Iterator[dict[str, SiblingInfo]]:
+    """Sibling and parent info one chunk at a time, as concurrent requests complete."""
+    yield from map_chunks(functools.partial(fetch_sibling_infos, cached=cached), target_tags, chunk_size)
+
+
+def get_sibling_infos(target_tags: Iterable[str], chunk_size: int = SIBLING_CHUNK_SIZE, cached: bool = False) -> dict[str, SiblingInfo]:
+    """Sibling and parent info for every tag, fetched in concurrent chunks."""
+    siblings: dict[str, SiblingInfo] = {}
+    for infos in iter_sibling_infos(target_tags, chunk_size, cached=cached):
+        siblings.update(infos)
+    return siblings
+
+
+def get_sibling_ideal_targets(target_tags: list[str]) -> list[SiblingInfo]:
+    siblings = get_sibling_infos(target_tags)
     # pprint.pprint(siblings)
     targets: list[SiblingInfo] = [v for k, v in siblings.items() if k != v.ideal_tag]
     return targets
@@ -1,31 +1,31 @@
 import logging
 import re
+import time
 
 import tqdm
 from tqdm.tk import tqdm as tqdmtk
 
 from .. import logic
-from ..component.tagadderwin import TagAction, TagAdderWindow
+from ..actionstore import TagAction, TagActionStore
+from ..checkpoint import Checkpoint
+from ..component.tagadderwin import TagAdderWindow
+from ..tagindex import creator_index, creator_name
+from .notepipeline import NoteExtractor, extract_note_tags, search_note_files
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-def has_note(notename: str, max_n: int = 4) -> list[str]:
-    return [
-        *[f'system:has note with name "{notename}"'],
-        *[f'system:has note with name "{notename} ({n})"' for n in range(1, max_n)]
-    ]
+CHECKPOINT_INTERVAL_SECS = 10
+CREATOR_INDEX_MAX_AGE_SECS = 6 * 60 * 60
 
-def all_creator_names(min_count=2):
-    creator_tags = logic.client.search_tags(
-        search="creator:*",
-        tag_service_key=logic.local_tags_service_key,
-        tag_display_type="display"
-    )['tags'] # type: ignore
+def all_creator_names(min_count=2, max_age=CREATOR_INDEX_MAX_AGE_SECS):
+    # Read from the local creator index, only re-downloading it once it is stale
+    index = creator_index()
+    index.refresh(max_age=max_age)
     creator_names = [
-        tag['value'].replace('creator:', '').replace(' (artist)', '')
-        for tag in creator_tags
-        if tag['count'] >= min_count
+        creator_name(tag)
+        for tag, count in index.counts.items()
+        if count >= min_count
     ]
     return creator_names
 
@@ -42,57 +42,116 @@ def all_creator_patterns(creator_names) -> list[tuple[str, re.Pattern]]:
 
     return creator_patterns
 
-def find_creators(tk=True):
+
+class CreatorExtractor(NoteExtractor):
+    """Proposes a creator: tag for every known creator name found in a note.
+
+    Like the original macro, each creator is its own action, so proposals can
+    be reviewed and applied one creator at a time.
+    """
+    def __init__(self, creator_patterns: list[tuple[str, re.Pattern]], note_names=('filename',)) -> None:
+        super().__init__(note_names)
+        self.creator_patterns = creator_patterns
+
+    def extract(self, notes: dict[str, str]) -> list[tuple[str, list[str]]]:
+        extracted: list[tuple[str, list[str]]] = []
+        found: set[str] = set()
+        # A creator named in several copies of the note is proposed once
+        for note_body in notes.values():
+            for (name, pattern) in self.creator_patterns:
+                if name not in found and pattern.search(note_body):
+                    found.add(name)
+                    extracted.append((note_body, [f"creator:{name}"]))
+        return extracted
+
+
+def find_creators(tk=True, resume=True):
+    """Propose creator tags from filename notes.
+
+    Files are scanned in file id order and progress is checkpointed to disk:
+    the last scanned file id (cursor) and the unreviewed proposals. A later run
+    picks up the pending proposals and only scans files past the cursor.
+    Cancelling the progress window stops the scan early and reviews what was
+    found so far.
+    """
     tqdm_iterator = (tqdmtk if tk else tqdm.tqdm)
 
     creator_names = all_creator_names()
     creator_patterns: list[tuple[str, re.Pattern]] = all_creator_patterns(creator_names)
+    extractor = CreatorExtractor(creator_patterns)
+
+    tag_query: list[str | list[str]] = ["-creator:*"]
 
-    notename = "filename"
+    checkpoint = Checkpoint("find_creators")
+    state = checkpoint.load() if resume else None
+    if state is None or state.get("query") != tag_query:
+        state = {"query": tag_query, "cursor": -1, "pending": []}
 
-    tag_query: list[str | list[str]] = [] # type: ignore
+    tag_actions = TagActionStore(TagAction(*row) for row in state["pending"])
+    applied_indices: set[int] = set()
 
-    tag_query.append(has_note(notename))
-    tag_query.append("-creator:*")
+    file_ids: list[int] = sorted(
+        file_id
+        for file_id in search_note_files(extractor.note_names, tag_query)
+        if file_id > state["cursor"]
+    )
+    logger.info(f"Resuming with {len(tag_actions)} pending actions, {len(file_ids)} files past cursor {state['cursor']}")
 
-    file_ids_with_note = logic.client.search_files(
-        tags=tag_query # type: ignore
-    )['file_ids']
+    def save(done: int) -> None:
+        if done:
+            state["cursor"] = file_ids[done - 1]
+        state["pending"] = [
+            [*row]
+            for i, row in enumerate(tag_actions.rows())
+            if i not in applied_indices
+        ]
+        checkpoint.save(state)
 
-    logger.info(f"Found {len(file_ids_with_note)} files matching {tag_query!r}...")
+    stop_requested = False
 
-    tag_actions: list[TagAction] = []
+    def cancel() -> None:
+        nonlocal stop_requested
+        stop_requested = True
 
     iterable = tqdm_iterator(
-        [*logic.chunk(file_ids_with_note, 200)],
         desc=f"Searching for any of {len(creator_names)} creator tags in filenames",
-        unit="chunk"
+        unit="file",
+        **({"cancel_callback": cancel} if tk else {})
     )
 
-    for id_chunk in iterable:
-        resp = logic.client.get_file_metadata(file_ids=id_chunk, include_notes=True)
-
-        for metadata in resp['metadata']:
-            note_body = metadata['notes'].get(notename)
-            for (name, pattern) in creator_patterns:
-                match = pattern.search(note_body)
-                if not match:
-                    continue
-
-                new_tag = f"creator:{name}"
-
-                logger.info(f"Adding new tag {new_tag} to file {note_body} matching {match}")
-
-                action = TagAction(metadata['file_id'], note_body, [new_tag])
-                tag_actions.append(action)
-
-        if len(tag_actions) > 512:
-            break
-
-    if hasattr(iterable, 'close'):
-        iterable.close()
-
-    TagAdderWindow(tag_actions)
+    files_done = 0
+
+    def progress(done: int, total: int) -> None:
+        nonlocal files_done
+        files_done = done
+        iterable.total = total
+        iterable.update(done - iterable.n)
+
+    last_save = time.monotonic()
+    try:
+        for batch in extract_note_tags(
+            [extractor],
+            file_ids=file_ids,
+            chunk_size=200,
+            progress=progress,
+            should_stop=lambda: stop_requested
+        ):
+            tag_actions.extend(batch)
+
+            if time.monotonic() - last_save > CHECKPOINT_INTERVAL_SECS:
+                save(files_done)
+                last_save = time.monotonic()
+    finally:
+        save(files_done)
+
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+    def onApplied(indices: list[int]) -> None:
+        applied_indices.update(indices)
+        save(0)
+
+    TagAdderWindow(tag_actions, on_applied=onApplied)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,41 @@
+import logging
+
+from hydrustools.component.siblingadderwin import SiblingAction, SiblingAdderWindow, sibling_actions_for_groups
+
+from .. import logic, tagnames
+from ..settings import HTSettings
+
+Settings = HTSettings()
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+def find_name_siblings(tk=True) -> list[SiblingAction]:
+    """Propose siblings for tags whose names differ only by spelling.
+
+    Opens the review window, or with tk=False logs and returns the actions.
+    """
+    query: str = Settings.namesiblings_query or "*"
+    tags = logic.search_tags(query)
+
+    # Normalized exact matches plus a deletion index for near matches, one pass
+    groups: list[list[str]] = tagnames.near_duplicate_groups(
+        (ti.value for ti in tags),
+        max_distance=Settings.namesiblings_max_distance
+    )
+    logger.info(f"Found {len(groups)} near-duplicate name groups in {len(tags)} tags matching {query!r}")
+
+    sibling_actions = sibling_actions_for_groups(groups)
+    logger.info(f"{len(sibling_actions)} groups are not already siblings")
+
+    if tk:
+        SiblingAdderWindow(sibling_actions)
+    else:
+        for action in sibling_actions:
+            logger.info("Possible siblings: %s", action.sibling_options)
+    return sibling_actions
+
+
+if __name__ == "__main__":
+    logic.init_client()
+    find_name_siblings(tk=False)
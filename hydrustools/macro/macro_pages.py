@@ -1,85 +1,84 @@
 import logging
 import re
+from itertools import product
 
 from tqdm.tk import tqdm as tqdmtk
 
-from ..component.tagadderwin import TagAction, TagAdderWindow
+from ..actionstore import TagActionStore
+from ..component.tagadderwin import TagAdderWindow
 
 from .. import logic
+from .notepipeline import NoteExtractor, extract_note_tags
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-def has_note(max_n: int = 4) -> list[str]:
-    return [
-        *[f'system:has note with name "filename"'],
-        *[f'system:has note with name "filename ({n})"' for n in range(1, max_n)],
-        *[f'system:has note with name "filepath"'],
-        *[f'system:has note with name "filepath ({n})"' for n in range(1, max_n)]
-    ]
-
-
-def getFilenameInfo(metadata: dict) -> dict[str, str] | None:
-    name_matcher = re.compile(
-        r'(\b|[_-])page[^0-9]?(?P<N>\d+)([^\d]|$)'
-    )
-
-    for suffix in ['', ' (1)', ' (2)', ' (3)', ' (4)']:
-        body = metadata['notes'].get(f'filename{suffix}', '')
-        match = name_matcher.search(body)
-        if match:
-            return {
-                "body": body,
-                **match.groupdict()
-            }
-
-        body = metadata['notes'].get(f'filepath{suffix}', '')
-        match = name_matcher.search(body)
-        if match:
-            return {
-                "body": body,
-                **match.groupdict()
-            }
+PAGE_PATTERN = r'(?:\b|[_-])page[^0-9]?(?P<N>\d+)(?!\d)'
+
+class PageNumberExtractor(NoteExtractor):
+    """Finds page numbers in a file's filename and filepath notes.
+
+    The pattern and the set of note names are prepared once, so each file
+    costs one pass over its notes.
+    """
+    def __init__(self, note_names: tuple[str, ...] = ('filename', 'filepath'), max_n: int = 5) -> None:
+        super().__init__(note_names, max_n)
+        self.matcher: re.Pattern = re.compile(PAGE_PATTERN)
+
+        # Lower rank is preferred: "filename" before "filepath", unsuffixed before " (n)"
+        suffixes = ['', *(f' ({n})' for n in range(1, max_n))]
+        self.note_rank: dict[str, int] = {
+            f'{name}{suffix}': rank
+            for rank, (suffix, name) in enumerate(product(suffixes, note_names))
+        }
+
+    def __call__(self, notes: dict[str, str]) -> list[dict[str, str]]:
+        """Every page number candidate in notes, best first."""
+        candidates: list[tuple[int, int, dict[str, str]]] = []
+        for note_name, body in notes.items():
+            rank = self.note_rank.get(note_name)
+            if rank is None:
+                continue
+            for match in self.matcher.finditer(body):
+                candidates.append((rank, match.start(), {
+                    "body": body,
+                    "note": note_name,
+                    **match.groupdict()
+                }))
+
+        candidates.sort(key=lambda c: c[:2])
+        return [c[2] for c in candidates]
+
+    def extract(self, notes: dict[str, str]) -> list[tuple[str, list[str]]]:
+        candidates = self(notes)
+        if not candidates:
+            return []
+
+        best = candidates[0]
+        pages = {c['N'] for c in candidates}
+        if len(pages) > 1:
+            logger.info(f"{best['body']!r} has several page candidates {sorted(pages)}, using {best['N']}")
+
+        return [(best['body'], [f"page:{best['N']}"])]
 
 
 def add_page_tags(tk=True):
-    tag_query: list[str | list[str]] = [] # type: ignore
-
-    tag_query.append(has_note())
-    tag_query.append("-page:*")
-
-    resp = logic.client.search_files(
-        tags=tag_query # type: ignore
-    )
-    file_ids_with_note = resp['file_ids']
-
-    logger.info(f"Found {len(file_ids_with_note)} files matching {tag_query!r}...")
-
-    tag_actions: list[TagAction] = []
+    tag_actions = TagActionStore()
 
     # iterator: tqdm.tqdm = (tqdmtk if tk else tqdm.tqdm)
     iterator = tqdmtk(
-        [*logic.chunk(file_ids_with_note, 1000)],
         desc="Searching for page names in filenames",
-        unit="chunk"
+        unit="file"
     )
-    for i, id_chunk in enumerate(iterator):
-
-        # pw.pb['value'] = 100*i/len(chunk_list)
-
-        resp = logic.client.get_file_metadata(file_ids=id_chunk, include_notes=True)
-
-        for metadata in resp['metadata']:
-            groupdict = getFilenameInfo(metadata)
-            if groupdict is not None:
-                new_tag = f"page:{groupdict.get('N')}"
 
-                # pw.setStatus(f"Found new tag {new_tag} for file {note_body} matching {match}")
+    def progress(done: int, total: int) -> None:
+        iterator.total = total
+        iterator.update(done - iterator.n)
 
-                action = TagAction(metadata['file_id'], groupdict['body'], [new_tag])
-                tag_actions.append(action)
+    for batch in extract_note_tags([PageNumberExtractor()], ["-page:*"], progress=progress):
+        tag_actions.extend(batch)
 
-    # pw.destroy()
+    iterator.close()
 
     TagAdderWindow(tag_actions)
 
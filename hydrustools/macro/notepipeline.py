@@ -0,0 +1,252 @@
+import logging
+import os
+from abc import ABC, abstractmethod
+import re
+import string
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Generator, Iterable
+
+from .. import logic
+from ..actionstore import TagAction
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# (file_id, identifier, new_tags)
+ExtractedRow = tuple[int, str, list[str]]
+
+TEMPLATE_SEPARATOR = " => "
+# Kept as plain text: an INI value would drop # lines, blank lines and indents
+TEMPLATE_RULES_FILE = Path("NoteTagRules.txt")
+DEFAULT_TEMPLATE_RULES = r"(?:\b|[_-])page[^0-9]?(?P<N>\d+)(?!\d) => page:{N}"
+
+
+class NoteExtractor(ABC):
+    """Base class for the pluggable extractors run by extract_note_tags.
+
+    Subclasses implement extract(), which gets the notes of one file (only the
+    ones this extractor reads) and returns (identifier, new_tags) pairs.
+    Extractors are pickled into worker processes once per run, so they should
+    prepare compiled patterns in __init__ and keep no references to the GUI.
+    """
+    def __init__(self, note_names: Iterable[str] = ('filename',), max_n: int = 4) -> None:
+        self.note_names: tuple[str, ...] = tuple(note_names)
+        self.max_n: int = max_n
+        self.note_keys: frozenset[str] = frozenset(
+            f'{name}{suffix}'
+            for name in self.note_names
+            for suffix in ['', *(f' ({n})' for n in range(1, max_n))]
+        )
+
+    @abstractmethod
+    def extract(self, notes: dict[str, str]) -> list[tuple[str, list[str]]]:
+        ...
+
+
+TemplateRule = tuple[re.Pattern, str]
+
+
+def template_fields(template: str) -> list[int | str]:
+    """The groups a template refers to, as numbers or names.
+
+    >>> template_fields("{1}:v{2} {N}")
+    [1, 2, 'N']
+    """
+    return [
+        int(field_name) if field_name.isdigit() else field_name
+        for _, field_name, _, _ in string.Formatter().parse(template)
+        if field_name is not None
+    ]
+
+
+def load_template_rules_text(rules_file: Path = TEMPLATE_RULES_FILE) -> str:
+    if not rules_file.exists():
+        return DEFAULT_TEMPLATE_RULES
+    return rules_file.read_text(encoding="utf-8")
+
+
+def save_template_rules_text(text: str, rules_file: Path = TEMPLATE_RULES_FILE) -> None:
+    r"""Save the rules text exactly as typed.
+
+    >>> import tempfile
+    >>> rules_file = Path(tempfile.mkdtemp()) / "rules.txt"
+    >>> text = "# 100% sure\n\n  (\\w+)_v(\\d) => {1}:v{2}"
+    >>> save_template_rules_text(text, rules_file)
+    >>> load_template_rules_text(rules_file) == text
+    True
+    """
+    rules_file.write_text(text, encoding="utf-8", newline="\n")
+
+
+def parse_template_rules(text: str) -> list[TemplateRule]:
+    r"""Parse "pattern => template" lines into compiled rules.
+
+    Templates are str.format strings filled from the match: {name} for named
+    groups, {0} for the whole match and {1}, {2}... for numbered groups. Blank
+    lines and lines starting with # are skipped.
+
+    >>> [(p.pattern, t) for p, t in parse_template_rules("page(?P<N>\\d+) => page:{N}\n# comment")]
+    [('page(?P<N>\\d+)', 'page:{N}')]
+    >>> parse_template_rules("page(\\d+) => page:{N}")
+    Traceback (most recent call last):
+    ...
+    ValueError: Line 1: template field 'N' is not a group of the pattern
+    """
+    rules: list[TemplateRule] = []
+    for lineno, line in enumerate(text.splitlines(), 1):
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        pattern, sep, template = line.rpartition(TEMPLATE_SEPARATOR)
+        if not sep:
+            raise ValueError(f"Line {lineno}: expected 'pattern {TEMPLATE_SEPARATOR.strip()} template'")
+        try:
+            matcher = re.compile(pattern.strip())
+        except re.error as e:
+            raise ValueError(f"Line {lineno}: {e}") from e
+
+        template = template.strip()
+        for field_name in template_fields(template):
+            if isinstance(field_name, int):
+                if field_name > matcher.groups:
+                    raise ValueError(f"Line {lineno}: the pattern has no group {field_name}")
+            elif field_name not in matcher.groupindex:
+                raise ValueError(f"Line {lineno}: template field {field_name!r} is not a group of the pattern")
+        rules.append((matcher, template))
+    return rules
+
+
+class TemplateExtractor(NoteExtractor):
+    r"""Proposes tags by filling templates like "page:{N}" from pattern matches.
+
+    >>> extractor = TemplateExtractor(parse_template_rules("page(?P<N>\\d+) => page:{N}\n(\\w+)_v(\\d) => {1}:v{2}"))
+    >>> extractor.extract({"filename": "comic_v2 page3"})
+    [('comic_v2 page3', ['comic:v2', 'page:3'])]
+
+    A match where a group the template uses did not take part proposes nothing:
+
+    >>> TemplateExtractor(parse_template_rules("(a)?(b) => {1}:{2}")).extract({"filename": "ab b"})
+    [('ab b', ['a:b'])]
+    """
+    def __init__(self, rules: list[TemplateRule], note_names: Iterable[str] = ('filename',), max_n: int = 4) -> None:
+        super().__init__(note_names, max_n)
+        self.rules = rules
+        self.fields = [template_fields(template) for _, template in rules]
+
+    def extract(self, notes: dict[str, str]) -> list[tuple[str, list[str]]]:
+        extracted: list[tuple[str, list[str]]] = []
+        for note_body in notes.values():
+            new_tags: dict[str, None] = {}
+            for (matcher, template), fields in zip(self.rules, self.fields):
+                for match in matcher.finditer(note_body):
+                    try:
+                        if any(match[field] is None for field in fields):
+                            # An optional group that did not take part in the match
+                            continue
+                        new_tags[template.format(match[0], *match.groups(), **match.groupdict()).strip()] = None
+                    except (IndexError, KeyError):
+                        continue
+            new_tags.pop('', None)
+            if new_tags:
+                extracted.append((note_body, sorted(new_tags)))
+        return extracted
+
+
+def run_extractors(extractors: list[NoteExtractor], rows: list[tuple[int, dict[str, str]]]) -> list[ExtractedRow]:
+    extracted: list[ExtractedRow] = []
+    for file_id, notes in rows:
+        for extractor in extractors:
+            relevant = {k: v for k, v in notes.items() if k in extractor.note_keys}
+            if not relevant:
+                continue
+            for identifier, new_tags in extractor.extract(relevant):
+                extracted.append((file_id, identifier, new_tags))
+    return extracted
+
+
+_worker_extractors: list[NoteExtractor] = []
+
+
+def _initWorker(extractors: list[NoteExtractor]) -> None:
+    global _worker_extractors
+    _worker_extractors = extractors
+
+
+def _runInWorker(rows: list[tuple[int, dict[str, str]]]) -> list[ExtractedRow]:
+    return run_extractors(_worker_extractors, rows)
+
+
+def search_note_files(note_names: Iterable[str], tag_query: Iterable[str | list[str]] = (), max_n: int = 4) -> list[int]:
+    query: list[str | list[str]] = [logic.has_note(*note_names, max_n=max_n), *tag_query]
+    file_ids: list[int] = logic.client.search_files(
+        tags=query  # type: ignore
+    )['file_ids']  # type: ignore
+    logger.info(f"Found {len(file_ids)} files matching {query!r}...")
+    return file_ids
+
+
+def extract_note_tags(
+    extractors: list[NoteExtractor],
+    tag_query: Iterable[str | list[str]] = (),
+    file_ids: Iterable[int] | None = None,
+    chunk_size: int = logic.METADATA_CHUNK_SIZE,
+    processes: int | None = None,
+    progress: Callable[[int, int], None] | None = None,
+    should_stop: Callable[[], bool] | None = None,
+) -> Generator[list[TagAction], None, None]:
+    """Stream TagAction batches proposed by extractors from file notes.
+
+    Files are those with any of the extractors' notes that also match
+    tag_query, unless file_ids is given. Metadata chunks are prefetched
+    concurrently and the extractors run in a process pool (or inline when
+    processes is 0). One batch is yielded per metadata chunk, in file order.
+
+    progress(done, total) is called after each chunk. The run stops early when
+    should_stop() returns true or when the consumer closes the generator.
+    """
+    if file_ids is None:
+        note_names = {name for extractor in extractors for name in extractor.note_names}
+        max_n = max(extractor.max_n for extractor in extractors)
+        file_ids = search_note_files(sorted(note_names), tag_query, max_n)
+    file_ids = list(file_ids)
+    total = len(file_ids)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    metadata_chunks = logic.iter_file_metadata(file_ids, chunk_size, include_notes=True)
+    pool = ProcessPoolExecutor(processes, initializer=_initWorker, initargs=(extractors,)) if processes else None
+    pending: deque[tuple[int, Future | list[ExtractedRow]]] = deque()
+    done = 0
+
+    def collect() -> list[TagAction]:
+        nonlocal done
+        chunk_len, result = pending.popleft()
+        rows = result.result() if isinstance(result, Future) else result
+        done += chunk_len
+        if progress:
+            progress(done, total)
+        return [TagAction(file_id, identifier, new_tags) for (file_id, identifier, new_tags) in rows]
+
+    try:
+        for metadata_chunk in metadata_chunks:
+            rows = [(m['file_id'], m.get('notes', {})) for m in metadata_chunk]
+            if pool:
+                pending.append((len(rows), pool.submit(_runInWorker, rows)))
+            else:
+                pending.append((len(rows), run_extractors(extractors, rows)))
+
+            while pending and (len(pending) > processes or not isinstance(pending[0][1], Future) or pending[0][1].done()):
+                yield collect()
+                if should_stop and should_stop():
+                    return
+
+        while pending:
+            yield collect()
+            if should_stop and should_stop():
+                return
+    finally:
+        metadata_chunks.close()
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
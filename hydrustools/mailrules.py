@@ -0,0 +1,272 @@
+import configparser
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+from .inisettings import IniSettings
+from .logic import file_tags
+
+RULES_FILE = Path("MailRules.ini")
+
+SOURCE_TAG = "tag"
+NOTE_PREFIX = "note:"
+
+# Patterns without any of these are plain tags and are matched by set lookup
+REGEX_CHARS = re.compile(r'[\\^$.|?*+()\[\]{}]')
+# Leading inline flags that can be scoped to the rule, e.g. (?i)foo -> (?i:foo)
+# (not x: a trailing comment would swallow the closing parenthesis)
+LEADING_FLAGS = re.compile(r'^\(\?([ims]+)\)')
+# Distinct tags whose matching rules are remembered before the memo is reset
+TAG_MEMO_MAX = 1_000_000
+
+
+@dataclass
+class Rule():
+    """If any tag (or a note) matches pattern, add and remove tags.
+
+    source is "tag" or "note:<note name>". Tag patterns must match a whole tag;
+    note patterns may match anywhere in the note.
+    """
+    name: str
+    pattern: str
+    source: str = SOURCE_TAG
+    add_tags: list[str] = field(default_factory=list)
+    remove_tags: list[str] = field(default_factory=list)
+    enabled: bool = True
+
+
+class MailRuleSettings(IniSettings):
+    """Storage for one rule, as a section of MailRules.ini named after the rule.
+
+    add and remove are comma separated. Values are stored without
+    interpolation, since % is common in patterns and tags.
+    """
+    _interpolation = None
+
+    enabled: bool = True
+    source: str = SOURCE_TAG
+    pattern: str = ""
+    add: str = ""
+    remove: str = ""
+
+    def __init__(self, name: str, ini_file: Path = RULES_FILE) -> None:
+        super().__init__(ini_file, section=name)
+
+    def toRule(self) -> Rule:
+        return Rule(
+            name=self._section,
+            pattern=self.pattern,
+            source=self.source,
+            add_tags=split_tags(self.add),
+            remove_tags=split_tags(self.remove),
+            enabled=self.enabled,
+        )
+
+
+def split_tags(value: str) -> list[str]:
+    """
+    >>> split_tags(" meta:inbox, creator:foo ,")
+    ['meta:inbox', 'creator:foo']
+    """
+    return [tag.strip() for tag in value.split(',') if tag.strip()]
+
+
+def load_rules(ini_file: Path = RULES_FILE) -> list[Rule]:
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(ini_file)
+    return [MailRuleSettings(name, ini_file).toRule() for name in config.sections()]
+
+
+def save_rule(rule: Rule, ini_file: Path = RULES_FILE) -> None:
+    """
+    >>> import tempfile
+    >>> ini_file = Path(tempfile.mkdtemp()) / "MailRules.ini"
+    >>> save_rule(Rule("full", "title:100%.*", add_tags=["meta:100%"]), ini_file)
+    >>> load_rules(ini_file)
+    [Rule(name='full', pattern='title:100%.*', source='tag', add_tags=['meta:100%'], remove_tags=[], enabled=True)]
+    """
+    settings = MailRuleSettings(rule.name, ini_file)
+    settings.enabled = rule.enabled
+    settings.source = rule.source
+    settings.pattern = rule.pattern
+    settings.add = ', '.join(rule.add_tags)
+    settings.remove = ', '.join(rule.remove_tags)
+
+
+def delete_rule(name: str, ini_file: Path = RULES_FILE) -> None:
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(ini_file)
+    if config.remove_section(name):
+        with open(ini_file, "w") as f:
+            config.write(f)
+
+
+@dataclass
+class _SourceMatcher():
+    # Plain tag -> rules, for patterns that are just a tag
+    literals: dict[str, list[int]] = field(default_factory=lambda: defaultdict(list))
+    # One combined pattern with a named group per regex rule
+    combined: re.Pattern | None = None
+    group_rules: dict[str, int] = field(default_factory=dict)
+    # Rules that can't be combined (own groups, backreferences, global flags)
+    standalone: list[tuple[re.Pattern, int]] = field(default_factory=list)
+
+
+def combinable(pattern: str) -> str | None:
+    r"""pattern rewritten to be safe inside the combined regex, or None if it can't be.
+
+    Capturing groups can't be combined: named groups may clash between rules
+    and numbered groups and backreferences would be renumbered. Leading
+    (?ims) flags are scoped to the rule; other inline flags are global.
+
+    >>> combinable("(?i)inbox"), combinable("(a)\\1"), combinable("(?:a|b)c")
+    ('(?i:inbox)', None, '(?:a|b)c')
+    """
+    flags = LEADING_FLAGS.match(pattern)
+    if flags:
+        pattern = f'(?{flags[1]}:{pattern[flags.end():]})'
+    try:
+        if re.compile(pattern).groups:
+            return None
+        re.compile(f'(?:{pattern})')
+    except re.error:
+        return None
+    return pattern
+
+
+class RuleSet():
+    r"""Every enabled rule, compiled so a file is checked against all of them at once.
+
+    Per source, rules whose pattern is a plain tag become one dict lookup, and
+    the rest are joined into a single regex of optional lookaheads, one named
+    group per rule, so one match() call reports every rule that fires. Rules
+    that can't be combined (see combinable) are matched one at a time. Tag
+    results are memoized per distinct tag, so over a library the regex only
+    runs once for each tag, however many files have it.
+
+    >>> rules = [Rule("a", "creator:.*", add_tags=["meta:has creator"]), Rule("b", "inbox", remove_tags=["inbox"])]
+    >>> ruleset = RuleSet(rules)
+    >>> sorted(r.name for r in ruleset.matching({"inbox", "creator:foo"}, {}))
+    ['a', 'b']
+    >>> ruleset.actions({"inbox", "creator:foo"}, {})
+    (('meta:has creator',), ('inbox',))
+    >>> ruleset = RuleSet([Rule("i", "(?i)INBOX"), Rule("n", "(?P<x>a)b"), Rule("m", "(?P<x>a)c"), Rule("r", "(a)\\1")])
+    >>> [r.name for r in ruleset.matching({"inbox", "ac", "aa"}, {})]
+    ['i', 'm', 'r']
+    """
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        self.rules: list[Rule] = [rule for rule in rules if rule.enabled and rule.pattern]
+        self.sources: dict[str, _SourceMatcher] = defaultdict(_SourceMatcher)
+        self.tag_memo: dict[str, frozenset[int]] = {}
+
+        regex_parts: dict[str, list[str]] = defaultdict(list)
+        for i, rule in enumerate(self.rules):
+            source = self.sources[rule.source]
+            if rule.source == SOURCE_TAG and not REGEX_CHARS.search(rule.pattern):
+                source.literals[rule.pattern].append(i)
+                continue
+
+            try:
+                compiled = re.compile(rule.pattern, 0 if rule.source == SOURCE_TAG else re.M)
+            except re.error as e:
+                raise ValueError(f"Rule {rule.name!r} has an invalid pattern: {e}") from e
+
+            pattern = combinable(rule.pattern)
+            if pattern is None:
+                source.standalone.append((compiled, i))
+                continue
+
+            group = f"r{i}"
+            source.group_rules[group] = i
+            if rule.source == SOURCE_TAG:
+                # Matched against one tag at a time, which it must match whole
+                regex_parts[rule.source].append(rf'(?=(?P<{group}>(?:{pattern}))\Z)?')
+            else:
+                regex_parts[rule.source].append(rf'(?=[\s\S]*?(?P<{group}>(?:{pattern})))?')
+
+        for source_name, parts in regex_parts.items():
+            try:
+                self.sources[source_name].combined = re.compile(''.join(parts), re.M)
+            except re.error as e:
+                names = ', '.join(repr(self.rules[i].name) for i in self.sources[source_name].group_rules.values())
+                raise ValueError(f"Rules {names} can't be matched together: {e}") from e
+
+    @staticmethod
+    def _fired(source: _SourceMatcher, text: str, whole: bool = False) -> list[int]:
+        fired: list[int] = []
+        if source.combined:
+            match = source.combined.match(text)
+            if match:
+                fired.extend(
+                    source.group_rules[group]
+                    for group, value in match.groupdict().items()
+                    if value is not None
+                )
+        for compiled, i in source.standalone:
+            if (compiled.fullmatch(text) if whole else compiled.search(text)):
+                fired.append(i)
+        return fired
+
+    def _tagRules(self, tag: str) -> frozenset[int]:
+        rules = self.tag_memo.get(tag)
+        if rules is None:
+            source = self.sources[SOURCE_TAG]
+            rules = frozenset([*source.literals.get(tag, ()), *self._fired(source, tag, whole=True)])
+            if len(self.tag_memo) >= TAG_MEMO_MAX:
+                self.tag_memo.clear()
+            self.tag_memo[tag] = rules
+        return rules
+
+    @property
+    def note_names(self) -> list[str]:
+        return [source[len(NOTE_PREFIX):] for source in self.sources if source.startswith(NOTE_PREFIX)]
+
+    def matching(self, tags: set[str], notes: dict[str, str]) -> list[Rule]:
+        """Every rule that fires for a file with these tags and notes."""
+        fired: set[int] = set()
+        for source_name, source in self.sources.items():
+            if source_name == SOURCE_TAG:
+                for tag in tags:
+                    fired |= self._tagRules(tag)
+            else:
+                text = notes.get(source_name[len(NOTE_PREFIX):])
+                if text is not None:
+                    fired.update(self._fired(source, text))
+        return [self.rules[i] for i in sorted(fired)]
+
+    def actions(self, tags: set[str], notes: dict[str, str], current: set[str] | None = None) -> tuple[tuple[str, ...], tuple[str, ...]]:
+        """The (add, remove) tags for a file. Removing wins over adding.
+
+        Only changes are returned: tags already in current are not added again,
+        and tags not in current are not removed.
+        """
+        return rule_actions(self.matching(tags, notes), tags if current is None else current)
+
+
+def rule_actions(fired: Iterable[Rule], current: set[str]) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    add: set[str] = set()
+    remove: set[str] = set()
+    for rule in fired:
+        add.update(rule.add_tags)
+        remove.update(rule.remove_tags)
+    add -= remove
+    add -= current
+    remove &= current
+    return tuple(sorted(add)), tuple(sorted(remove))
+
+
+def plan_actions(ruleset: RuleSet, metadata_chunk: Iterable[dict], local_key: str, counts: Counter | None = None) -> dict[tuple[tuple[str, ...], tuple[str, ...]], list[int]]:
+    """Group the files of a chunk by identical (add, remove) actions."""
+    groups: dict[tuple[tuple[str, ...], tuple[str, ...]], list[int]] = defaultdict(list)
+    for metadata in metadata_chunk:
+        fired = ruleset.matching(file_tags(metadata), metadata.get('notes', {}))
+        if counts is not None:
+            counts.update(rule.name for rule in fired)
+        # Writes go to the local service, so compare against what it stores
+        add, remove = rule_actions(fired, file_tags(metadata, local_key, "storage_tags"))
+        if add or remove:
+            groups[(add, remove)].append(metadata['file_id'])
+    return dict(groups)
+
@@ -13,18 +13,54 @@ class HTSettings(IniSettings):
 
     gui_last: int = -1
 
+    # Limits for sending file results to Hydrus (see logic.deliver_file_ids)
+    delivery_chunk_size: int = 10000
+    delivery_max_popups: int = 10
+
     flatten_presearch: str = "<Changeme>"
     flatten_search: str = ""
 
     tagsearch_presearch: str = "<Changeme>"
     tagsearch_search: str = ""
     tagsearch_localonly: bool = True
+    tagsearch_live: bool = True
 
     note_prequery: str = ""
     note_notename: str = "filename"
     note_pattern: str = ""
     note_partial: bool = False
 
+    nsstats_query: str = "*"
+
+    subsets_query: str = "system:everything"
+    subsets_min_count: int = 5
+    subsets_min_confidence: float = 0.95
+
+    namesiblings_query: str = "*"
+    namesiblings_max_distance: int = 1
+
+    importdl_query: str = ""
+    importdl_dryrun: bool = False
+
+    treeviz_root: str = ""
+    treeviz_up: bool = False
+
+    mailrules_query: str = "system:everything"
+    mailrules_dryrun: bool = True
+
+    notetags_notename: str = "filename"
+    notetags_query: str = ""
+    notetags_processes: int = 0
+
+    reorder_namespaces: str = "character, creator"
+    reorder_min_tokens: int = 2
+
+    charseries_query: str = "character:*"
+    charseries_min_count: int = 5
+    charseries_min_confidence: float = 0.9
+
+    tageditor_query: str = "system:inbox"
+
     def boundTkVar(self, master, name: str, constructor: Type[V] = tk.StringVar) -> V:
         var: V = constructor(master)
 
@@ -0,0 +1,292 @@
+import bisect
+import heapq
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, Iterable
+
+import numpy as np
+
+from . import logic, tagnames
+from .checkpoint import Checkpoint
+
+logger = logging.getLogger(__name__)
+
+# Diffs larger than this rebuild the sorted key list instead of patching it
+MAX_INCREMENTAL_CHANGES = 1000
+# Autocomplete ranges up to this size are ranked directly instead of memoized
+PREFIX_DIRECT_RANGE = 256
+PREFIX_MEMO_SIZE = 4096
+# Sorts after any character a key can continue a prefix with
+PREFIX_END = chr(sys.maxunicode)
+
+
+def creator_name(tag: str) -> str:
+    """The bare artist name of a creator tag.
+
+    >>> creator_name("creator:some artist (artist)")
+    'some artist'
+    """
+    return tag.replace('creator:', '').replace(' (artist)', '')
+
+
+class PrefixIndex():
+    """Top-k autocomplete over a fixed tag list, weighted by count.
+
+    Tags are kept in one sorted array of search keys: the whole tag and, for
+    namespaced tags, the subtag alone, both casefolded. A prefix is a bisect
+    range of that array. Small ranges are ranked directly; the top k of large
+    ranges (short prefixes) is found with numpy and remembered, so every
+    keystroke costs a few microseconds after the first.
+
+    >>> index = PrefixIndex({"character:samus aran": 50, "series:metroid": 90, "samurai": 7})
+    >>> index.suggest("sam")
+    [('character:samus aran', 50), ('samurai', 7)]
+    >>> index.suggest("ser")
+    [('series:metroid', 90)]
+    >>> PrefixIndex({"abc\U0001F600": 5}).suggest("abc")
+    [('abc\U0001F600', 5)]
+    """
+    def __init__(self, counts: dict[str, int], memo_size: int = PREFIX_MEMO_SIZE) -> None:
+        entries: list[tuple[str, str]] = []
+        for tag in counts:
+            entries.append((tag.casefold(), tag))
+            namespace, subtag = tagnames.split_namespace(tag)
+            if namespace:
+                entries.append((subtag.casefold(), tag))
+        entries.sort()
+
+        self.keys: list[str] = [key for key, _ in entries]
+        self.tags: list[str] = [tag for _, tag in entries]
+        self.counts = np.fromiter((counts[tag] for tag in self.tags), dtype=np.int64, count=len(self.tags))
+
+        self.memo: OrderedDict[tuple[str, int], list[tuple[str, int]]] = OrderedDict()
+        self.memo_size = memo_size
+
+    def suggest(self, prefix: str, k: int = 10) -> list[tuple[str, int]]:
+        prefix = prefix.casefold()
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + PREFIX_END, lo)
+
+        if hi - lo <= PREFIX_DIRECT_RANGE:
+            order = sorted(range(lo, hi), key=lambda i: -self.counts[i])
+            return self._unique(order, k)
+
+        memo_key = (prefix, k)
+        cached = self.memo.get(memo_key)
+        if cached is not None:
+            self.memo.move_to_end(memo_key)
+            return cached
+
+        # A tag can be in the range twice (by tag and by subtag), so take 2k
+        window = self.counts[lo:hi]
+        take = min(2 * k, hi - lo)
+        top = np.argpartition(-window, take - 1)[:take]
+        top = top[np.argsort(-window[top], kind="stable")]
+        result = self._unique((lo + int(i) for i in top), k)
+
+        self.memo[memo_key] = result
+        if len(self.memo) > self.memo_size:
+            self.memo.popitem(last=False)
+        return result
+
+    def _unique(self, indices: Iterable[int], k: int) -> list[tuple[str, int]]:
+        result: list[tuple[str, int]] = []
+        seen: set[str] = set()
+        for i in indices:
+            tag = self.tags[i]
+            if tag not in seen:
+                seen.add(tag)
+                result.append((tag, int(self.counts[i])))
+                if len(result) == k:
+                    break
+        return result
+
+
+class TagIndex():
+    """A local, persistent copy of the tags matching one search, with lookups.
+
+    Holds every tag and its count, keyed by a normalized name (see
+    tagnames.normalize_name) for case- and punctuation-insensitive prefix,
+    fuzzy and alias lookups. refresh() re-downloads the tag list only when the
+    saved copy is older than max_age, and patches the lookup structures with
+    the difference instead of rebuilding them.
+
+    >>> index = TagIndex("doctest", "creator:*", name=creator_name, persist=False)
+    >>> _ = index.update({"creator:Foo_Bar": 5, "creator:foo bar (artist)": 2, "creator:baz": 9})
+    >>> index.prefix("FOO")
+    [('creator:Foo_Bar', 5), ('creator:foo bar (artist)', 2)]
+    >>> index.fuzzy("bax")
+    [('creator:baz', 9)]
+    >>> index.aliases("creator:Foo_Bar")
+    ['creator:foo bar (artist)']
+    """
+    def __init__(
+        self,
+        cache_name: str,
+        query: str,
+        display_type: str = "display",
+        name: Callable[[str], str] = lambda tag: tagnames.split_namespace(tag)[1],
+        persist: bool = True,
+    ) -> None:
+        self.query = query
+        self.display_type = display_type
+        self.name = name
+
+        self.counts: dict[str, int] = {}
+        self.updated: float = 0
+
+        # Sorted (normalized name, tag) pairs for prefix search
+        self.keys: list[tuple[str, str]] = []
+        self.by_key: dict[str, set[str]] = defaultdict(set)
+        # Built on the first fuzzy lookup: deletion variant -> normalized names
+        self.variants: dict[str, set[str]] | None = None
+        self.variants_distance: int = 1
+        # Built on the first autocomplete lookup, dropped when the tags change
+        self.prefix_index: PrefixIndex | None = None
+
+        self.lock = threading.RLock()
+        self.cache = Checkpoint(cache_name) if persist else None
+        if self.cache:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def key(self, tag: str) -> str:
+        return tagnames.normalize_name(self.name(tag))
+
+    def load(self) -> None:
+        state = self.cache.load() if self.cache else None
+        if state and state.get("query") == self.query:
+            self.updated = state["time"]
+            self.update(state["tags"], save=False)
+
+    def save(self) -> None:
+        if self.cache:
+            self.cache.save({"query": self.query, "time": self.updated, "tags": self.counts})
+
+    def refresh(self, max_age: float = 0) -> bool:
+        """Re-download the tag list if the local copy is older than max_age seconds."""
+        if self.counts and time.time() - self.updated < max_age:
+            return False
+
+        tags = logic.search_tags(self.query, display_type=self.display_type)
+        added, removed = self.update({ti.value: ti.count for ti in tags})
+        logger.info(f"Refreshed {self.query!r} index: {len(self)} tags, {added} new, {removed} gone")
+        return True
+
+    def update(self, counts: dict[str, int], save: bool = True) -> tuple[int, int]:
+        """Replace the tag counts, patching the lookup structures. Returns (added, removed)."""
+        with self.lock:
+            added = [tag for tag in counts if tag not in self.counts]
+            removed = [tag for tag in self.counts if tag not in counts]
+
+            if len(added) + len(removed) > MAX_INCREMENTAL_CHANGES:
+                self.counts = dict(counts)
+                self.by_key.clear()
+                for tag in self.counts:
+                    self.by_key[self.key(tag)].add(tag)
+                self.keys = sorted((key, tag) for key, tags in self.by_key.items() for tag in tags)
+                self.variants = None
+            else:
+                for tag in removed:
+                    key = self.key(tag)
+                    self.by_key[key].discard(tag)
+                    if not self.by_key[key]:
+                        del self.by_key[key]
+                    i = bisect.bisect_left(self.keys, (key, tag))
+                    if i < len(self.keys) and self.keys[i] == (key, tag):
+                        del self.keys[i]
+                    del self.counts[tag]
+                self.counts.update(counts)
+                for tag in added:
+                    key = self.key(tag)
+                    self.by_key[key].add(tag)
+                    bisect.insort(self.keys, (key, tag))
+                    if self.variants is not None:
+                        for variant in tagnames.deletion_variants(key, self.variants_distance):
+                            self.variants.setdefault(variant, set()).add(key)
+
+            self.prefix_index = None
+            self.updated = time.time()
+            if save:
+                self.save()
+            return len(added), len(removed)
+
+    def _ranked(self, tags: Iterable[str], limit: int) -> list[tuple[str, int]]:
+        return heapq.nlargest(limit, ((tag, self.counts[tag]) for tag in tags), key=lambda tc: (tc[1], tc[0]))
+
+    def prefix(self, text: str, limit: int = 50) -> list[tuple[str, int]]:
+        """Tags whose normalized name starts with text, most used first.
+
+        >>> index = TagIndex("doctest", "creator:*", name=creator_name, persist=False)
+        >>> _ = index.update({"creator:abc\U00020000": 3, "creator:abcd": 2})
+        >>> index.prefix("abc")
+        [('creator:abc\U00020000', 3), ('creator:abcd', 2)]
+        """
+        key = tagnames.normalize_name(text)
+        with self.lock:
+            start = bisect.bisect_left(self.keys, (key, ""))
+            end = bisect.bisect_left(self.keys, (key + PREFIX_END, ""))
+            return self._ranked((tag for _, tag in self.keys[start:end]), limit)
+
+    def fuzzy(self, text: str, max_distance: int = 1, limit: int = 50) -> list[tuple[str, int]]:
+        """Tags whose normalized name is within max_distance edits of text, most used first."""
+        key = tagnames.normalize_name(text)
+        with self.lock:
+            if self.variants is None or self.variants_distance != max_distance:
+                self.variants = defaultdict(set)
+                self.variants_distance = max_distance
+                for indexed_key in self.by_key:
+                    for variant in tagnames.deletion_variants(indexed_key, max_distance):
+                        self.variants[variant].add(indexed_key)
+
+            candidates: set[str] = set()
+            for variant in tagnames.deletion_variants(key, max_distance):
+                candidates |= self.variants.get(variant, set())
+
+            return self._ranked((
+                tag
+                for candidate in candidates
+                if tagnames.edit_distance(key, candidate, max_distance) <= max_distance
+                for tag in self.by_key.get(candidate, ())
+            ), limit)
+
+    def suggest(self, prefix: str, k: int = 10) -> list[tuple[str, int]]:
+        """Autocomplete: the k most used tags (or subtags) starting with prefix."""
+        prefix_index = self.prefix_index
+        if prefix_index is None:
+            with self.lock:
+                prefix_index = self.prefix_index = PrefixIndex(self.counts)
+        return prefix_index.suggest(prefix, k)
+
+    def aliases(self, tag: str) -> list[str]:
+        """Other tags with the same normalized name."""
+        with self.lock:
+            return sorted(self.by_key.get(self.key(tag), set()) - {tag})
+
+
+_indexes: dict[str, TagIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def shared_index(cache_name: str, query: str, **kwargs) -> TagIndex:
+    """The process-wide index of one search, loaded from disk on first use."""
+    with _indexes_lock:
+        index = _indexes.get(cache_name)
+        if index is None or index.query != query:
+            index = _indexes[cache_name] = TagIndex(cache_name, query, **kwargs)
+        return index
+
+
+def all_tags_index() -> TagIndex:
+    """The shared index of every tag, used for autocomplete."""
+    return shared_index("all_tags_index", "*")
+
+
+def creator_index() -> TagIndex:
+    """The shared index of creator: tags."""
+    return shared_index("creator_index", "creator:*", name=creator_name)
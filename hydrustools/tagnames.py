@@ -0,0 +1,201 @@
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Iterable
+
+SUFFIX_PATTERN = re.compile(r'^(?P<body>.*?)(?P<suffix> \([^()]*\))?$')
+
+
+def split_namespace(tag: str) -> tuple[str, str]:
+    """Split a tag into (namespace, subtag). Unnamespaced tags have namespace "".
+
+    >>> split_namespace("character:samus aran")
+    ('character', 'samus aran')
+    >>> split_namespace("smile")
+    ('', 'smile')
+    """
+    namespace, sep, subtag = tag.partition(':')
+    if not sep:
+        return "", tag
+    return namespace, subtag
+
+
+def split_suffix(subtag: str) -> tuple[str, str]:
+    """Split a trailing disambiguation suffix like " (series)" off a subtag.
+
+    >>> split_suffix("samus aran (metroid)")
+    ('samus aran', ' (metroid)')
+    >>> split_suffix("samus aran")
+    ('samus aran', '')
+    """
+    match = SUFFIX_PATTERN.match(subtag)
+    assert match
+    return match['body'], match['suffix'] or ''
+
+
+def name_tokens(body: str) -> list[str]:
+    """Split a name into tokens, ignoring case, width variants and underscores.
+
+    >>> name_tokens("Ｓａｍｕｓ_ARAN")
+    ['samus', 'aran']
+    """
+    return unicodedata.normalize("NFKC", body).casefold().replace('_', ' ').split()
+
+
+def token_key(tag: str) -> tuple[str, str, tuple[str, ...]]:
+    """A key that is equal for tags whose name tokens are reorderings of each other.
+
+    The key is the namespace, the normalized suffix and the sorted name tokens
+    (a multiset, so repeated tokens count), so "first last (series)" and
+    "Last_First (series)" collide.
+
+    >>> token_key("character:aran samus (metroid)") == token_key("character:Samus_Aran (Metroid)")
+    True
+    >>> token_key("character:a a b") == token_key("character:a b b")
+    False
+    """
+    namespace, subtag = split_namespace(tag)
+    body, suffix = split_suffix(subtag)
+    return namespace, ' '.join(name_tokens(suffix)), tuple(sorted(name_tokens(body)))
+
+
+def reorder_groups(tags: Iterable[str], min_tokens: int = 2) -> list[list[str]]:
+    """Group tags whose names are permutations of each other, in one pass.
+
+    Only names with at least `min_tokens` tokens are considered. Each returned
+    group is sorted and has at least two distinct tags, and may be any size.
+
+    >>> reorder_groups(["character:a b", "character:b a", "character:c", "character:a b c", "character:c a b"])
+    [['character:a b', 'character:b a'], ['character:a b c', 'character:c a b']]
+    """
+    buckets: dict[tuple, set[str]] = defaultdict(set)
+    for tag in tags:
+        key = token_key(tag)
+        if len(key[2]) >= min_tokens:
+            buckets[key].add(tag)
+
+    return [
+        sorted(group)
+        for group in buckets.values()
+        if len(group) > 1
+    ]
+
+
+NORMALIZE_PUNCTUATION = re.compile(r'[\W_]+')
+DIGITS = re.compile(r'\d+')
+
+
+def normalize_name(subtag: str) -> str:
+    """Fold case, diacritics, underscores and punctuation out of a tag name.
+
+    >>> normalize_name("Pokémon_Trainer!")
+    'pokemon trainer'
+    >>> normalize_name("  Samus  Aran ")
+    'samus aran'
+    """
+    decomposed = unicodedata.normalize("NFKD", subtag)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return NORMALIZE_PUNCTUATION.sub(' ', stripped.casefold()).strip()
+
+
+def deletion_variants(s: str, max_distance: int = 1) -> set[str]:
+    """Every string reachable from s by deleting up to max_distance characters.
+
+    Two strings within edit distance d always share a variant at distance d,
+    so indexing these finds near matches without comparing every pair.
+
+    >>> sorted(deletion_variants("abc"))
+    ['ab', 'abc', 'ac', 'bc']
+    """
+    variants = {s}
+    frontier = {s}
+    for _ in range(max_distance):
+        frontier = {
+            word[:i] + word[i + 1:]
+            for word in frontier
+            for i in range(len(word))
+        }
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Levenshtein distance, giving up with max_distance + 1 once it is exceeded.
+
+    >>> edit_distance("kitten", "sitting", 3)
+    3
+    >>> edit_distance("kitten", "sitting", 1)
+    2
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(previous[-1], max_distance + 1)
+
+
+def near_duplicate_groups(tags: Iterable[str], max_distance: int = 1, min_length: int = 5) -> list[list[str]]:
+    """Group tags whose normalized names are equal or within max_distance edits.
+
+    Only tags in the same namespace are grouped. Names shorter than min_length
+    only match exactly, and names that differ in their numbers never match
+    ("volume 1" and "volume 2" are not siblings). Each returned group is sorted
+    and has at least two distinct tags.
+
+    >>> near_duplicate_groups(["series:Pokémon", "series:pokemon", "series:pokemons", "character:pokemon", "page:10", "page:11"])
+    [['series:Pokémon', 'series:pokemon', 'series:pokemons']]
+    """
+    # Exact matches after normalization share a key
+    by_key: dict[tuple[str, str], set[str]] = defaultdict(set)
+    for tag in tags:
+        namespace, subtag = split_namespace(tag)
+        by_key[(namespace, normalize_name(subtag))].add(tag)
+
+    keys = [*by_key]
+    parent = list(range(len(keys)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Near matches: keys sharing a deletion variant are checked exactly
+    if max_distance > 0:
+        index: dict[tuple[str, str], list[int]] = defaultdict(list)
+        for i, (namespace, name) in enumerate(keys):
+            if len(name) >= min_length:
+                for variant in deletion_variants(name, max_distance):
+                    index[(namespace, variant)].append(i)
+
+        for bucket in index.values():
+            for n, i in enumerate(bucket):
+                for j in bucket[n + 1:]:
+                    if find(i) == find(j):
+                        continue
+                    a, b = keys[i][1], keys[j][1]
+                    if DIGITS.findall(a) != DIGITS.findall(b):
+                        continue
+                    if edit_distance(a, b, max_distance) <= max_distance:
+                        parent[find(i)] = find(j)
+
+    groups: dict[int, set[str]] = defaultdict(set)
+    for i, key in enumerate(keys):
+        groups[find(i)] |= by_key[key]
+
+    return sorted(
+        sorted(group)
+        for group in groups.values()
+        if len(group) > 1
+    )
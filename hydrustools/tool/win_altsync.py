@@ -11,6 +11,7 @@ import numpy as np
 from .. import logic
 from ..component.gui_util import Increment, flatList, tkwrapc
 from ..component.tageditorlist import TagEditorList
+from ..component.taskscheduler import CancelToken
 from ..component.toolwindow import ToolWindow
 
 
@@ -96,7 +97,7 @@ Clicking merge will add the specified tags to all images in the set.
             btn_merge.grid(column=1, row=0, sticky="ew")
 
 
-    def loadIdsWithAlternates(self, event=None):
+    def loadIdsWithAlternates(self, token: CancelToken):
         all_file_hashes = logic.client.search_files(
             tags=["system:num file relationships > 0 alternates"],
             return_hashes=True
@@ -104,14 +105,20 @@ Clicking merge will add the specified tags to all images in the set.
 
         # pprint.pprint(all_file_hashes)
 
-        self.listbox_ids.delete(0, self.listbox_ids.size())
+        self.callUI(self.listbox_ids.delete, 0, tk.END)
 
         self.setStatus("Filtering to non-matching alternate groups...")
-        for hash in all_file_hashes:
+        batch: list[str] = []
+        for i, hash in enumerate(all_file_hashes):
             if hash not in self.file_ids and not self.allAlternateTagsMatch(hash):
                 self.file_ids.append(hash)
-                self.listbox_ids.insert(tk.END, hash)
-            if self.abort_threads: return
+                batch.append(hash)
+            if i % 25 == 24:
+                self.queueRows(self.listbox_ids, batch)
+                batch = []
+                self.setStatus(f"Checked {i + 1} / {len(all_file_hashes)}, {len(self.file_ids)} differ...")
+            token.raiseIfCancelled()
+        self.queueRows(self.listbox_ids, batch)
 
         # self.updateFileListbox()
 
@@ -0,0 +1,138 @@
+import tkinter as tk
+from tkinter import ttk
+
+from .. import logic
+from ..component.gui_util import Increment, tkwrap, tkwrapc
+from ..component.multicolumnlistbox import MultiColumnListbox
+from ..component.taskscheduler import CancelToken
+from ..component.toolwindow import ToolWindow
+from ..tagindex import TagIndex, creator_index
+
+HEAD_CREATOR = "Creator"
+HEAD_COUNT = "Count"
+HEAD_MATCH = "Match"
+
+LOOKUP_DEBOUNCE_MS = 150
+LOOKUP_LIMIT = 100
+
+
+class ArtistLookupWindow(ToolWindow):
+    helpstr = """Look up creator tags.
+
+Type part of an artist name. Results are matched ignoring case, spacing, underscores, punctuation and accents: first names that start with the text, then names one typo away.
+
+Selecting a creator shows its spellings in the index and its siblings in Hydrus.
+
+The creator list is kept on disk and shared with the creator extraction macro. "Refresh index" downloads it again.
+    """
+    def __init__(self, *args_, **kwargs) -> None:
+        super().__init__(*args_, **kwargs)
+
+        self.table_headings = [HEAD_CREATOR, HEAD_COUNT, HEAD_MATCH]
+
+        self.textvar_name = tk.StringVar(self)
+        self.textvar_aliases = tk.StringVar(self)
+        self.index: TagIndex = creator_index()
+        self._lookup_after_id: str | None = None
+
+        self.initwindow()
+        # Only goes to Hydrus when there is no usable copy on disk
+        self.startTask(self.doRefresh, lock=False, key="refresh")
+        self.mainloop()
+
+    def initwindow(self) -> None:
+        self.title("Artist Lookup")
+        self.geometry("520x560")
+
+        self.columnconfigure(0, weight=1)
+
+        counter_main_row = Increment()
+
+        with tkwrapc(ttk.Frame(self, relief=tk.GROOVE, padding=8)) as (frame_top, cx, _):
+            frame_top.grid(column=0, row=counter_main_row.inc(), sticky="ew")
+            frame_top.columnconfigure(0, weight=1)
+
+            entry_name = ttk.Entry(frame_top, font=('Courier', 10), textvariable=self.textvar_name)
+            entry_name.grid(column=cx.inc(), row=0, sticky="ew")
+            entry_name.bind("<KeyRelease>", self.onNameKey)
+            entry_name.focus()
+
+            btn_refresh = ttk.Button(frame_top, text="Refresh index", command=self.startTaskCurry(self.doForceRefresh, key="refresh"))
+            btn_refresh.grid(column=cx.inc(), row=0, sticky="ew")
+
+        counter_main_row.inc()
+        self.tree_creators = MultiColumnListbox(self, headers=self.table_headings)
+        self.tree_creators.tree.bind("<<TreeviewSelect>>", self.showAliases)
+
+        with tkwrap(self.tree_creators) as tree:
+            tree.grid(column=0, row=counter_main_row.value, sticky="nsew")
+            self.rowconfigure(counter_main_row.value, weight=1)
+
+        with tkwrap(ttk.Label(self, textvariable=self.textvar_aliases, padding=4, wraplength=500)) as label_aliases:
+            label_aliases.grid(column=0, row=counter_main_row.inc(), sticky="ew")
+
+        with tkwrap(ttk.Frame(self, relief=tk.GROOVE, padding=2)) as frame_bottom:
+            frame_bottom.grid(row=counter_main_row.inc(), column=0, sticky="ew")
+            ttk.Label(frame_bottom, textvariable=self.textvar_status).grid(column=0, row=0, sticky="nsew")
+            frame_bottom.columnconfigure(0, weight=1)
+
+    def doRefresh(self, token: CancelToken, max_age: float = 24 * 60 * 60):
+        self.setStatus("Checking creator index...")
+        refreshed = self.index.refresh(max_age=max_age)
+        self.setStatus(f"{'Downloaded' if refreshed else 'Loaded'} {len(self.index)} creators")
+        self.callUI(self.startLookup)
+
+    def doForceRefresh(self, token: CancelToken):
+        self.doRefresh(token, max_age=0)
+
+    def onNameKey(self, event=None):
+        if self._lookup_after_id:
+            self.after_cancel(self._lookup_after_id)
+        self._lookup_after_id = self.after(LOOKUP_DEBOUNCE_MS, self.startLookup)
+
+    def startLookup(self):
+        self._lookup_after_id = None
+        self.startTask(self.doLookup, lock=False, key="lookup")
+
+    def doLookup(self, token: CancelToken):
+        text: str = self.textvar_name.get()
+        if not text.strip():
+            self.callUI(self.tree_creators.delete_all)
+            return
+
+        seen: set[str] = set()
+        rows = []
+        for match, results in [
+            ("prefix", self.index.prefix(text, limit=LOOKUP_LIMIT)),
+            ("fuzzy", self.index.fuzzy(text, limit=LOOKUP_LIMIT)),
+        ]:
+            for tag, count in results:
+                if tag not in seen:
+                    seen.add(tag)
+                    rows.append({"id": tag, "values": [tag, count, match]})
+        token.raiseIfCancelled()
+
+        def show():
+            self.tree_creators.sync_tree(rows)  # type: ignore
+            self.setStatus(f"{len(rows)} creators match {text!r}")
+
+        self.callUI(show)
+
+    def showAliases(self, event=None):
+        selection = self.tree_creators.getSelectionIDs()
+        if not selection:
+            return
+        tag = selection[0]
+
+        def lookup(token: CancelToken):
+            spellings = self.index.aliases(tag)
+            info = logic.fetch_sibling_infos([tag], cached=True).get(tag)
+            siblings = sorted(info.siblings - {tag}) if info else []
+            token.raiseIfCancelled()
+
+            lines = [f"Ideal: {info.ideal_tag}"] if info and info.ideal_tag != tag else []
+            lines.append(f"Spellings: {', '.join(spellings) or 'none'}")
+            lines.append(f"Siblings: {', '.join(siblings) or 'none'}")
+            self.callUI(self.textvar_aliases.set, '\n'.join(lines))
+
+        self.startTask(lookup, lock=False, key="aliases")
@@ -0,0 +1,195 @@
+import time
+import tkinter as tk
+from collections import Counter
+from tkinter import ttk
+from typing import Iterable
+
+from .. import logic
+from ..component.gui_util import Increment, TextCopyWindow, tkwrap, tkwrapc
+from ..component.multicolumnlistbox import MultiColumnListbox
+from ..component.taskscheduler import CancelToken
+from ..component.toolwindow import ToolWindow
+from ..settings import HTSettings
+
+Settings = HTSettings()
+
+HEAD_CHARACTER = "Character"
+HEAD_SERIES = "Series"
+HEAD_TOGETHER = "Together"
+HEAD_CHARACTER_COUNT = "Character count"
+HEAD_CONFIDENCE = "Confidence"
+
+# Series tracked per character. Only the most frequent few can pass any
+# sensible confidence threshold, so the rest are not worth memory.
+TOP_K = 8
+
+
+class CooccurrenceCounter():
+    """Counts how often each character appears with each series, in bounded memory.
+
+    Every character keeps at most top_k series counters (the Space-Saving
+    algorithm): a new series evicts the smallest counter and inherits its count
+    as possible error. A series that really co-occurs on more than 1/top_k of a
+    character's files is never evicted, and its lower bound (count - error) is
+    exact enough to test against a confidence threshold.
+
+    >>> counter = CooccurrenceCounter(top_k=2)
+    >>> for tags in [["character:a", "series:x"]] * 3 + [["character:a", "series:y"], ["character:a", "series:z"]]:
+    ...     counter.add(tags)
+    >>> list(counter.pairs())
+    [('character:a', 'series:x', 3, 5), ('character:a', 'series:z', 1, 5)]
+    """
+    def __init__(self, top_k: int = TOP_K, child_namespace: str = "character:", parent_namespace: str = "series:") -> None:
+        self.top_k = top_k
+        self.child_namespace = child_namespace
+        self.parent_namespace = parent_namespace
+        self.child_counts: Counter[str] = Counter()
+        # child -> {parent: [count, error]}
+        self.counters: dict[str, dict[str, list[int]]] = {}
+
+    def add(self, tags: Iterable[str]) -> None:
+        children: list[str] = []
+        parents: list[str] = []
+        for tag in tags:
+            if tag.startswith(self.child_namespace):
+                children.append(tag)
+            elif tag.startswith(self.parent_namespace):
+                parents.append(tag)
+
+        for child in children:
+            self.child_counts[child] += 1
+            slots = self.counters.setdefault(child, {})
+            for parent in parents:
+                slot = slots.get(parent)
+                if slot is not None:
+                    slot[0] += 1
+                elif len(slots) < self.top_k:
+                    slots[parent] = [1, 0]
+                else:
+                    evicted = min(slots, key=lambda p: slots[p][0])
+                    floor = slots.pop(evicted)[0]
+                    slots[parent] = [floor + 1, floor]
+
+    def pairs(self) -> Iterable[tuple[str, str, int, int]]:
+        """(child, parent, guaranteed co-occurrences, child count) for every tracked pair."""
+        for child, slots in self.counters.items():
+            for parent, (count, error) in slots.items():
+                yield child, parent, count - error, self.child_counts[child]
+
+
+class CharacterSeriesWindow(ToolWindow):
+    helpstr = """Propose series parents for characters from how often they appear together.
+
+Reads the tags of every file matching the file query once and counts, for each character, the series it is tagged with. A series is proposed as the character's parent when at least "min confidence" of the character's files also have it.
+
+Min count ignores rare characters. Existing parents are skipped. "Copy selected parents" gives a clipboard you can import in Hydrus' tag parents dialog.
+    """
+    def __init__(self, *args_, **kwargs) -> None:
+        super().__init__(*args_, **kwargs)
+
+        self.table_headings = [HEAD_CHARACTER, HEAD_SERIES, HEAD_TOGETHER, HEAD_CHARACTER_COUNT, HEAD_CONFIDENCE]
+
+        self.textvar_query: tk.StringVar = Settings.boundTkVar(self, 'charseries_query')
+        self.intvar_min_count: tk.IntVar = Settings.boundTkVar(self, 'charseries_min_count', tk.IntVar)
+        self.doublevar_confidence: tk.DoubleVar = Settings.boundTkVar(self, 'charseries_min_confidence', tk.DoubleVar)
+
+        self.initwindow()
+        self.mainloop()
+
+    def initwindow(self) -> None:
+        self.title("Parent Characters to Series")
+        self.geometry("900x570")
+
+        self.columnconfigure(0, weight=1)
+
+        counter_main_row = Increment()
+
+        with tkwrapc(ttk.Frame(self, relief=tk.GROOVE, padding=8)) as (frame_top, cx, _):
+            frame_top.grid(column=0, row=counter_main_row.inc(), sticky="ew")
+            frame_top.columnconfigure(0, weight=1)
+
+            tk.Label(frame_top, text="File query:").grid(column=cx.inc(), row=0, sticky="w")
+            ttk.Entry(frame_top, font=('Courier', 10), textvariable=self.textvar_query)\
+                .grid(column=cx.value, row=1, sticky="ew")
+
+            tk.Label(frame_top, text="Min count:").grid(column=cx.inc(), row=0, sticky="w")
+            ttk.Spinbox(frame_top, from_=1, to=1_000_000, width=8, textvariable=self.intvar_min_count)\
+                .grid(column=cx.value, row=1, sticky="ew")
+
+            tk.Label(frame_top, text="Min confidence:").grid(column=cx.inc(), row=0, sticky="w")
+            ttk.Spinbox(frame_top, from_=0.5, to=1.0, increment=0.01, width=6, textvariable=self.doublevar_confidence)\
+                .grid(column=cx.value, row=1, sticky="ew")
+
+            btn_count = ttk.Button(frame_top, text="Count", command=self.startTaskCurry(self.doCount, key="count"))
+            btn_count.grid(column=cx.inc(), row=1, sticky="ew")
+
+        counter_main_row.inc()
+        self.tree_pairs = MultiColumnListbox(self, headers=self.table_headings)
+
+        with tkwrap(self.tree_pairs) as tree:
+            tree.grid(column=0, row=counter_main_row.value, sticky="nsew")
+            self.rowconfigure(counter_main_row.value, weight=1)
+
+        with tkwrap(ttk.Frame(self, relief=tk.GROOVE, padding=2)) as frame_bottom:
+            frame_bottom.grid(row=counter_main_row.inc(), column=0, sticky="ew")
+
+            ttk.Label(frame_bottom, textvariable=self.textvar_status).grid(column=0, row=0, sticky="nsew")
+            frame_bottom.columnconfigure(0, weight=1)
+
+            btn_copy = ttk.Button(frame_bottom, text="Copy selected parents", command=self.copySelected, width=40)
+            btn_copy.grid(column=1, row=0, sticky="nse")
+
+    def doCount(self, token: CancelToken):
+        query: str = self.textvar_query.get() or "character:*"
+        min_count: int = self.intvar_min_count.get()
+        min_confidence: float = self.doublevar_confidence.get()
+
+        self.callUI(self.tree_pairs.delete_all)
+
+        file_ids: list[int] = logic.client.search_files(tags=[query])['file_ids']  # type: ignore
+        self.setStatus(f"Counting tags of {len(file_ids)} files...")
+
+        start_time = time.perf_counter()
+        counter = CooccurrenceCounter()
+        files_done = 0
+        for metadata_chunk in logic.iter_file_metadata(file_ids):
+            for metadata in metadata_chunk:
+                counter.add(logic.file_tags(metadata))
+            files_done += len(metadata_chunk)
+            token.raiseIfCancelled()
+            self.setStatus(f"Counted {files_done} / {len(file_ids)} files, {len(counter.child_counts)} characters...")
+
+        candidates = [
+            (child, parent, together, child_count)
+            for child, parent, together, child_count in counter.pairs()
+            if child_count >= min_count and together >= child_count * min_confidence
+        ]
+
+        # Drop relationships Hydrus already knows about
+        sibling_info = logic.get_sibling_infos({child for child, *_ in candidates}, cached=True)
+        proposals = [
+            (child, parent, together, child_count)
+            for child, parent, together, child_count in candidates
+            if not ((si := sibling_info.get(child)) and parent in si.ancestors)
+        ]
+        token.raiseIfCancelled()
+
+        self.queueRows(self.tree_pairs, [
+            {"values": [child, parent, together, child_count, f"{together / child_count:.3f}"]}
+            for child, parent, together, child_count in sorted(proposals, key=lambda p: (p[1], p[0]))
+        ], token)
+        self.callUI(self.tree_pairs.resize_cols)
+
+        elapsed = time.perf_counter() - start_time
+        self.setStatus(f"Proposed {len(proposals)} parents from {files_done} files in {elapsed:.1f}s")
+
+    def copySelected(self, event=None):
+        selection = self.tree_pairs.getSelectionDicts()
+        if not selection:
+            return
+
+        clip_import = '\n'.join(
+            f"{d[HEAD_CHARACTER]}\n{d[HEAD_SERIES]}"
+            for d in selection
+        )
+        TextCopyWindow(clip_import)
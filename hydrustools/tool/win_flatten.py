@@ -3,8 +3,9 @@ import tkinter as tk
 from tkinter import messagebox, ttk
 
 from .. import logic
-from ..component.gui_util import Increment, tkwrap, tkwrapc
+from ..component.gui_util import Increment, saveRowsAs, tkwrap, tkwrapc
 from ..component.multicolumnlistbox import MultiColumnListbox
+from ..component.taskscheduler import CancelToken
 from ..component.toolwindow import ToolWindow
 from ..logic import SiblingInfo, TagInfo
 from ..settings import HTSettings
@@ -20,6 +21,8 @@ In effect, this finds all images with the source tag directly specified and repl
 Select the specific relationships to flatten and click the flatten button to commit changes.
 
 Presearch searches Hydrus for tags (* will only work if specified in the tag repo settings). Refinement filters that list to only tags matching the given expression. Presearch is fastest!
+
+"Export..." saves the selected relationships (or all of them) to a CSV, JSON Lines or Parquet file.
     """
     def __init__(self, *args_, **kwargs) -> None:
         super().__init__(*args_, **kwargs)
@@ -31,7 +34,7 @@ Presearch searches Hydrus for tags (* will only work if specified in the tag rep
 
         self.initwindow()
 
-        self.startTask(self.doSearch)
+        self.startTask(self.doSearch, key="search")
         self.mainloop()
 
     def initwindow(self) -> None:
@@ -86,28 +89,37 @@ Presearch searches Hydrus for tags (* will only work if specified in the tag rep
 
             frame_bottom.columnconfigure(0, weight=1)
 
+            btn_export = ttk.Button(frame_bottom, text="Export...", command=self.exportRows)
+            btn_export.grid(column=1, row=0, sticky="nse")
+
             btn_flatten = ttk.Button(frame_bottom, text="Flatten!", command=self.startFlatten, width=40)
-            btn_flatten.grid(column=1, row=0, sticky="nse")
+            btn_flatten.grid(column=2, row=0, sticky="nse")
 
     def startSearch(self, event=None):
-        self.startTask(self.doSearch)
+        self.startTask(self.doSearch, key="search")
+
+    def exportRows(self, event=None):
+        selection_only = bool(self.tree_tags.getSelectionIDs())
+        count = saveRowsAs(self, self.tree_tags.iter_dicts(selection_only), self.table_headings, title="Export siblings")
+        if count is not None:
+            self.setStatus(f"Exported {count} relationships")
 
     def startFlatten(self, event=None):
         with self.lock():
             self.after(100, self.doFlatten)
 
-    def doSearch(self, event=None):
+    def doSearch(self, token: CancelToken):
         search_query: str = self.textvar_presearch.get() or "*"
         search_refinement: str = self.textvar_search.get()
         self.setStatus(f"Searching {search_query!r} for {search_refinement!r}")
 
-        self.tree_tags.delete_all()
+        self.callUI(self.tree_tags.delete_all)
         # self.tree_tags.delete(*self.tree_tags.get_children())
 
         try:
             results: list[TagInfo] = logic.search_tags_re(search_query, search_refinement)
         except re.error as e:  # noqa: F821
-            messagebox.showerror(title="Invalid regex", message=f"Error parsing {search_refinement!r}\n{e}")
+            self.callUI(lambda e=e: messagebox.showerror(title="Invalid regex", message=f"Error parsing {search_refinement!r}\n{e}"))
             return
 
         tag_count = {
@@ -115,14 +127,16 @@ Presearch searches Hydrus for tags (* will only work if specified in the tag rep
             for tag in results
         }
 
+        token.raiseIfCancelled()
         targets: list[SiblingInfo] = logic.get_sibling_ideal_targets([ti.value for ti in results])
 
-        for si in sorted(targets, key=lambda si: si.tag):
-            row = [si.tag, si.ideal_tag, tag_count.get(si.tag)]
-            # self.tree_tags.insert('', tk.END, values=row)
-            self.tree_tags.insert_item({"values": row})
+        token.raiseIfCancelled()
+        self.queueRows(self.tree_tags, [
+            {"values": [si.tag, si.ideal_tag, tag_count.get(si.tag)]}
+            for si in sorted(targets, key=lambda si: si.tag)
+        ], token)
 
-        self.winfo_toplevel().after(10, self.tree_tags.resize_cols)
+        self.callUI(self.tree_tags.resize_cols)
 
         self.setStatus(f"Found {len(targets)} siblings")
 
@@ -153,4 +167,4 @@ Presearch searches Hydrus for tags (* will only work if specified in the tag rep
                     logic.replace_tag(source_tag, [ideal_tag])
             # self.enable()
 
-            self.startTask(self.doSearch)
\ No newline at end of file
+            self.startTask(self.doSearch, key="search")
\ No newline at end of file
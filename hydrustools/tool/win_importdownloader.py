@@ -0,0 +1,213 @@
+import threading
+import time
+import tkinter as tk
+from collections import defaultdict
+from tkinter import ttk
+from typing import Iterable
+
+import hydrus_api
+
+from .. import logic
+from ..checkpoint import Checkpoint
+from ..component.gui_util import Increment, tkwrap, tkwrapc
+from ..component.taskscheduler import CancelToken
+from ..component.toolwindow import ToolWindow
+from ..settings import HTSettings
+
+Settings = HTSettings()
+
+CHUNK_SIZE = 500
+
+CURRENT = str(hydrus_api.TagStatus.CURRENT.value)
+DELETED = str(hydrus_api.TagStatus.DELETED.value)
+
+
+def _storage_tags(metadata: dict, service_key: str, status: str) -> set[str]:
+    return set(metadata.get('tags', {}).get(service_key, {}).get('storage_tags', {}).get(status, []))
+
+
+def tag_deltas(metadata_chunk: Iterable[dict], source_key: str, dest_key: str) -> dict[tuple[str, ...], list[int]]:
+    """Group files by the tags the source service has that the destination lacks.
+
+    Tags that were deleted from the destination are not copied again.
+
+    >>> meta = lambda i, src, dst: {"file_id": i, "tags": {"dl": {"storage_tags": {CURRENT: src}}, "my": {"storage_tags": {CURRENT: dst}}}}
+    >>> tag_deltas([meta(1, ["a", "b"], ["a"]), meta(2, ["b"], []), meta(3, ["a"], ["a"])], "dl", "my")
+    {('b',): [1, 2]}
+    """
+    groups: dict[tuple[str, ...], list[int]] = defaultdict(list)
+    for metadata in metadata_chunk:
+        delta = (
+            _storage_tags(metadata, source_key, CURRENT)
+            - _storage_tags(metadata, dest_key, CURRENT)
+            - _storage_tags(metadata, dest_key, DELETED)
+        )
+        if delta:
+            groups[tuple(sorted(delta))].append(metadata['file_id'])
+    return dict(groups)
+
+
+class ImportDownloaderWindow(ToolWindow):
+    helpstr = """Import downloader tags into the local tag repository.
+
+Copies every tag a file has in "downloader tags" but not in "my tags". Tags you deleted from "my tags" are not copied back.
+
+Files are processed in file id order and progress is saved after every chunk, so the import can be stopped and resumed later. "Reset" forgets the saved progress.
+
+The optional file query narrows which files are considered. Dry run counts what would be copied without writing anything; it always starts from the beginning and leaves the saved progress alone.
+    """
+    def __init__(self, *args_, **kwargs) -> None:
+        super().__init__(*args_, **kwargs)
+
+        self.textvar_query: tk.StringVar = Settings.boundTkVar(self, 'importdl_query')
+        self.boolvar_dryrun: tk.BooleanVar = Settings.boundTkVar(self, 'importdl_dryrun', tk.BooleanVar)
+
+        self.checkpoint = Checkpoint("import_downloader_tags")
+        # Reset and every new import bump the generation; a running import only
+        # saves progress while its generation is current, so a stale run can't
+        # restore cleared state or move the cursor backwards
+        self.checkpoint_lock = threading.Lock()
+        self.checkpoint_generation = 0
+        self.current_task = None
+
+        self.initwindow()
+        self.showCheckpoint()
+        self.mainloop()
+
+    def initwindow(self) -> None:
+        self.title("Import Downloader Tags")
+        self.geometry("450x220")
+
+        self.columnconfigure(index=0, weight=1)
+        main_row = Increment()
+
+        with tkwrapc(ttk.Frame(self, relief=tk.GROOVE, padding=8)) as (frame_form, cx, cy):
+            frame_form.grid(column=0, row=main_row.inc(), sticky="nsew")
+            frame_form.columnconfigure(index=1, weight=1)
+
+            tk.Label(frame_form, text="File query").grid(column=0, row=cy.inc(), sticky="e")
+            entry_query = ttk.Entry(frame_form, textvariable=self.textvar_query)
+            entry_query.grid(column=1, row=cy.value, sticky="ew")
+
+            tk.Label(frame_form, text="Dry run").grid(column=0, row=cy.inc(), sticky="e")
+            check_dryrun = ttk.Checkbutton(frame_form, variable=self.boolvar_dryrun)
+            check_dryrun.grid(column=1, row=cy.value, sticky="w")
+
+        with tkwrapc(ttk.Frame(self, relief=tk.GROOVE, padding=8)) as (frame_row, cx, _):
+            frame_row.grid(column=0, row=main_row.inc(), sticky="ew")
+
+            for label, command in [
+                ("Start", self.startImport),
+                ("Stop", self.stopImport),
+                ("Reset", self.resetImport),
+            ]:
+                frame_row.columnconfigure(index=cx.inc(), weight=1)
+                btn = ttk.Button(frame_row, text=label, command=command)
+                btn.grid(column=cx.value, row=0, sticky="ew")
+
+        with tkwrap(ttk.Frame(self, padding=0)) as frame_status:
+            frame_status.grid(column=0, row=main_row.inc(), sticky="ew")
+            frame_status.columnconfigure(index=0, weight=1)
+
+            self.pb = ttk.Progressbar(frame_status, orient='horizontal', mode='determinate')
+            self.pb.grid(column=0, row=0, sticky="ew")
+
+            tk.Label(frame_status, textvariable=self.textvar_status, justify=tk.LEFT).grid(column=0, row=1, sticky="w")
+
+    def showCheckpoint(self) -> None:
+        state = self.checkpoint.load()
+        if state:
+            self.setStatus(f"Saved progress: {state['files_done']} files done, {state['tags_added']} tags added, up to file id {state['cursor']}")
+
+    def startImport(self, event=None):
+        # Not locked, so Stop stays usable while the import runs
+        self.current_task = self.startTask(self.doImport, lock=False, key="import")
+
+    def stopImport(self, event=None):
+        if self.current_task:
+            self.tasks.cancel(self.current_task.task_id)
+
+    def resetImport(self, event=None):
+        self.stopImport()
+        with self.checkpoint_lock:
+            self.checkpoint_generation += 1
+            self.checkpoint.clear()
+        self.callUI(self.pb.configure, {'value': 0})
+        self.setStatus("Saved progress cleared")
+
+    def doImport(self, token: CancelToken):
+        source_key = logic.downloader_tags_service_key
+        dest_key = logic.local_tags_service_key
+        dry_run: bool = self.boolvar_dryrun.get()
+
+        tag_query: list[str] = ["system:has tags"]
+        if self.textvar_query.get():
+            tag_query.append(self.textvar_query.get())
+
+        with self.checkpoint_lock:
+            self.checkpoint_generation += 1
+            generation = self.checkpoint_generation
+            # A dry run writes nothing, so it neither resumes nor records progress
+            state = None if dry_run else self.checkpoint.load()
+        if state is None or state.get("query") != tag_query:
+            state = {"query": tag_query, "cursor": -1, "files_done": 0, "tags_added": 0}
+
+        self.setStatus(f"Searching downloader tags for {tag_query!r}...")
+        # Only files with tags in the downloader service can have anything to copy
+        resp = logic.client.search_files(tags=tag_query, tag_service_key=source_key)  # type: ignore
+        file_ids: list[int] = sorted(
+            file_id
+            for file_id in resp['file_ids']  # type: ignore
+            if file_id > state["cursor"]
+        )
+        total = state["files_done"] + len(file_ids)
+        self.setStatus(f"{len(file_ids)} files left after file id {state['cursor']}")
+
+        start_time = time.perf_counter()
+        files_this_run = 0
+        tags_this_run = 0
+
+        for id_chunk, metadata_chunk in zip(
+            logic.chunk(file_ids, CHUNK_SIZE),
+            logic.iter_file_metadata(file_ids, chunk_size=CHUNK_SIZE)
+        ):
+            token.raiseIfCancelled()
+
+            groups = tag_deltas(metadata_chunk, source_key, dest_key)
+            if not dry_run:
+                # One write per distinct delta rather than per file
+                for new_tags, group_ids in groups.items():
+                    logic.client.add_tags(
+                        file_ids=group_ids,
+                        service_keys_to_tags={dest_key: list(new_tags)}
+                    )
+
+            # The cursor only moves once the chunk is written
+            tags_added = sum(len(new_tags) * len(group_ids) for new_tags, group_ids in groups.items())
+            state["cursor"] = id_chunk[-1]
+            state["files_done"] += len(id_chunk)
+            state["tags_added"] += tags_added
+            with self.checkpoint_lock:
+                if self.checkpoint_generation != generation:
+                    # Reset or superseded while this chunk was being written
+                    return
+                if not dry_run:
+                    self.checkpoint.save(state)
+
+            files_this_run += len(id_chunk)
+            tags_this_run += tags_added
+            elapsed = time.perf_counter() - start_time
+            rate = files_this_run / elapsed if elapsed else 0
+            eta = (total - state["files_done"]) / rate if rate else 0
+
+            self.callUI(self.pb.configure, {'value': 100 * state["files_done"] / total})
+            self.setStatus(
+                f"{state['files_done']} / {total} files, {state['tags_added']} tags {'to add' if dry_run else 'added'}"
+                f" ({rate:.0f} files/s, {tags_this_run / elapsed if elapsed else 0:.0f} tags/s, ~{eta:.0f}s left)"
+            )
+
+        elapsed = time.perf_counter() - start_time
+        self.setStatus(f"Done: {files_this_run} files, {tags_this_run} tags in {elapsed:.1f}s")
+        with self.checkpoint_lock:
+            if self.checkpoint_generation == generation and not dry_run:
+                self.checkpoint.clear()
@@ -0,0 +1,234 @@
+import time
+import tkinter as tk
+from collections import Counter
+from tkinter import messagebox, ttk
+
+import hydrus_api
+
+from .. import logic, mailrules
+from ..component.gui_util import Increment, tkwrap, tkwrapc
+from ..component.multicolumnlistbox import MultiColumnListbox
+from ..component.taskscheduler import CancelToken
+from ..component.toolwindow import ToolWindow
+from ..mailrules import Rule, RuleSet
+from ..settings import HTSettings
+
+Settings = HTSettings()
+
+HEAD_NAME = "Rule"
+HEAD_ENABLED = "On"
+HEAD_SOURCE = "Source"
+HEAD_PATTERN = "Pattern"
+HEAD_ADD = "Add"
+HEAD_REMOVE = "Remove"
+HEAD_MATCHED = "Matched"
+
+CHUNK_SIZE = 500
+
+
+class MailRulesWindow(ToolWindow):
+    helpstr = """Rules that tag files automatically, like mail filters.
+
+A rule says: if a tag (or a note) matches the pattern, add some tags and remove others. Tag patterns are regular expressions that must match a whole tag; a plain tag is matched exactly. For a note, set the source to "note:<note name>"; the pattern may match anywhere in the note. Separate tags to add or remove with commas.
+
+Rules are saved in MailRules.ini. Run checks every file matching the file query against all enabled rules in one pass. With dry run, nothing is written and the Matched column shows how many files each rule fired on.
+    """
+    def __init__(self, *args_, **kwargs) -> None:
+        super().__init__(*args_, **kwargs)
+
+        self.table_headings = [HEAD_NAME, HEAD_ENABLED, HEAD_SOURCE, HEAD_PATTERN, HEAD_ADD, HEAD_REMOVE, HEAD_MATCHED]
+
+        self.textvar_name = tk.StringVar(self)
+        self.textvar_source = tk.StringVar(self, value=mailrules.SOURCE_TAG)
+        self.textvar_pattern = tk.StringVar(self)
+        self.textvar_add = tk.StringVar(self)
+        self.textvar_remove = tk.StringVar(self)
+        self.boolvar_enabled = tk.BooleanVar(self, value=True)
+
+        self.textvar_query: tk.StringVar = Settings.boundTkVar(self, 'mailrules_query')
+        self.boolvar_dryrun: tk.BooleanVar = Settings.boundTkVar(self, 'mailrules_dryrun', tk.BooleanVar)
+
+        self.rules: list[Rule] = []
+        self.matched: Counter = Counter()
+
+        self.initwindow()
+        self.loadRules()
+        self.mainloop()
+
+    def initwindow(self) -> None:
+        self.title("Mail Rules")
+        self.geometry("900x600")
+
+        self.columnconfigure(0, weight=1)
+
+        counter_main_row = Increment()
+
+        counter_main_row.inc()
+        self.tree_rules = MultiColumnListbox(self, headers=self.table_headings)
+        self.tree_rules.tree.bind("<<TreeviewSelect>>", self.editSelected)
+
+        with tkwrap(self.tree_rules) as tree:
+            tree.grid(column=0, row=counter_main_row.value, sticky="nsew")
+            self.rowconfigure(counter_main_row.value, weight=1)
+
+        with tkwrapc(ttk.Frame(self, relief=tk.GROOVE, padding=8)) as (frame_form, cx, cy):
+            frame_form.grid(column=0, row=counter_main_row.inc(), sticky="ew")
+            frame_form.columnconfigure(index=1, weight=1)
+
+            for label, var in [
+                ("Name", self.textvar_name),
+                ("Source", self.textvar_source),
+                ("Pattern", self.textvar_pattern),
+                ("Add tags", self.textvar_add),
+                ("Remove tags", self.textvar_remove),
+            ]:
+                tk.Label(frame_form, text=label).grid(column=0, row=cy.inc(), sticky="e")
+                entry = ttk.Entry(frame_form, font=('Courier', 10), textvariable=var)
+                entry.grid(column=1, row=cy.value, columnspan=3, sticky="ew")
+
+            check_enabled = ttk.Checkbutton(frame_form, text="Enabled", variable=self.boolvar_enabled)
+            check_enabled.grid(column=1, row=cy.inc(), sticky="w")
+
+            btn_save = ttk.Button(frame_form, text="Save rule", command=self.saveRule)
+            btn_save.grid(column=2, row=cy.value, sticky="ew")
+
+            btn_delete = ttk.Button(frame_form, text="Delete rule", command=self.deleteRule)
+            btn_delete.grid(column=3, row=cy.value, sticky="ew")
+
+        with tkwrapc(ttk.Frame(self, relief=tk.GROOVE, padding=8)) as (frame_run, cx, _):
+            frame_run.grid(column=0, row=counter_main_row.inc(), sticky="ew")
+            frame_run.columnconfigure(index=1, weight=1)
+
+            tk.Label(frame_run, text="File query").grid(column=cx.inc(), row=0, sticky="e")
+            entry_query = ttk.Entry(frame_run, textvariable=self.textvar_query)
+            entry_query.grid(column=cx.inc(), row=0, sticky="ew")
+
+            check_dryrun = ttk.Checkbutton(frame_run, text="Dry run", variable=self.boolvar_dryrun)
+            check_dryrun.grid(column=cx.inc(), row=0, sticky="ew")
+
+            btn_run = ttk.Button(frame_run, text="Run rules", command=self.startTaskCurry(self.doRun, key="run"))
+            btn_run.grid(column=cx.inc(), row=0, sticky="ew")
+
+        with tkwrap(ttk.Frame(self, padding=0)) as frame_status:
+            frame_status.grid(column=0, row=counter_main_row.inc(), sticky="ew")
+            frame_status.columnconfigure(index=0, weight=1)
+
+            self.pb = ttk.Progressbar(frame_status, orient='horizontal', mode='determinate')
+            self.pb.grid(column=0, row=0, sticky="ew")
+
+            ttk.Label(frame_status, textvariable=self.textvar_status).grid(column=0, row=1, sticky="w")
+
+    def loadRules(self) -> None:
+        self.rules = mailrules.load_rules()
+        self.tree_rules.update_tree([  # type: ignore
+            {"id": rule.name, "values": [
+                rule.name,
+                "yes" if rule.enabled else "no",
+                rule.source,
+                rule.pattern,
+                ', '.join(rule.add_tags),
+                ', '.join(rule.remove_tags),
+                self.matched.get(rule.name, ""),
+            ]}
+            for rule in self.rules
+        ])
+
+    def editSelected(self, event=None) -> None:
+        selection = self.tree_rules.getSelectionIDs()
+        rule = next((rule for rule in self.rules if selection and rule.name == selection[0]), None)
+        if not rule:
+            return
+
+        self.textvar_name.set(rule.name)
+        self.textvar_source.set(rule.source)
+        self.textvar_pattern.set(rule.pattern)
+        self.textvar_add.set(', '.join(rule.add_tags))
+        self.textvar_remove.set(', '.join(rule.remove_tags))
+        self.boolvar_enabled.set(rule.enabled)
+
+    def saveRule(self, event=None) -> None:
+        rule = Rule(
+            name=self.textvar_name.get().strip(),
+            pattern=self.textvar_pattern.get(),
+            source=self.textvar_source.get().strip() or mailrules.SOURCE_TAG,
+            add_tags=mailrules.split_tags(self.textvar_add.get()),
+            remove_tags=mailrules.split_tags(self.textvar_remove.get()),
+            enabled=self.boolvar_enabled.get(),
+        )
+        if not rule.name:
+            messagebox.showerror(title="Invalid rule", message="Rules need a name")
+            return
+        try:
+            RuleSet([rule])
+        except ValueError as e:
+            messagebox.showerror(title="Invalid rule", message=str(e))
+            return
+
+        mailrules.save_rule(rule)
+        self.loadRules()
+        self.setStatus(f"Saved rule {rule.name!r}")
+
+    def deleteRule(self, event=None) -> None:
+        name = self.textvar_name.get().strip()
+        if name and messagebox.askyesno(title="Delete rule", message=f"Delete rule {name!r}?"):
+            mailrules.delete_rule(name)
+            self.loadRules()
+            self.setStatus(f"Deleted rule {name!r}")
+
+    def doRun(self, token: CancelToken):
+        dry_run: bool = self.boolvar_dryrun.get()
+        try:
+            ruleset = RuleSet(mailrules.load_rules())
+        except ValueError as e:
+            self.setStatus(str(e))
+            return
+        if not ruleset.rules:
+            self.setStatus("No enabled rules")
+            return
+
+        query: str = self.textvar_query.get() or "system:everything"
+        file_ids: list[int] = logic.client.search_files(tags=[query])['file_ids']  # type: ignore
+        self.setStatus(f"Checking {len(file_ids)} files against {len(ruleset.rules)} rules...")
+
+        start_time = time.perf_counter()
+        self.matched = Counter()
+        files_done = 0
+        files_changed = 0
+        writes = 0
+
+        for metadata_chunk in logic.iter_file_metadata(
+            file_ids,
+            chunk_size=CHUNK_SIZE,
+            include_notes=bool(ruleset.note_names)
+        ):
+            token.raiseIfCancelled()
+
+            groups = mailrules.plan_actions(ruleset, metadata_chunk, logic.local_tags_service_key, counts=self.matched)
+            for (add, remove), group_ids in groups.items():
+                files_changed += len(group_ids)
+                if dry_run:
+                    continue
+
+                # One write for every file that gets exactly the same changes
+                actions: dict = {}
+                if add:
+                    actions[hydrus_api.TagAction.ADD] = list(add)
+                if remove:
+                    actions[hydrus_api.TagAction.DELETE] = list(remove)
+                logic.client.add_tags(
+                    file_ids=group_ids,
+                    service_keys_to_actions_to_tags={logic.local_tags_service_key: actions}
+                )
+                writes += 1
+
+            files_done += len(metadata_chunk)
+            elapsed = time.perf_counter() - start_time
+            self.callUI(self.pb.configure, {'value': 100 * files_done / len(file_ids)})
+            self.setStatus(f"Checked {files_done} / {len(file_ids)} files, {files_changed} {'would change' if dry_run else 'changed'} ({files_done / elapsed:.0f} files/s)")
+
+        self.callUI(self.loadRules)
+        elapsed = time.perf_counter() - start_time
+        self.setStatus(
+            f"{'Dry run: ' if dry_run else ''}{files_changed} of {files_done} files "
+            f"{'would change' if dry_run else f'changed in {writes} writes'} in {elapsed:.1f}s"
+        )
@@ -0,0 +1,102 @@
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+from ..actionstore import TagActionStore
+from ..component.gui_util import Increment, tkwrap, tkwrapc
+from ..component.tagadderwin import TagAdderWindow
+from ..component.toolwindow import ToolWindow
+from ..macro.notepipeline import TemplateExtractor, extract_note_tags, load_template_rules_text, parse_template_rules, save_template_rules_text
+from ..settings import HTSettings
+
+Settings = HTSettings()
+
+
+class NoteTagsWindow(ToolWindow):
+    helpstr = """Extract tags from notes with your own patterns.
+
+Each line of the rules box is "pattern => template". The pattern is a regular expression searched for in the note; the template is the tag to add, with {name} replaced by the named group (?P<name>...), {1}, {2}... by numbered groups and {0} by the whole match. Lines starting with # are ignored.
+
+For example: page[^0-9]?(?P<N>\\d+) => page:{N}
+
+Notes are scanned in parallel on every core. The review window opens right away and fills up while the scan runs.
+    """
+    def __init__(self, *args_, **kwargs) -> None:
+        super().__init__(*args_, **kwargs)
+
+        self.textvar_notename: tk.StringVar = Settings.boundTkVar(self, 'notetags_notename')
+        self.textvar_query: tk.StringVar = Settings.boundTkVar(self, 'notetags_query')
+        self.intvar_processes: tk.IntVar = Settings.boundTkVar(self, 'notetags_processes', tk.IntVar)
+
+        self.initwindow()
+        self.mainloop()
+
+    def initwindow(self) -> None:
+        self.title("Extract Tags from Notes")
+        self.geometry("600x380")
+
+        self.columnconfigure(index=0, weight=1)
+        main_row = Increment()
+
+        with tkwrapc(ttk.Frame(self, relief=tk.GROOVE, padding=8)) as (frame_form, cx, cy):
+            frame_form.grid(column=0, row=main_row.inc(), sticky="nsew")
+            frame_form.columnconfigure(index=1, weight=1)
+
+            tk.Label(frame_form, text="Note title").grid(column=0, row=cy.inc(), sticky="e")
+            entry_notename = ttk.Entry(frame_form, textvariable=self.textvar_notename)
+            entry_notename.grid(column=1, row=cy.value, sticky="ew")
+
+            tk.Label(frame_form, text="File query").grid(column=0, row=cy.inc(), sticky="e")
+            entry_query = ttk.Entry(frame_form, textvariable=self.textvar_query)
+            entry_query.grid(column=1, row=cy.value, sticky="ew")
+
+            tk.Label(frame_form, text="Processes (0 = all cores)").grid(column=0, row=cy.inc(), sticky="e")
+            spin_processes = ttk.Spinbox(frame_form, from_=0, to=256, width=6, textvariable=self.intvar_processes)
+            spin_processes.grid(column=1, row=cy.value, sticky="w")
+
+        with tkwrap(ttk.Frame(self, padding=8)) as frame_rules:
+            frame_rules.grid(column=0, row=main_row.inc(), sticky="nsew")
+            self.rowconfigure(index=main_row.value, weight=1)
+            frame_rules.columnconfigure(index=0, weight=1)
+            frame_rules.rowconfigure(index=1, weight=1)
+
+            tk.Label(frame_rules, text="Rules (pattern => template)").grid(column=0, row=0, sticky="w")
+            self.text_rules = tk.Text(frame_rules, font=('Courier', 10), height=8, undo=True)
+            self.text_rules.grid(column=0, row=1, sticky="nsew")
+            self.text_rules.insert("1.0", load_template_rules_text())
+
+        with tkwrap(ttk.Frame(self, relief=tk.GROOVE, padding=8)) as frame_row:
+            frame_row.grid(column=0, row=main_row.inc(), sticky="ew")
+            frame_row.columnconfigure(index=0, weight=1)
+
+            btn_scan = ttk.Button(frame_row, text="Scan notes", command=self.startScan)
+            btn_scan.grid(column=0, row=0, sticky="ew")
+
+        with tkwrap(ttk.Frame(self, padding=0)) as frame_status:
+            frame_status.grid(column=0, row=main_row.inc(), sticky="ew")
+            tk.Label(frame_status, textvariable=self.textvar_status).grid(column=0, row=0, sticky="w")
+
+    def startScan(self, event=None):
+        # Text always ends in a newline of its own
+        rules_text: str = self.text_rules.get("1.0", "end-1c")
+
+        try:
+            rules = parse_template_rules(rules_text)
+        except ValueError as e:
+            messagebox.showerror(title="Invalid rules", message=str(e))
+            return
+        save_template_rules_text(rules_text)
+        if not rules:
+            self.setStatus("No rules to run")
+            return
+
+        # Compiled once here; each worker process receives them once
+        extractor = TemplateExtractor(rules, note_names=[self.textvar_notename.get() or "filename"])
+        query: str = self.textvar_query.get()
+        feed = extract_note_tags(
+            [extractor],
+            tag_query=[query] if query else (),
+            processes=self.intvar_processes.get() or None,
+        )
+
+        self.setStatus(f"Scanning with {len(rules)} rules")
+        TagAdderWindow(TagActionStore(), feed=feed)
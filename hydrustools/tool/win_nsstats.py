@@ -0,0 +1,189 @@
+import time
+import tkinter as tk
+from array import array
+from collections import defaultdict
+from tkinter import ttk
+from typing import Any, Iterable
+
+import numpy as np
+
+from .. import logic
+from ..checkpoint import Checkpoint
+from ..component.gui_util import Increment, tkwrap, tkwrapc
+from ..component.multicolumnlistbox import MultiColumnListbox
+from ..component.taskscheduler import CancelToken
+from ..component.toolwindow import ToolWindow
+from ..logic import TagInfo
+from ..settings import HTSettings
+from ..tagnames import split_namespace
+
+Settings = HTSettings()
+
+HEAD_NAMESPACE = "Namespace"
+HEAD_TAGS = "Tags"
+HEAD_USES = "Uses"
+HEAD_MAX = "Max"
+HEAD_MEDIAN = "Median"
+HEAD_DTAGS = "New tags"
+HEAD_DUSES = "New uses"
+
+MAX_SNAPSHOTS = 30
+# Histogram bins are powers of two: 1, 2-3, 4-7, ...
+HIST_BINS = 24
+
+
+def namespace_stats(tags: Iterable[TagInfo]) -> dict[str, dict[str, Any]]:
+    """Aggregate tag counts per namespace in one pass over the tag list.
+
+    >>> stats = namespace_stats([TagInfo(1, "a"), TagInfo(4, "page:1"), TagInfo(6, "page:2")])
+    >>> stats["page"]["tags"], stats["page"]["uses"], stats["page"]["hist"][:4]
+    (2, 10, [0, 0, 2, 0])
+    """
+    counts_by_namespace: dict[str, array] = defaultdict(lambda: array('q'))
+    for ti in tags:
+        counts_by_namespace[split_namespace(ti.value)[0]].append(ti.count)
+
+    stats: dict[str, dict[str, Any]] = {}
+    for namespace, counts_array in counts_by_namespace.items():
+        counts = np.frombuffer(counts_array, dtype=np.int64)
+        bins = np.floor(np.log2(np.maximum(counts, 1))).astype(np.int64)
+        hist = np.bincount(np.minimum(bins, HIST_BINS - 1), minlength=HIST_BINS)
+        stats[namespace] = {
+            "tags": int(counts.size),
+            "uses": int(counts.sum()),
+            "max": int(counts.max()),
+            "median": float(np.median(counts)),
+            "hist": hist.tolist(),
+        }
+    return stats
+
+
+class NamespaceStatsWindow(ToolWindow):
+    helpstr = """Tag totals per namespace.
+
+Shows how many tags each namespace has, how often they are used, and a histogram of per-tag counts for the selected namespace.
+
+The last snapshot is shown immediately and refreshed from Hydrus in the background. The "new" columns compare against the previous snapshot.
+    """
+    def __init__(self, *args_, **kwargs) -> None:
+        super().__init__(*args_, **kwargs)
+
+        self.table_headings = [HEAD_NAMESPACE, HEAD_TAGS, HEAD_USES, HEAD_MAX, HEAD_MEDIAN, HEAD_DTAGS, HEAD_DUSES]
+
+        self.textvar_query: tk.StringVar = Settings.boundTkVar(self, 'nsstats_query')
+        self.textvar_hist = tk.StringVar(self)
+
+        self.cache = Checkpoint("namespace_stats")
+        self.snapshots: list[dict[str, Any]] = (self.cache.load() or {}).get("snapshots", [])
+
+        self.initwindow()
+
+        if self.snapshots:
+            self.showSnapshots()
+        self.startTask(self.doRefresh, lock=False, key="refresh")
+        self.mainloop()
+
+    def initwindow(self) -> None:
+        self.title("Namespace Statistics")
+        self.geometry("760x520")
+
+        self.columnconfigure(0, weight=1)
+
+        counter_main_row = Increment()
+
+        with tkwrapc(ttk.Frame(self, relief=tk.GROOVE, padding=8)) as (frame_top, cx, _):
+            frame_top.grid(column=0, row=counter_main_row.inc(), sticky="ew")
+            frame_top.columnconfigure(0, weight=1)
+
+            tk.Label(frame_top, text="Tag query:").grid(column=cx.inc(), row=0, sticky="w")
+
+            entry_query = ttk.Entry(frame_top, font=('Courier', 10), textvariable=self.textvar_query)
+            entry_query.grid(column=cx.value, row=1, sticky="ew")
+            entry_query.bind("<Return>", self.startTaskCurry(self.doRefresh, key="refresh"))
+
+            btn_refresh = ttk.Button(frame_top, text="Refresh", command=self.startTaskCurry(self.doRefresh, key="refresh"))
+            btn_refresh.grid(column=cx.inc(), row=1, sticky="ew")
+
+        counter_main_row.inc()
+        self.tree_stats = MultiColumnListbox(self, headers=self.table_headings)
+        self.tree_stats.tree.bind("<<TreeviewSelect>>", self.showHistogram)
+
+        with tkwrap(self.tree_stats) as tree:
+            tree.grid(column=0, row=counter_main_row.value, sticky="nsew")
+            self.rowconfigure(counter_main_row.value, weight=1)
+
+        with tkwrap(ttk.Label(self, textvariable=self.textvar_hist, font=('Courier', 9), padding=4)) as label_hist:
+            label_hist.grid(column=0, row=counter_main_row.inc(), sticky="ew")
+
+        with tkwrap(ttk.Frame(self, relief=tk.GROOVE, padding=2)) as frame_bottom:
+            frame_bottom.grid(row=counter_main_row.inc(), column=0, sticky="ew")
+            ttk.Label(frame_bottom, textvariable=self.textvar_status).grid(column=0, row=0, sticky="nsew")
+            frame_bottom.columnconfigure(0, weight=1)
+
+    def doRefresh(self, token: CancelToken):
+        query: str = self.textvar_query.get() or "*"
+        self.setStatus(f"Refreshing statistics for {query!r}...")
+
+        start_time = time.perf_counter()
+        results: list[TagInfo] = logic.search_tags_re(query, "")
+        token.raiseIfCancelled()
+
+        snapshot = {
+            "time": time.time(),
+            "query": query,
+            "namespaces": namespace_stats(results),
+        }
+        elapsed = time.perf_counter() - start_time
+
+        self.snapshots = [*self.snapshots, snapshot][-MAX_SNAPSHOTS:]
+        self.cache.save({"snapshots": self.snapshots})
+
+        self.callUI(self.showSnapshots)
+        self.setStatus(f"Counted {len(results)} tags in {len(snapshot['namespaces'])} namespaces in {elapsed:.1f}s")
+
+    def latestPair(self) -> tuple[dict[str, Any], dict[str, Any] | None]:
+        latest = self.snapshots[-1]
+        previous = next(
+            (s for s in reversed(self.snapshots[:-1]) if s["query"] == latest["query"]),
+            None
+        )
+        return latest, previous
+
+    def showSnapshots(self) -> None:
+        latest, previous = self.latestPair()
+        previous_namespaces = previous["namespaces"] if previous else {}
+
+        rows = []
+        for namespace, stats in sorted(latest["namespaces"].items(), key=lambda kv: -kv[1]["uses"]):
+            before = previous_namespaces.get(namespace, {"tags": 0, "uses": 0}) if previous else None
+            rows.append({"id": namespace or "(none)", "values": [
+                namespace or "(none)",
+                stats["tags"],
+                stats["uses"],
+                stats["max"],
+                stats["median"],
+                f"{stats['tags'] - before['tags']:+d}" if before else "",
+                f"{stats['uses'] - before['uses']:+d}" if before else "",
+            ]})
+
+        self.tree_stats.update_tree(rows)  # type: ignore
+        taken = time.strftime("%Y-%m-%d %H:%M", time.localtime(latest["time"]))
+        self.setStatus(f"Snapshot of {latest['query']!r} from {taken}")
+
+    def showHistogram(self, event=None) -> None:
+        selection = self.tree_stats.getSelectionIDs()
+        if not selection or not self.snapshots:
+            return
+
+        namespace = "" if selection[0] == "(none)" else selection[0]
+        stats = self.snapshots[-1]["namespaces"].get(namespace)
+        if not stats:
+            return
+
+        hist: list[int] = stats["hist"]
+        last_bin = max((i for i, n in enumerate(hist) if n), default=0)
+        peak = max(hist) or 1
+        self.textvar_hist.set('\n'.join(
+            f"{2 ** i:>8}+ {n:>8} {'#' * round(40 * n / peak)}"
+            for i, n in enumerate(hist[:last_bin + 1])
+        ))
@@ -1,5 +1,4 @@
 import re
-import threading
 import time
 import tkinter as tk
 from tkinter import ttk
@@ -9,18 +8,13 @@ from typing import Any, Callable
 import hydrus_api
 
 from .. import logic
-from ..component.gui_util import Increment, tkwrap, tkwrapc
+from ..component.gui_util import Increment, saveRowsAs, tkwrap, tkwrapc
+from ..component.taskscheduler import CancelToken
 from ..component.toolwindow import ToolWindow
 from ..settings import HTSettings
 
 Settings = HTSettings()
 
-def has_note(notename: str, max_n: int = 4) -> list[str]:
-    return [
-        *[f'system:has note with name "{notename}"'],
-        *[f'system:has note with name "{notename} ({n})"' for n in range(1, max_n)]
-    ]
-
 class RegexSearchWindow(ToolWindow):
     helpstr = """Search the contents of notes.
 
@@ -29,7 +23,9 @@ This will also try to match "incremented" titles caused by metadata merge, so "f
 
 Search pattern specifies the regular expression used. By default this has to match the start of the string, but the partial option will try to find the pattern anywhere in the note body.
 
-Once the search is complete, results are sent to Hydrus in a notification. Click the button in Hydrus to open the page with search results.
+Once the search is complete, results are sent to Hydrus in a notification. Click the button in Hydrus to open the page with search results. Very large results are split over several notifications, up to the delivery limits in the INI file.
+
+"Export results" saves the matching file IDs and note bodies of the last search as CSV, JSON Lines or Parquet.
     """
     def __init__(self, *args_, **kwargs) -> None:
         super().__init__(*args_, **kwargs)
@@ -40,6 +36,9 @@ Once the search is complete, results are sent to Hydrus in a notification. Click
         self.boolvar_partial = Settings.boundTkVar(self, 'note_partial', tk.BooleanVar)
         # tk.BooleanVar(self, value=False)
 
+        # (file_id, note body) of the last search
+        self.matches: list[tuple[int, str]] = []
+
         self.initwindow()
         self.mainloop()
 
@@ -83,6 +82,9 @@ Once the search is complete, results are sent to Hydrus in a notification. Click
             btn_search = ttk.Button(frame_row, text="Search", command=self.startSearch)
             btn_search.grid(column=0, row=0, sticky="ew")
 
+            btn_export = ttk.Button(frame_row, text="Export results", command=self.exportMatches)
+            btn_export.grid(column=1, row=0, sticky="ew")
+
         with tkwrap(ttk.Frame(self, padding=0)) as frame_status:
             frame_status.grid(column=0, row=main_row.inc(), sticky="ew")
             self.pb = ttk.Progressbar(frame_status, orient='vertical',
@@ -95,9 +97,20 @@ Once the search is complete, results are sent to Hydrus in a notification. Click
             frame_status.columnconfigure(index=0, weight=1)
 
     def startSearch(self, event=None):
-        threading.Thread(target=self.doSearch, daemon=True).start()
-
-    def doSearch(self, event=None):
+        self.startTask(self.doSearch, lock=False, key="search")
+
+    def exportMatches(self, event=None):
+        matches = self.matches
+        count = saveRowsAs(
+            self,
+            ({"file_id": file_id, "note": note_body} for file_id, note_body in matches),
+            ["file_id", "note"],
+            title="Export matches"
+        )
+        if count is not None:
+            self.setStatus(f"Exported {count} matches")
+
+    def doSearch(self, token: CancelToken):
         notename: str = self.textvar_notename.get()
         pattern: str = self.textvar_pattern.get()
 
@@ -109,7 +122,7 @@ Once the search is complete, results are sent to Hydrus in a notification. Click
         with self.lock():
             self.setStatus("Searching")
             # self.pb.start()
-            self.pb['value'] = 0
+            self.callUI(self.pb.configure, {'value': 0})
             # progress = PyTaskbar.Progress()
             # progress.init()
             # progress.setState('loading')
@@ -117,7 +130,7 @@ Once the search is complete, results are sent to Hydrus in a notification. Click
             tag_query: list[str | list[str]] = [] # type: ignore
 
             # TODO: Option to configure " (n)" suffix
-            tag_query.append(has_note(notename))
+            tag_query.append(logic.has_note(notename))
 
             if self.textvar_prequery.get():
                 tag_query.append(self.textvar_prequery.get())
@@ -134,33 +147,34 @@ Once the search is complete, results are sent to Hydrus in a notification. Click
 
             self.setStatus(f"Found {len(file_ids_with_note)} files with notename {notename!r}...")
 
+            matches: list[tuple[int, str]] = []
             matching_ids = []
             checked_file_count = 0
             start_time = time.time()
 
             try:
-                for id_chunk in logic.chunk(file_ids_with_note, 1000):
-                    resp = logic.client.get_file_metadata(file_ids=id_chunk, include_notes=True)
-
-                    for metadata in resp['metadata']:
+                for metadata_chunk in logic.iter_file_metadata(file_ids_with_note, include_notes=True):
+                    for metadata in metadata_chunk:
                         note_body = metadata['notes'].get(notename)
                         if matcher(pattern, note_body):
                             matching_ids.append(metadata['file_id'])
+                            matches.append((metadata['file_id'], note_body))
                         checked_file_count += 1
 
 
-                    self.pb['value'] = 100*checked_file_count/len(file_ids_with_note)
+                    self.callUI(self.pb.configure, {'value': 100*checked_file_count/len(file_ids_with_note)})
                     # progress.setProgress(self.pb['value'])
                     self.setStatus(f"Searched {checked_file_count} / {len(file_ids_with_note)}, matched {len(matching_ids)}...")
 
-                    if self.abort_threads: return
+                    token.raiseIfCancelled()
             except re.error as e:
                 self.setStatus(str(e))
                 return
 
             elapsed = time.time() - start_time
-            logic.client.add_popup("Regex search complete", files_label=f"{notename}: {pattern!r}", file_ids=matching_ids)
+            self.matches = matches
+            delivery = logic.deliver_file_ids("Regex search complete", f"{notename}: {pattern!r}", matching_ids)
 
             # self.pb.stop()
             # progress.setState('done')
-            self.setStatus(f"Matched {len(matching_ids)} / {len(file_ids_with_note)} in {elapsed:.1f} secs, sent to Hydrus.")
+            self.setStatus(f"Matched {len(matching_ids)} / {len(file_ids_with_note)} in {elapsed:.1f} secs. {delivery.summary()}")
@@ -0,0 +1,145 @@
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from .. import logic, tagnames
+from ..component.gui_util import Increment, tkwrap, tkwrapc
+from ..component.multicolumnlistbox import MultiColumnListbox
+from ..component.siblingadderwin import SiblingAdderWindow, sibling_actions_for_groups
+from ..component.taskscheduler import CancelToken
+from ..component.toolwindow import ToolWindow
+from ..settings import HTSettings
+from ..tagindex import TagIndex, shared_index
+
+Settings = HTSettings()
+
+HEAD_GROUP = "Names"
+HEAD_SIZE = "Tags"
+HEAD_USES = "Uses"
+
+# Tag lists older than this are downloaded again
+INDEX_MAX_AGE_SECS = 60 * 60
+
+
+def namespace_index(namespace: str) -> TagIndex:
+    return shared_index(f"namespace_{namespace}", f"{namespace}:*")
+
+
+class ReorderedNamesWindow(ToolWindow):
+    helpstr = """Find tags whose names are the same words in a different order.
+
+"Samus Aran", "aran samus" and "ARAN_SAMUS" are all the same name. Tags in the listed namespaces (comma separated) are grouped by their set of words, ignoring case, underscores and full-width characters. A trailing " (series)" must also match.
+
+Tag lists are kept on disk for an hour; "Refresh" downloads them again. Select groups and press "Review as siblings" to choose the preferred spelling of each.
+    """
+    def __init__(self, *args_, **kwargs) -> None:
+        super().__init__(*args_, **kwargs)
+
+        self.table_headings = [HEAD_GROUP, HEAD_SIZE, HEAD_USES]
+
+        self.textvar_namespaces: tk.StringVar = Settings.boundTkVar(self, 'reorder_namespaces')
+        self.intvar_min_tokens: tk.IntVar = Settings.boundTkVar(self, 'reorder_min_tokens', tk.IntVar)
+
+        self.groups: list[list[str]] = []
+
+        self.initwindow()
+        self.mainloop()
+
+    def initwindow(self) -> None:
+        self.title("Identify Reordered Names")
+        self.geometry("760x520")
+
+        self.columnconfigure(0, weight=1)
+
+        counter_main_row = Increment()
+
+        with tkwrapc(ttk.Frame(self, relief=tk.GROOVE, padding=8)) as (frame_top, cx, _):
+            frame_top.grid(column=0, row=counter_main_row.inc(), sticky="ew")
+            frame_top.columnconfigure(0, weight=1)
+
+            tk.Label(frame_top, text="Namespaces:").grid(column=cx.inc(), row=0, sticky="w")
+            entry_namespaces = ttk.Entry(frame_top, font=('Courier', 10), textvariable=self.textvar_namespaces)
+            entry_namespaces.grid(column=cx.value, row=1, sticky="ew")
+            entry_namespaces.bind("<Return>", self.startTaskCurry(self.doFind, key="find"))
+
+            tk.Label(frame_top, text="Min words:").grid(column=cx.inc(), row=0, sticky="w")
+            ttk.Spinbox(frame_top, from_=2, to=10, width=4, textvariable=self.intvar_min_tokens)\
+                .grid(column=cx.value, row=1, sticky="ew")
+
+            btn_find = ttk.Button(frame_top, text="Find", command=self.startTaskCurry(self.doFind, key="find"))
+            btn_find.grid(column=cx.inc(), row=1, sticky="ew")
+
+            btn_refresh = ttk.Button(frame_top, text="Refresh", command=self.startTaskCurry(self.doRefreshFind, key="find"))
+            btn_refresh.grid(column=cx.inc(), row=1, sticky="ew")
+
+        counter_main_row.inc()
+        self.tree_groups = MultiColumnListbox(self, headers=self.table_headings)
+
+        with tkwrap(self.tree_groups) as tree:
+            tree.grid(column=0, row=counter_main_row.value, sticky="nsew")
+            self.rowconfigure(counter_main_row.value, weight=1)
+
+        with tkwrap(ttk.Frame(self, relief=tk.GROOVE, padding=2)) as frame_bottom:
+            frame_bottom.grid(row=counter_main_row.inc(), column=0, sticky="ew")
+
+            ttk.Label(frame_bottom, textvariable=self.textvar_status).grid(column=0, row=0, sticky="nsew")
+            frame_bottom.columnconfigure(0, weight=1)
+
+            btn_review = ttk.Button(frame_bottom, text="Review as siblings", command=self.reviewSelected, width=40)
+            btn_review.grid(column=1, row=0, sticky="nse")
+
+    def doRefreshFind(self, token: CancelToken):
+        self.doFind(token, max_age=0)
+
+    def doFind(self, token: CancelToken, max_age: float = INDEX_MAX_AGE_SECS):
+        namespaces = [
+            namespace.strip().rstrip(':')
+            for namespace in self.textvar_namespaces.get().split(',')
+            if namespace.strip()
+        ]
+        min_tokens: int = self.intvar_min_tokens.get()
+
+        start_time = time.perf_counter()
+        self.setStatus(f"Loading tags in {', '.join(namespaces)}...")
+
+        # Namespaces are fetched concurrently, and only when the saved copy is stale
+        def loadIndex(namespace_chunk: tuple[str, ...]) -> TagIndex:
+            index = namespace_index(namespace_chunk[0])
+            index.refresh(max_age=max_age)
+            return index
+
+        indexes = list(logic.map_chunks(loadIndex, namespaces, 1))
+        token.raiseIfCancelled()
+
+        counts: dict[str, int] = {}
+        for index in indexes:
+            counts.update(index.counts)
+
+        self.groups = tagnames.reorder_groups(counts, min_tokens=min_tokens)
+        self.groups.sort(key=lambda group: -sum(counts[tag] for tag in group))
+        token.raiseIfCancelled()
+
+        def show():
+            self.tree_groups.update_tree([  # type: ignore
+                {"id": i, "values": [
+                    ' | '.join(group),
+                    len(group),
+                    sum(counts[tag] for tag in group),
+                ]}
+                for i, group in enumerate(self.groups)
+            ])
+
+        self.callUI(show)
+        elapsed = time.perf_counter() - start_time
+        self.setStatus(f"{len(self.groups)} reordered groups in {len(counts)} tags ({elapsed:.1f}s)")
+
+    def reviewSelected(self, event=None):
+        selection = self.tree_groups.getSelectionIDs()
+        groups = [self.groups[int(i)] for i in selection] if selection else self.groups
+        if not groups:
+            return
+
+        sibling_actions = sibling_actions_for_groups(groups)
+        self.setStatus(f"{len(sibling_actions)} of {len(groups)} groups are not already siblings")
+        if sibling_actions:
+            SiblingAdderWindow(sibling_actions)
@@ -0,0 +1,142 @@
+import re
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from .. import logic
+from ..component.gui_util import Increment, TextCopyWindow, tkwrap, tkwrapc
+from ..component.multicolumnlistbox import MultiColumnListbox
+from ..component.taskscheduler import CancelToken
+from ..component.toolwindow import ToolWindow
+
+HEAD_CHARACTER = "Character"
+HEAD_COUNT = "Count"
+HEAD_CHILD = "Child"
+HEAD_PARENT = "Parent"
+
+CHARACTER_PARENS_PATTERN = re.compile(r'^character:(?P<name>.+?) \((?P<series>[^()]+)\)$')
+
+
+def parse_character_parens(tag: str) -> tuple[str, str] | None:
+    """Split "character:name (series)" into (name, series).
+
+    >>> parse_character_parens("character:samus aran (metroid)")
+    ('samus aran', 'metroid')
+    >>> parse_character_parens("character:samus aran") is None
+    True
+    """
+    match = CHARACTER_PARENS_PATTERN.match(tag)
+    if not match:
+        return None
+    return match['name'], match['series']
+
+
+class SeriesParensWindow(ToolWindow):
+    helpstr = """Make series from character parens.
+
+Finds character tags like "character:name (series)" and proposes "series:series" as their parent.
+
+Parents are proposed between ideal tags, so siblings are respected. Characters that already have the series as a parent are skipped.
+
+"Copy selected parents" gives a clipboard you can import in Hydrus' tag parents dialog.
+    """
+    def __init__(self, *args_, **kwargs) -> None:
+        super().__init__(*args_, **kwargs)
+
+        self.table_headings = [HEAD_CHARACTER, HEAD_COUNT, HEAD_CHILD, HEAD_PARENT]
+
+        self.initwindow()
+        self.startTask(self.doScan, key="scan")
+        self.mainloop()
+
+    def initwindow(self) -> None:
+        self.title("Make Series from Character Parens")
+        self.geometry("900x570")
+
+        self.columnconfigure(0, weight=1)
+
+        counter_main_row = Increment()
+
+        with tkwrapc(ttk.Frame(self, relief=tk.GROOVE, padding=8)) as (frame_top, cx, _):
+            frame_top.grid(column=0, row=counter_main_row.inc(), sticky="ew")
+            frame_top.columnconfigure(0, weight=1)
+
+            ttk.Label(frame_top, text="Proposed series parents for character:name (series) tags").grid(column=cx.inc(), row=0, sticky="w")
+
+            btn_scan = ttk.Button(frame_top, text="Rescan", command=self.startTaskCurry(self.doScan, key="scan"))
+            btn_scan.grid(column=cx.inc(), row=0, sticky="ew")
+
+        counter_main_row.inc()
+        self.tree_parents = MultiColumnListbox(self, headers=self.table_headings)
+
+        with tkwrap(self.tree_parents) as tree:
+            tree.grid(column=0, row=counter_main_row.value, sticky="nsew")
+            self.rowconfigure(counter_main_row.value, weight=1)
+
+        with tkwrap(ttk.Frame(self, relief=tk.GROOVE, padding=2)) as frame_bottom:
+            frame_bottom.grid(row=counter_main_row.inc(), column=0, sticky="ew")
+
+            ttk.Label(frame_bottom, textvariable=self.textvar_status).grid(column=0, row=0, sticky="nsew")
+            frame_bottom.columnconfigure(0, weight=1)
+
+            btn_copy = ttk.Button(frame_bottom, text="Copy selected parents", command=self.copySelected, width=40)
+            btn_copy.grid(column=1, row=0, sticky="nse")
+
+    def doScan(self, token: CancelToken):
+        self.callUI(self.tree_parents.delete_all)
+        # Relationships may have been imported since the last scan
+        logic.forget_sibling_infos()
+
+        start_time = time.perf_counter()
+        character_tags = logic.search_tags_re("character:*", CHARACTER_PARENS_PATTERN.pattern)
+        token.raiseIfCancelled()
+
+        # Each chunk is one request: its characters plus any series not seen yet
+        def proposeChunk(chunk: tuple[logic.TagInfo, ...]) -> tuple[list[dict], int]:
+            parsed = [(ti, f"series:{parse_character_parens(ti.value)[1]}") for ti in chunk]  # type: ignore
+            sibling_info = logic.fetch_sibling_infos(
+                {tag for ti, series in parsed for tag in (ti.value, series)},
+                cached=True
+            )
+
+            rows = []
+            existing = 0
+            for ti, series in parsed:
+                character_si = sibling_info.get(ti.value)
+                series_si = sibling_info.get(series)
+                child = character_si.ideal_tag if character_si else ti.value
+                parent = series_si.ideal_tag if series_si else series
+
+                if character_si and parent in character_si.ancestors:
+                    existing += 1
+                    continue
+                rows.append({"values": [ti.value, ti.count, child, parent]})
+            return rows, existing
+
+        proposed = 0
+        existing = 0
+        for rows, chunk_existing in logic.map_chunks(proposeChunk, character_tags, logic.SIBLING_CHUNK_SIZE):
+            token.raiseIfCancelled()
+            self.queueRows(self.tree_parents, rows, token)
+            proposed += len(rows)
+            existing += chunk_existing
+            self.setStatus(f"{proposed} proposed, {existing} already parented of {len(character_tags)} characters")
+
+        self.callUI(self.tree_parents.resize_cols)
+        elapsed = time.perf_counter() - start_time
+        self.setStatus(f"Proposed {proposed} series parents ({existing} already exist) in {elapsed:.1f}s")
+
+    def copySelected(self, event=None):
+        selection = self.tree_parents.getSelectionDicts()
+        if not selection:
+            return
+
+        pairs = dict.fromkeys(
+            (d[HEAD_CHILD], d[HEAD_PARENT])
+            for d in selection
+        )
+        clip_import = '\n'.join(
+            f"{child}\n{parent}"
+            for child, parent in pairs
+        )
+        TextCopyWindow(clip_import)
@@ -0,0 +1,297 @@
+import math
+import time
+import tkinter as tk
+from array import array
+from dataclasses import dataclass
+from tkinter import ttk
+from typing import Iterable
+
+import hydrus_api
+import numpy as np
+
+from .. import logic
+from ..component.gui_util import Increment, TextCopyWindow, tkwrap, tkwrapc
+from ..component.multicolumnlistbox import MultiColumnListbox
+from ..component.taskscheduler import CancelToken
+from ..component.toolwindow import ToolWindow
+from ..settings import HTSettings
+
+Settings = HTSettings()
+
+HEAD_CHILD = "Child"
+HEAD_PARENT = "Parent"
+HEAD_OVERLAP = "Overlap"
+HEAD_CONFIDENCE = "Confidence"
+HEAD_CHILD_COUNT = "Child count"
+HEAD_PARENT_COUNT = "Parent count"
+
+# Files per tag used to shortlist parent candidates before exact checks
+SAMPLE_FILES = 32
+# How often the shortlist may miss a parent that only just meets min confidence
+MAX_MISS_RATE = 0.001
+
+
+class IncidenceMatrix():
+    """A sparse file x tag incidence matrix, built incrementally in CSR form.
+
+    Row f holds the tag indices of file f: indices[indptr[f]:indptr[f + 1]].
+    """
+    def __init__(self) -> None:
+        self.tags: list[str] = []
+        self.tag_index: dict[str, int] = {}
+        self.indptr = array('q', [0])
+        self.indices = array('q')
+
+    @property
+    def n_files(self) -> int:
+        return len(self.indptr) - 1
+
+    def addFile(self, tags: Iterable[str]) -> None:
+        for tag in set(tags):
+            index = self.tag_index.get(tag)
+            if index is None:
+                index = self.tag_index[tag] = len(self.tags)
+                self.tags.append(tag)
+            self.indices.append(index)
+        self.indptr.append(len(self.indices))
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        return (
+            np.frombuffer(self.indptr, dtype=np.int64),
+            np.frombuffer(self.indices, dtype=np.int64),
+        )
+
+
+@dataclass(frozen=True)
+class ParentProposal():
+    child: str
+    parent: str
+    overlap: int
+    child_count: int
+    parent_count: int
+
+    @property
+    def confidence(self) -> float:
+        return self.overlap / self.child_count
+
+
+def sample_threshold(sample_size: int, min_confidence: float, max_miss_rate: float = MAX_MISS_RATE) -> int:
+    """The fewest sample hits a parent needs to be shortlisted.
+
+    A parent on min_confidence of the child's files lands on fewer sampled
+    files than this with probability at most max_miss_rate (binomial tail;
+    sampling without replacement only makes misses rarer). Parents with higher
+    confidence are missed even less often.
+
+    >>> sample_threshold(32, 0.95), sample_threshold(32, 1.0)
+    (26, 32)
+    """
+    tail = 0.0
+    for k in range(sample_size + 1):
+        probability = math.comb(sample_size, k) * min_confidence ** k * (1 - min_confidence) ** (sample_size - k)
+        if tail + probability > max_miss_rate:
+            return k
+        tail += probability
+    return sample_size
+
+
+def subset_pairs(matrix: IncidenceMatrix, min_count: int = 5, min_confidence: float = 0.95) -> list[ParentProposal]:
+    """Find tag pairs where the child's files are (almost) all also tagged with the parent.
+
+    Rather than comparing every pair of tags, each child only considers the
+    tags that appear on enough of a random sample of its own files (see
+    sample_threshold), then checks those candidates exactly with a binary
+    search of the two sorted file lists. Tags with at most SAMPLE_FILES files
+    are checked against all of them, so nothing is missed; for larger tags a
+    true parent is missed at most MAX_MISS_RATE of the time. Tags with
+    identical file sets are siblings, not parents, and are left out.
+
+    >>> m = IncidenceMatrix()
+    >>> for tags in [["a", "b"], ["a", "b"], ["b"], ["c"]]: m.addFile(tags)
+    >>> [(p.child, p.parent, p.overlap) for p in subset_pairs(m, min_count=2)]
+    [('a', 'b', 2)]
+    >>> for tags in [["e", "f"], ["e", "f"]]: m.addFile(tags)
+    >>> [(p.child, p.parent) for p in subset_pairs(m, min_count=2, min_confidence=1.0)]
+    [('a', 'b')]
+    """
+    indptr, indices = matrix.arrays()
+    n_tags = len(matrix.tags)
+    if n_tags == 0:
+        return []
+
+    counts = np.bincount(indices, minlength=n_tags)
+
+    # Transpose to CSC: the sorted files of tag t are files_by_tag[tag_ptr[t]:tag_ptr[t + 1]]
+    file_of_entry = np.repeat(np.arange(matrix.n_files, dtype=np.int64), np.diff(indptr))
+    order = np.argsort(indices, kind="stable")
+    files_by_tag = file_of_entry[order]
+    tag_ptr = np.concatenate([[0], np.cumsum(counts)])
+
+    needed_in_sample = sample_threshold(SAMPLE_FILES, min_confidence)
+    rng = np.random.default_rng(0)
+
+    proposals: list[ParentProposal] = []
+    for child in np.flatnonzero(counts >= min_count):
+        child_count = int(counts[child])
+        child_files = files_by_tag[tag_ptr[child]:tag_ptr[child + 1]]
+
+        # Shortlist: tags present on most of a sample of the child's files
+        if child_count <= SAMPLE_FILES:
+            sample = child_files
+            needed = math.ceil(child_count * min_confidence)
+        else:
+            sample = rng.choice(child_files, SAMPLE_FILES, replace=False)
+            needed = needed_in_sample
+
+        sample_tags = np.concatenate([indices[indptr[f]:indptr[f + 1]] for f in sample])
+        candidate_tags, hits = np.unique(sample_tags, return_counts=True)
+        candidates = candidate_tags[
+            (hits >= needed)
+            & (candidate_tags != child)
+            & (counts[candidate_tags] >= child_count)
+        ]
+
+        for parent in candidates:
+            parent_count = int(counts[parent])
+            # Equal file sets are siblings rather than parents; keep one direction
+            if parent_count == child_count and parent < child:
+                continue
+            parent_files = files_by_tag[tag_ptr[parent]:tag_ptr[parent + 1]]
+            positions = np.searchsorted(parent_files, child_files)
+            positions[positions == parent_count] = 0
+            overlap = int(np.count_nonzero(parent_files[positions] == child_files))
+            if overlap == child_count == parent_count:
+                # Identical file sets: siblings, not a parent relationship
+                continue
+            if overlap >= child_count * min_confidence:
+                proposals.append(ParentProposal(
+                    child=matrix.tags[child],
+                    parent=matrix.tags[parent],
+                    overlap=overlap,
+                    child_count=child_count,
+                    parent_count=parent_count,
+                ))
+
+    return proposals
+
+
+class SubsetParentsWindow(ToolWindow):
+    helpstr = """Detect tag parents from subsets.
+
+Scans the tags of every file matching the file query and proposes "child -> parent" relationships where (nearly) every file with the child tag also has the parent tag.
+
+Min count ignores rare tags. Min confidence is the fraction of the child's files that must also have the parent.
+
+Results are close to exhaustive rather than exhaustive: candidates are picked from a random sample of each tag's files, then checked exactly. A parent that only just meets min confidence is missed about 1 time in 1000; tags with 32 files or fewer are checked completely. Tags with exactly the same files are not proposed, since they look like siblings rather than parents.
+
+Relationships that already exist are skipped. "Copy selected" gives a clipboard you can import in Hydrus' tag parents dialog.
+    """
+    def __init__(self, *args_, **kwargs) -> None:
+        super().__init__(*args_, **kwargs)
+
+        self.table_headings = [HEAD_CHILD, HEAD_PARENT, HEAD_OVERLAP, HEAD_CONFIDENCE, HEAD_CHILD_COUNT, HEAD_PARENT_COUNT]
+
+        self.textvar_query: tk.StringVar = Settings.boundTkVar(self, 'subsets_query')
+        self.intvar_min_count: tk.IntVar = Settings.boundTkVar(self, 'subsets_min_count', tk.IntVar)
+        self.doublevar_confidence: tk.DoubleVar = Settings.boundTkVar(self, 'subsets_min_confidence', tk.DoubleVar)
+
+        self.initwindow()
+        self.mainloop()
+
+    def initwindow(self) -> None:
+        self.title("Detect Tag Parents from Subsets")
+        self.geometry("970x570")
+
+        self.columnconfigure(0, weight=1)
+
+        counter_main_row = Increment()
+
+        with tkwrapc(ttk.Frame(self, relief=tk.GROOVE, padding=8)) as (frame_top, cx, _):
+            frame_top.grid(column=0, row=counter_main_row.inc(), sticky="ew")
+            frame_top.columnconfigure(0, weight=1)
+
+            tk.Label(frame_top, text="File query:").grid(column=cx.inc(), row=0, sticky="w")
+            ttk.Entry(frame_top, font=('Courier', 10), textvariable=self.textvar_query)\
+                .grid(column=cx.value, row=1, sticky="ew")
+
+            tk.Label(frame_top, text="Min count:").grid(column=cx.inc(), row=0, sticky="w")
+            ttk.Spinbox(frame_top, from_=1, to=1_000_000, width=8, textvariable=self.intvar_min_count)\
+                .grid(column=cx.value, row=1, sticky="ew")
+
+            tk.Label(frame_top, text="Min confidence:").grid(column=cx.inc(), row=0, sticky="w")
+            ttk.Spinbox(frame_top, from_=0.5, to=1.0, increment=0.01, width=6, textvariable=self.doublevar_confidence)\
+                .grid(column=cx.value, row=1, sticky="ew")
+
+            btn_search = ttk.Button(frame_top, text="Detect", command=self.startTaskCurry(self.doDetect, key="detect"))
+            btn_search.grid(column=cx.inc(), row=1, sticky="ew")
+
+        counter_main_row.inc()
+        self.tree_pairs = MultiColumnListbox(self, headers=self.table_headings)
+
+        with tkwrap(self.tree_pairs) as tree:
+            tree.grid(column=0, row=counter_main_row.value, sticky="nsew")
+            self.rowconfigure(counter_main_row.value, weight=1)
+
+        with tkwrap(ttk.Frame(self, relief=tk.GROOVE, padding=2)) as frame_bottom:
+            frame_bottom.grid(row=counter_main_row.inc(), column=0, sticky="ew")
+
+            ttk.Label(frame_bottom, textvariable=self.textvar_status).grid(column=0, row=0, sticky="nsew")
+            frame_bottom.columnconfigure(0, weight=1)
+
+            btn_copy = ttk.Button(frame_bottom, text="Copy selected parents", command=self.copySelected, width=40)
+            btn_copy.grid(column=1, row=0, sticky="nse")
+
+    def doDetect(self, token: CancelToken):
+        query: str = self.textvar_query.get() or "system:everything"
+        min_count: int = self.intvar_min_count.get()
+        min_confidence: float = self.doublevar_confidence.get()
+
+        self.callUI(self.tree_pairs.delete_all)
+
+        file_ids: list[int] = logic.client.search_files(tags=[query])['file_ids']  # type: ignore
+        self.setStatus(f"Reading tags of {len(file_ids)} files...")
+
+        start_time = time.perf_counter()
+        matrix = IncidenceMatrix()
+        current = str(hydrus_api.TagStatus.CURRENT.value)
+        for metadata_chunk in logic.iter_file_metadata(file_ids):
+            for metadata in metadata_chunk:
+                service_tags = metadata.get('tags', {}).get(logic.local_tags_service_key, {})
+                matrix.addFile(service_tags.get('storage_tags', {}).get(current, []))
+            token.raiseIfCancelled()
+            self.setStatus(f"Read {matrix.n_files} / {len(file_ids)} files, {len(matrix.tags)} tags...")
+
+        self.setStatus(f"Comparing {len(matrix.tags)} tags...")
+        proposals = subset_pairs(matrix, min_count=min_count, min_confidence=min_confidence)
+        token.raiseIfCancelled()
+
+        # Drop relationships Hydrus already knows about
+        sibling_info = logic.get_sibling_infos({p.child for p in proposals})
+        proposals = [
+            p for p in proposals
+            if not (
+                (si := sibling_info.get(p.child))
+                and (p.parent in si.ancestors or p.parent in si.siblings)
+            )
+        ]
+        token.raiseIfCancelled()
+
+        self.queueRows(self.tree_pairs, [
+            {"values": [p.child, p.parent, p.overlap, f"{p.confidence:.3f}", p.child_count, p.parent_count]}
+            for p in sorted(proposals, key=lambda p: (p.parent, p.child))
+        ], token)
+        self.callUI(self.tree_pairs.resize_cols)
+
+        elapsed = time.perf_counter() - start_time
+        self.setStatus(f"Proposed {len(proposals)} parents from {matrix.n_files} files in {elapsed:.1f}s")
+
+    def copySelected(self, event=None):
+        selection = self.tree_pairs.getSelectionDicts()
+        if not selection:
+            return
+
+        clip_import = '\n'.join(
+            f"{d[HEAD_CHILD]}\n{d[HEAD_PARENT]}"
+            for d in selection
+        )
+        TextCopyWindow(clip_import)
@@ -0,0 +1,167 @@
+import tkinter as tk
+from tkinter import ttk
+
+import hydrus_api
+
+from .. import logic
+from ..component.gui_util import Increment, tkwrap, tkwrapc
+from ..component.tageditorlist import TagEditorList
+from ..component.taskscheduler import CancelToken
+from ..component.toolwindow import ToolWindow
+from ..settings import HTSettings
+from ..tagindex import TagIndex, all_tags_index
+
+Settings = HTSettings()
+
+TAG_INDEX_MAX_AGE_SECS = 24 * 60 * 60
+
+
+class TagEditorWindow(ToolWindow):
+    helpstr = """Edit the local tags of files one at a time, with autocomplete.
+
+Search for files with the file query, then pick a file from the list. Its tags in "my tags" are shown on the right. Delete removes the selected tags; type in the box below to add one.
+
+Suggestions come from a copy of the whole tag list kept on disk, most used first, and match the start of the tag or of the part after the namespace. Tab completes the top suggestion, Down moves into the list, Enter or double-click adds it. The tag list is downloaded again once a day.
+
+"Save tags" writes the additions and removals for the selected file.
+    """
+    def __init__(self, *args_, **kwargs) -> None:
+        super().__init__(*args_, **kwargs)
+
+        self.textvar_query: tk.StringVar = Settings.boundTkVar(self, 'tageditor_query')
+
+        # Set once loaded in the background, so the window opens immediately
+        self.index: TagIndex | None = None
+        self.file_ids: list[int] = []
+        self.file_id: int | None = None
+        self.original_tags: set[str] = set()
+
+        self.initwindow()
+        self.startTask(self.doLoadIndex, lock=False, key="index")
+        self.mainloop()
+
+    def initwindow(self) -> None:
+        self.title("Tag Editor")
+        self.geometry("640x600")
+
+        self.columnconfigure(1, weight=1)
+
+        counter_main_row = Increment()
+
+        with tkwrapc(ttk.Frame(self, relief=tk.GROOVE, padding=8)) as (frame_top, cx, _):
+            frame_top.grid(column=0, row=counter_main_row.inc(), sticky="ew", columnspan=2)
+            frame_top.columnconfigure(1, weight=1)
+
+            tk.Label(frame_top, text="File query:").grid(column=cx.inc(), row=0, sticky="w")
+            entry_query = ttk.Entry(frame_top, font=('Courier', 10), textvariable=self.textvar_query)
+            entry_query.grid(column=cx.inc(), row=0, sticky="ew")
+            entry_query.bind("<Return>", lambda event: self.startTask(self.doSearch, key="search"))
+
+            btn_search = ttk.Button(frame_top, text="Search", command=self.startTaskCurry(self.doSearch, key="search"))
+            btn_search.grid(column=cx.inc(), row=0, sticky="ew")
+
+        counter_main_row.inc()
+        self.rowconfigure(index=counter_main_row.value, weight=1)
+        with tkwrapc(ttk.Frame(self, relief=tk.GROOVE, padding=8)) as (frame, cx, cy):
+            frame.grid(column=0, row=counter_main_row.value, sticky="ns")
+
+            tk.Label(frame, text="Files").grid(column=0, row=cy.inc(), sticky="sw")
+
+            self.listbox_ids = tk.Listbox(frame, exportselection=False)
+            self.listbox_ids.grid(column=0, row=cy.inc(), sticky="ns")
+            frame.rowconfigure(index=cy.value, weight=1)
+
+            self.listbox_ids.bind('<<ListboxSelect>>', self.loadSelectedFile)
+
+            vsb = ttk.Scrollbar(frame, orient="vertical", command=self.listbox_ids.yview)
+            vsb.grid(column=1, row=cy.value, sticky='ns')
+            self.listbox_ids.configure(yscrollcommand=vsb.set)
+
+        self.tag_editor_list = TagEditorList(self, autocomplete=self.suggestTags)
+        self.tag_editor_list.grid(column=1, row=counter_main_row.value, sticky="nsew")
+
+        with tkwrap(ttk.Frame(self, relief=tk.GROOVE, padding=2)) as frame_bottom:
+            frame_bottom.grid(row=counter_main_row.inc(), column=0, sticky="ew", columnspan=2)
+
+            ttk.Label(frame_bottom, textvariable=self.textvar_status).grid(column=0, row=0, sticky="nsew")
+            frame_bottom.columnconfigure(0, weight=1)
+
+            btn_save = ttk.Button(frame_bottom, text="Save tags", command=self.startTaskCurry(self.doSave, key="save"), width=30)
+            btn_save.grid(column=1, row=0, sticky="nse")
+
+    def suggestTags(self, prefix: str, k: int) -> list[tuple[str, int]]:
+        # Runs on every keystroke: answers from the local index or not at all
+        if self.index is None:
+            return []
+        return self.index.suggest(prefix, k)
+
+    def doLoadIndex(self, token: CancelToken):
+        self.setStatus("Loading tag list...")
+        index = all_tags_index()
+        refreshed = index.refresh(max_age=TAG_INDEX_MAX_AGE_SECS)
+        token.raiseIfCancelled()
+
+        # Build the autocomplete arrays here rather than on the first keystroke
+        index.suggest("")
+        self.index = index
+        self.setStatus(f"{'Downloaded' if refreshed else 'Loaded'} {len(index)} tags for autocomplete")
+
+    def doSearch(self, token: CancelToken):
+        query: str = self.textvar_query.get() or "system:inbox"
+        self.setStatus(f"Searching {query!r}...")
+        file_ids: list[int] = logic.client.search_files(tags=[query])['file_ids']  # type: ignore
+        token.raiseIfCancelled()
+
+        def show():
+            self.file_ids = file_ids
+            self.listbox_ids.delete(0, tk.END)
+            for file_id in file_ids:
+                self.listbox_ids.insert(tk.END, str(file_id))
+            self.setStatus(f"Found {len(file_ids)} files")
+
+        self.callUI(show)
+
+    def loadSelectedFile(self, event=None):
+        selection = self.listbox_ids.curselection()
+        if not selection:
+            return
+        file_id = self.file_ids[selection[0]]
+
+        def load(token: CancelToken):
+            metadata = logic.client.get_file_metadata(file_ids=[file_id])['metadata'][0]  # type: ignore
+            tags = logic.file_tags(metadata, logic.local_tags_service_key, "storage_tags")
+            token.raiseIfCancelled()
+
+            def show():
+                self.file_id = file_id
+                self.original_tags = tags
+                self.tag_editor_list.setTagList(sorted(tags))
+                self.setStatus(f"File {file_id}: {len(tags)} tags")
+
+            self.callUI(show)
+
+        self.startTask(load, lock=False, key="load")
+
+    def doSave(self, token: CancelToken):
+        if self.file_id is None:
+            return
+        file_id = self.file_id
+        tags = set(self.tag_editor_list.tags)
+        added = sorted(tags - self.original_tags)
+        removed = sorted(self.original_tags - tags)
+        if not added and not removed:
+            self.setStatus("No changes to save")
+            return
+
+        logic.client.add_tags(
+            file_ids=[file_id],
+            service_keys_to_actions_to_tags={
+                logic.local_tags_service_key: {
+                    hydrus_api.TagAction.ADD: added,
+                    hydrus_api.TagAction.DELETE: removed,
+                }
+            }
+        )
+        if self.file_id == file_id:
+            self.original_tags = tags
+        self.setStatus(f"File {file_id}: added {len(added)}, removed {len(removed)} tags")
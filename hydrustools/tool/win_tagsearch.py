@@ -3,8 +3,9 @@ import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
 
 from .. import logic
-from ..component.gui_util import Increment, TextCopyWindow, tkwrap, tkwrapc
+from ..component.gui_util import Increment, saveRowsAs, showClipboard, tkwrap, tkwrapc
 from ..component.multicolumnlistbox import MultiColumnListbox
+from ..component.taskscheduler import CancelToken
 from ..component.toolwindow import ToolWindow
 from ..logic import TagInfo
 from ..settings import HTSettings
@@ -14,16 +15,45 @@ Settings = HTSettings()
 HEAD_NAME = "Tag Name"
 HEAD_COUNT = "Count"
 
+FILTER_DEBOUNCE_MS = 250
+
+def narrows(old_pattern: str | None, new_pattern: str) -> bool:
+    """Whether every string matching new_pattern also matches old_pattern.
+
+    Only recognizes the common case of typing more literal-ish characters onto
+    the end of a pattern; anything that could widen the match returns False.
+
+    >>> narrows("char", "chara")
+    True
+    >>> narrows("char", "chars?")
+    False
+    >>> narrows("char", "cha")
+    False
+    >>> narrows("ab{1", "ab{1}")
+    False
+    """
+    if old_pattern is None or not new_pattern.startswith(old_pattern):
+        return False
+    if old_pattern.endswith('\\'):
+        return False
+    suffix = new_pattern[len(old_pattern):]
+    # } and ) can close a construct opened earlier, e.g. "ab{1" -> "ab{1}"
+    return not any(c in suffix for c in '*?+{}|)')
+
 class TagSearchWindow(ToolWindow):  # noqa: PLR0904
     helpstr = """Bulk search and edit tags.
 
 Tag Query searches the tag list, regex refinment filters further.
 
+With live filter enabled, editing the refinement filters the last downloaded results as you type instead of searching Hydrus again.
+
 AND/OR opens search page for all images with the selected tags.
 
 "Map Siblings to Namespace" prompts for a namespace, then gives you an importable clipboard setting that will add the ideal sibling {namespace}:{tag} for each selected {tag}.
 
 "Delete selected tag" removes all occurrences of the selected tags from all images.
+
+"Export..." saves the selected rows (or every row, if none are selected) as CSV, JSON Lines or, with pyarrow installed, Parquet/Arrow.
     """
     def __init__(self, *args_, **kwargs) -> None:
         super().__init__(*args_, **kwargs)
@@ -34,10 +64,17 @@ AND/OR opens search page for all images with the selected tags.
         self.textvar_search: tk.StringVar = Settings.boundTkVar(self, 'tagsearch_search')
 
         self.boolvar_localonly = Settings.boundTkVar(self, 'tagsearch_localonly', tk.BooleanVar)
+        self.boolvar_live = Settings.boundTkVar(self, 'tagsearch_live', tk.BooleanVar)
+
+        # Unfiltered results of the last Hydrus search, and the last local filter
+        self.cached_query: str | None = None
+        self.cached_results: list[TagInfo] = []
+        self.last_filter: tuple[str | None, list[TagInfo]] = (None, [])
+        self._filter_after_id: str | None = None
 
         self.initwindow()
 
-        self.startTask(self.doSearch)
+        self.startTask(self.doSearch, key="search")
         self.mainloop()
 
     def initwindow(self) -> None:
@@ -63,7 +100,7 @@ AND/OR opens search page for all images with the selected tags.
 
             entry_search = ttk.Entry(frame_top, font=('Courier', 10), textvariable=self.textvar_presearch)
             entry_search.grid(column=cx.value, row=1, sticky="ew")
-            entry_search.bind("<Return>", self.startTaskCurry(self.doSearch))
+            entry_search.bind("<Return>", self.startTaskCurry(self.doSearch, key="search"))
 
             cx.inc()
             frame_top.columnconfigure(cx.value, weight=2)
@@ -73,12 +110,17 @@ AND/OR opens search page for all images with the selected tags.
 
             entry_search = ttk.Entry(frame_top, font=('Courier', 10), textvariable=self.textvar_search)
             entry_search.grid(column=cx.value, row=1, sticky="ew")
-            entry_search.bind("<Return>", self.startTaskCurry(self.doSearch))
+            entry_search.bind("<Return>", self.onRefinementReturn)
+            entry_search.bind("<KeyRelease>", self.onRefinementKey)
 
             cx.inc()
-            btn_search = ttk.Button(frame_top, text="Search", command=self.startTaskCurry(self.doSearch))
+            btn_search = ttk.Button(frame_top, text="Search", command=self.startTaskCurry(self.doSearch, key="search"))
             btn_search.grid(column=cx.value, row=1, sticky="ew")
 
+            cx.inc()
+            check_live = ttk.Checkbutton(frame_top, text="Live filter", variable=self.boolvar_live)
+            check_live.grid(column=cx.value, row=1, sticky="w")
+
             # frame_top.rowconfigure(index=counter_frame.inc(), weight=1)
 
         # Right
@@ -115,20 +157,33 @@ AND/OR opens search page for all images with the selected tags.
             btn_search = ttk.Button(frame_bottom, text="Delete selected tag", command=self.deleteTags)
             btn_search.grid(column=cx.inc(), row=0, sticky="nse")
 
-    def doSearch(self, event=None):
+            btn_export = ttk.Button(frame_bottom, text="Export...", command=self.exportRows)
+            btn_export.grid(column=cx.inc(), row=0, sticky="nse")
+
+    def doSearch(self, token: CancelToken):
         search_query: str = self.textvar_presearch.get() or "*"
         search_refinement: str = self.textvar_search.get()
         self.setStatus(f"Searching {search_query!r} for {search_refinement!r}")
 
-        self.tree_tags.delete_all()
+        # No live filtering until this search's rows are all drawn
+        self.tasks.cancelKey("filter")
+        self.cached_query = None
+
+        self.callUI(self.tree_tags.delete_all)
         # self.tree_tags.delete(*self.tree_tags.get_children())
 
         try:
-            results: list[TagInfo] = logic.search_tags_re(search_query, search_refinement,  display_type="display")
+            matcher = re.compile(search_refinement)
         except re.error as e:  # noqa: F821
-            messagebox.showerror(title="Invalid regex", message=f"Error parsing {search_refinement!r}\n{e}")
+            self.callUI(lambda e=e: messagebox.showerror(title="Invalid regex", message=f"Error parsing {search_refinement!r}\n{e}"))
             return
 
+        all_results: list[TagInfo] = sorted(
+            logic.search_tags(search_query, display_type="display"),
+            key=lambda ti: ti.value
+        )
+        results: list[TagInfo] = [ti for ti in all_results if matcher.match(ti.value)]
+
         tag_count = {
             tag.value: tag.count
             for tag in results
@@ -136,25 +191,84 @@ AND/OR opens search page for all images with the selected tags.
 
         # targets: list[SiblingInfo] = logic.get_sibling_ideal_targets([ti.value for ti in results])
 
-        def _apply():
-            self.tree_tags.update_tree([
-                {"values": [t.value, t.count]} for t in
-                sorted(results, key=lambda ti: ti.value)
-            ])
+        token.raiseIfCancelled()
+        self.queueRows(self.tree_tags, [
+            {"id": t.value, "values": [t.value, t.count]} for t in results
+        ], token)
 
-        if len(results) > 200:
-            self.after(10, _apply)
-        else:
-            _apply()
-        # for t in
-        #     # self.tree_tags.insert('', tk.END, values=row)
-        #     self.tree_tags.insert_item({"values": row})
-        #     if self.abort_threads: return
+        def _finish():
+            # Queued after the rows, so it runs once they are all in the tree
+            if token.cancelled:
+                return
+            self.cached_query = search_query
+            self.cached_results = all_results
+            self.last_filter = (search_refinement, results)
+            self.tree_tags.resize_cols()
 
-        self.winfo_toplevel().after(10, self.tree_tags.resize_cols)
+        self.callUI(_finish)
 
         self.setStatus(f"Found {len(results)} tags")
 
+    def canFilterLocally(self) -> bool:
+        return (
+            self.boolvar_live.get()
+            and self.cached_query is not None
+            and self.cached_query == (self.textvar_presearch.get() or "*")
+        )
+
+    def onRefinementKey(self, event=None):
+        if not self.canFilterLocally():
+            return
+
+        if self._filter_after_id:
+            self.after_cancel(self._filter_after_id)
+        self._filter_after_id = self.after(FILTER_DEBOUNCE_MS, self.startFilter)
+
+    def onRefinementReturn(self, event=None):
+        if self.canFilterLocally():
+            self.startFilter()
+        else:
+            self.startTask(self.doSearch, key="search")
+
+    def exportRows(self, event=None):
+        selection_only = bool(self.tree_tags.getSelectionIDs())
+        count = saveRowsAs(self, self.tree_tags.iter_dicts(selection_only), self.table_headings, title="Export tags")
+        if count is not None:
+            self.setStatus(f"Exported {count} tags")
+
+    def startFilter(self):
+        self._filter_after_id = None
+        if not self.canFilterLocally():
+            return
+        self.startTask(self.doFilter, lock=False, key="filter")
+
+    def doFilter(self, token: CancelToken):
+        pattern: str = self.textvar_search.get()
+        try:
+            matcher = re.compile(pattern)
+        except re.error as e:
+            self.setStatus(f"Invalid regex {pattern!r}: {e}")
+            return
+
+        last_pattern, last_results = self.last_filter
+        base = last_results if narrows(last_pattern, pattern) else self.cached_results
+
+        results: list[TagInfo] = [ti for ti in base if matcher.match(ti.value)]
+
+        token.raiseIfCancelled()
+        self.last_filter = (pattern, results)
+
+        items = [
+            {"id": t.value, "values": [t.value, t.count]} for t in results
+        ]
+
+        def _apply():
+            if not token.cancelled:
+                self.tree_tags.sync_tree(items)  # type: ignore
+
+        self.callUI(_apply)
+        self.setStatus(f"Filtered to {len(results)} / {len(self.cached_results)} tags")
+
     def openPageAnd(self, event=None):
         return self.openPage(OR=False)
 
@@ -184,7 +298,9 @@ AND/OR opens search page for all images with the selected tags.
         self.logger.info(matching_ids)
         self.setStatus(f"Got {len(matching_ids)} from search")
 
-        logic.client.add_popup("Tag Search", files_label=f"{selection!r}", file_ids=matching_ids)
+        # The query alone can't say "in my tags only", so only offer it for all services
+        delivery = logic.deliver_file_ids("Tag Search", f"{selection!r}", matching_ids, query=query if tag_domain is None else None)
+        self.setStatus(delivery.summary())
 
     def addNamespace(self, OR=False):
         selection: list[str] = [
@@ -203,12 +319,7 @@ AND/OR opens search page for all images with the selected tags.
             for tag in selection
         ]
 
-        clip_import = '\n'.join(
-            f"{source}\n{ideal}"
-            for (source, ideal) in pairs
-        )
-
-        TextCopyWindow(clip_import)
+        showClipboard([line for pair in pairs for line in pair])
         # TODO: Use clipboard format for this
         # Format is:
 
@@ -241,4 +352,4 @@ AND/OR opens search page for all images with the selected tags.
                     logic.replace_tag(tag_name, [])
             # self.enable()
 
-            self.startTask(self.doSearch)
\ No newline at end of file
+            self.startTask(self.doSearch, key="search")
\ No newline at end of file
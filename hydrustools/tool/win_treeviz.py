@@ -0,0 +1,227 @@
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+from .. import logic
+from ..component.gui_util import Increment, tkwrap, tkwrapc
+from ..component.taskscheduler import CancelToken
+from ..component.toolwindow import ToolWindow
+from ..logic import SiblingInfo
+from ..settings import HTSettings
+
+Settings = HTSettings()
+
+HEAD_SIBLINGS = "Siblings"
+HEAD_BELOW = "Below"
+
+PLACEHOLDER = "Loading..."
+# Newly shown nodes whose own children are fetched ahead of being opened
+PREFETCH_NODES = 40
+# Descendants (or ancestors) looked up per request while finding direct neighbors
+NEIGHBOR_BATCH = 200
+
+
+def direct_neighbors(neighbors: frozenset[str], infos: dict[str, SiblingInfo], down: bool) -> list[str]:
+    """The neighbors that are one step away, rather than reachable through another neighbor.
+
+    With down, neighbors are a tag's descendants and a child is direct when
+    none of its ancestors are among them; otherwise the same for parents.
+
+    >>> info = lambda t, a, d: SiblingInfo(t, t, frozenset(), frozenset(a), frozenset(d))
+    >>> infos = {"character:a": info("character:a", ["series:x", "franchise:y"], []), "series:x": info("series:x", ["franchise:y"], ["character:a"])}
+    >>> direct_neighbors(frozenset(infos), infos, down=True)
+    ['series:x']
+    """
+    return sorted(
+        tag
+        for tag in neighbors
+        if tag in infos
+        and not (
+            (infos[tag].ancestors if down else infos[tag].descendants) & neighbors
+        )
+    )
+
+
+class TreeVisualizerWindow(ToolWindow):
+    helpstr = """Browse tag parent hierarchies.
+
+Enter a tag and press Show. Expanding a node loads its direct children (or direct parents, with "Show parents" checked) from Hydrus.
+
+Nothing is fetched until it is needed: each level is loaded when expanded, and the next level below the nodes on screen is fetched in the background so it opens instantly.
+
+Hydrus only reports all tags above or below a tag, not which are one step away, so finding a node's direct children means looking some of them up. They are looked up a batch at a time, and anything below a tag already seen is skipped, so a big franchise does not cost a lookup per tag in it.
+
+Tags are shown as their ideal siblings.
+    """
+    def __init__(self, *args_, **kwargs) -> None:
+        super().__init__(*args_, **kwargs)
+
+        self.textvar_root: tk.StringVar = Settings.boundTkVar(self, 'treeviz_root')
+        self.boolvar_up: tk.BooleanVar = Settings.boundTkVar(self, 'treeviz_up', tk.BooleanVar)
+
+        # Direct neighbors per (tag, direction), computed at most once per session
+        self.neighbor_cache: dict[tuple[str, bool], list[str]] = {}
+        self.neighbor_cache_lock = threading.Lock()
+        # Treeview iid -> tag, since a tag can appear under several parents
+        self.node_tags: dict[str, str] = {}
+
+        self.initwindow()
+        self.mainloop()
+
+    def initwindow(self) -> None:
+        self.title("Tree Visualizer")
+        self.geometry("600x640")
+
+        self.columnconfigure(0, weight=1)
+
+        counter_main_row = Increment()
+
+        with tkwrapc(ttk.Frame(self, relief=tk.GROOVE, padding=8)) as (frame_top, cx, _):
+            frame_top.grid(column=0, row=counter_main_row.inc(), sticky="ew")
+            frame_top.columnconfigure(0, weight=1)
+
+            entry_root = ttk.Entry(frame_top, font=('Courier', 10), textvariable=self.textvar_root)
+            entry_root.grid(column=cx.inc(), row=0, sticky="ew")
+            entry_root.bind("<Return>", self.showRoot)
+
+            check_up = ttk.Checkbutton(frame_top, text="Show parents", variable=self.boolvar_up, command=self.showRoot)
+            check_up.grid(column=cx.inc(), row=0, sticky="ew")
+
+            btn_show = ttk.Button(frame_top, text="Show", command=self.showRoot)
+            btn_show.grid(column=cx.inc(), row=0, sticky="ew")
+
+        with tkwrap(ttk.Frame(self)) as frame_tree:
+            frame_tree.grid(column=0, row=counter_main_row.inc(), sticky="nsew")
+            self.rowconfigure(counter_main_row.value, weight=1)
+            frame_tree.columnconfigure(0, weight=1)
+            frame_tree.rowconfigure(0, weight=1)
+
+            self.tree = ttk.Treeview(frame_tree, columns=[HEAD_SIBLINGS, HEAD_BELOW], selectmode=tk.BROWSE)
+            self.tree.grid(column=0, row=0, sticky="nsew")
+            self.tree.heading("#0", text="Tag")
+            self.tree.column("#0", width=380)
+            for heading in (HEAD_SIBLINGS, HEAD_BELOW):
+                self.tree.heading(heading, text=heading)
+                self.tree.column(heading, width=80, stretch=False, anchor=tk.E)
+            self.tree.bind("<<TreeviewOpen>>", self.onOpen)
+
+            vsb = ttk.Scrollbar(frame_tree, orient="vertical", command=self.tree.yview)
+            vsb.grid(column=1, row=0, sticky="ns")
+            self.tree.configure(yscrollcommand=vsb.set)
+
+        with tkwrap(ttk.Frame(self, relief=tk.GROOVE, padding=2)) as frame_bottom:
+            frame_bottom.grid(row=counter_main_row.inc(), column=0, sticky="ew")
+            ttk.Label(frame_bottom, textvariable=self.textvar_status).grid(column=0, row=0, sticky="nsew")
+            frame_bottom.columnconfigure(0, weight=1)
+
+    def neighbors(self, tag: str, up: bool) -> list[str]:
+        """Direct children (or parents) of tag, fetched and cached on first use."""
+        with self.neighbor_cache_lock:
+            cached = self.neighbor_cache.get((tag, up))
+        if cached is not None:
+            return cached
+
+        info = logic.fetch_sibling_infos([tag], cached=True).get(tag)
+        if not info:
+            return []
+        reachable = info.ancestors if up else info.descendants
+
+        # Hydrus only gives transitive relationships. Rather than looking up
+        # every reachable tag, look them up in batches and drop whatever lies
+        # beyond a tag already looked up: those can't be direct neighbors.
+        infos: dict[str, SiblingInfo] = {}
+        pending = set(reachable)
+        while pending:
+            batch = sorted(pending)[:NEIGHBOR_BATCH]
+            pending.difference_update(batch)
+            for neighbor, neighbor_info in logic.fetch_sibling_infos(batch, cached=True).items():
+                infos[neighbor] = neighbor_info
+                pending -= neighbor_info.ancestors if up else neighbor_info.descendants
+        result = direct_neighbors(reachable, infos, down=not up)
+
+        with self.neighbor_cache_lock:
+            self.neighbor_cache[(tag, up)] = result
+        return result
+
+    def showRoot(self, event=None) -> None:
+        self.startTask(self.doShowRoot, key="root")
+
+    def doShowRoot(self, token: CancelToken) -> None:
+        tag: str = self.textvar_root.get().strip()
+        if not tag:
+            return
+
+        info = logic.fetch_sibling_infos([tag], cached=True).get(tag)
+        token.raiseIfCancelled()
+        if not info:
+            self.setStatus(f"No relationships for {tag!r}")
+            return
+
+        root = info.ideal_tag
+        up: bool = self.boolvar_up.get()
+
+        def show() -> None:
+            self.tree.delete(*self.tree.get_children())
+            self.node_tags.clear()
+            iid = self.insertNode("", root, info, up)
+            self.tree.item(iid, open=True)
+            self.expandNode(iid)
+
+        self.callUI(show)
+
+    def insertNode(self, parent_iid: str, tag: str, info: SiblingInfo | None, up: bool) -> str:
+        reachable = (info.ancestors if up else info.descendants) if info else frozenset()
+        iid = self.tree.insert(parent_iid, tk.END, text=tag, values=[
+            len(info.siblings) if info else "",
+            len(reachable) if info else "",
+        ])
+        self.node_tags[iid] = tag
+        # The placeholder makes the node expandable until it is opened
+        if reachable:
+            self.tree.insert(iid, tk.END, text=PLACEHOLDER)
+        return iid
+
+    def onOpen(self, event=None) -> None:
+        iid = self.tree.focus()
+        if iid:
+            self.expandNode(iid)
+
+    def expandNode(self, iid: str) -> None:
+        children = self.tree.get_children(iid)
+        if not (len(children) == 1 and self.tree.item(children[0], "text") == PLACEHOLDER):
+            return
+        tag = self.node_tags[iid]
+        up: bool = self.boolvar_up.get()
+
+        def loadChildren(token: CancelToken) -> None:
+            neighbors = self.neighbors(tag, up)
+            infos = logic.get_sibling_infos(neighbors, cached=True)
+            token.raiseIfCancelled()
+            self.callUI(self.fillNode, iid, tag, up, neighbors, infos)
+
+        loadChildren.__name__ = f"expand {tag}"
+        self.startTask(loadChildren, lock=False)
+
+    def fillNode(self, iid: str, tag: str, up: bool, neighbors: list[str], infos: dict[str, SiblingInfo]) -> None:
+        if not self.tree.exists(iid) or self.node_tags.get(iid) != tag:
+            return
+
+        self.tree.delete(*self.tree.get_children(iid))
+        shown: list[str] = []
+        for neighbor in neighbors:
+            info = infos.get(neighbor)
+            self.insertNode(iid, neighbor, info, up)
+            if info and (info.ancestors if up else info.descendants):
+                shown.append(neighbor)
+
+        self.setStatus(f"{tag}: {len(neighbors)} direct {'parents' if up else 'children'}")
+
+        if shown:
+            to_prefetch = shown[:PREFETCH_NODES]
+
+            def prefetch(token: CancelToken) -> None:
+                for neighbor in to_prefetch:
+                    token.raiseIfCancelled()
+                    self.neighbors(neighbor, up)
+
+            self.startTask(prefetch, lock=False, key="prefetch")
@@ -1,5 +1,8 @@
+import multiprocessing
 import sys
 from hydrustools import gui
 
 if __name__ == '__main__':
+    # Note extraction runs in worker processes, which need this in a frozen exe
+    multiprocessing.freeze_support()
     sys.exit(gui.main())